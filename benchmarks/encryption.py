@@ -0,0 +1,27 @@
+"""Compares throughput of the fast and the fallback AES/CFB8 ciphers."""
+
+import random
+import timeit
+
+from cubes.net import encryption
+
+_SECRET = random.randbytes(16)
+_SIZES = (64, 1024, 16384)
+
+
+def _benchmark(fast: bool) -> None:
+    for size in _SIZES:
+        data = random.randbytes(size)
+        encryptor, _ = encryption.create_ciphers(_SECRET, fast=fast)
+        number = max(1, 2**20 // size) if fast else max(1, 2**14 // size)
+        seconds = timeit.timeit(lambda: encryptor.update(data), number=number)
+        speed = size * number / seconds / 2**20
+        print(f"{'fast' if fast else 'fallback':>8} {size:>6} B: {speed:10.3f} MiB/s")
+
+
+if __name__ == "__main__":
+    if encryption.FAST_CIPHER_AVAILABLE:
+        _benchmark(fast=True)
+    else:
+        print("cryptography is not installed, skipping the fast cipher")
+    _benchmark(fast=False)
@@ -0,0 +1,110 @@
+"""Compares the native NBT codec and lazy views with nbtlib.
+
+"lazy get" reads one top level key, "lazy pass" decodes and encodes the payload
+    unchanged, as a proxy does.
+"""
+
+import io
+import timeit
+
+import nbtlib  # type: ignore
+
+from cubes import nbt
+
+
+def _item(index: int) -> nbtlib.Compound:
+    return nbtlib.parse_nbt(
+        f'{{id:"minecraft:diamond_sword",Count:1b,tag:{{Damage:{index},'
+        'display:{Name:\'{"text":"Sword","italic":false}\','
+        'Lore:[\'{"text":"Sharp"}\',\'{"text":"Old"}\']},'
+        'Enchantments:[{id:"minecraft:sharpness",lvl:5s},'
+        '{id:"minecraft:unbreaking",lvl:3s}]}}'
+    )
+
+
+def _registry() -> dict:
+    biomes = [
+        {
+            "name": f"minecraft:biome_{index}",
+            "id": index,
+            "element": {
+                "temperature": 0.8,
+                "downfall": 0.4,
+                "has_precipitation": True,
+                "effects": {
+                    "sky_color": 7907327,
+                    "fog_color": 12638463,
+                    "water_color": 4159204,
+                    "mood_sound": {"sound": "minecraft:ambient.cave", "delay": 6000},
+                },
+            },
+        }
+        for index in range(64)
+    ]
+    return {"type": "minecraft:worldgen/biome", "value": biomes}
+
+
+def _old_dumps(value: nbtlib.Compound) -> bytes:
+    buffer = io.BytesIO()
+    buffer.write(b"\x0a\x00\x00")
+    nbtlib.Compound(value).write(buffer)
+    return buffer.getvalue()
+
+
+def _old_loads(data: bytes) -> nbtlib.Compound:
+    buffer = io.BytesIO(data)
+    buffer.read(3)
+    return nbtlib.Compound.parse(buffer)
+
+
+_SAMPLES = {
+    "item": _item(7),
+    "registry": _old_loads(nbt.dumps(_registry())),
+    "heightmaps": nbtlib.Compound(
+        {"MOTION_BLOCKING": nbtlib.LongArray(range(37))}  # type: ignore
+    ),
+}
+
+
+def _report(name: str, old: float, new: float) -> None:
+    print(f"{name:>24}: {old * 1e6:9.1f} -> {new * 1e6:9.1f} us ({old / new:5.1f}x)")
+
+
+def _benchmark(name: str, value: nbtlib.Compound, number: int = 50) -> None:
+    data = _old_dumps(value)
+    plain = nbt.loads(data)
+
+    def measure(function) -> float:
+        return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+    _report(
+        f"{name} encode",
+        measure(lambda: _old_dumps(value)),
+        measure(lambda: nbt.dumps(value)),
+    )
+    _report(
+        f"{name} encode plain",
+        measure(lambda: _old_dumps(value)),
+        measure(lambda: nbt.dumps(plain)),
+    )
+    _report(
+        f"{name} decode",
+        measure(lambda: _old_loads(data)),
+        measure(lambda: nbt.loads(data)),
+    )
+    key = next(iter(plain))
+    _report(
+        f"{name} lazy get",
+        measure(lambda: _old_loads(data)[key]),
+        measure(lambda: nbt.loads_lazy(data)[key]),
+    )
+    _report(
+        f"{name} lazy pass",
+        measure(lambda: _old_dumps(_old_loads(data))),
+        measure(lambda: nbt.dumps(nbt.loads_lazy(data))),
+    )
+
+
+if __name__ == "__main__":
+    for sample_name, sample in _SAMPLES.items():
+        _benchmark(sample_name, sample)
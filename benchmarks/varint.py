@@ -0,0 +1,91 @@
+"""Compares the VarInt codec with the implementation it replaced."""
+
+import io
+import random
+import struct
+import timeit
+
+from cubes.net import serializers
+
+_COUNT = 4096
+_SAMPLES = {
+    "one byte": [random.randrange(0x80) for _ in range(_COUNT)],
+    "two bytes": [random.randrange(0x80, 0x4000) for _ in range(_COUNT)],
+    "five bytes": [random.randrange(-(2**31), 0) for _ in range(_COUNT)],
+}
+
+
+def _old_serialize(value: int) -> bytes:
+    if value < 0:
+        value += 1 << 32
+    result = b""
+    for _ in range(5):
+        byte = value & 0x7F
+        value >>= 7
+        result += struct.pack("B", byte | (0x80 if value > 0 else 0))
+        if value == 0:
+            break
+    return result
+
+
+def _old_from_buffer(buffer: io.BytesIO) -> int:
+    result = 0
+    for index in range(5):
+        byte = ord(buffer.read(1))
+        result |= (byte & 0x7F) << 7 * index
+        if not byte & 0x80:
+            break
+    if result & (1 << 31):
+        result -= 1 << 32
+    return result
+
+
+def _report(name: str, old: float, new: float) -> None:
+    print(
+        f"{name:>22}: {_COUNT / old / 1e6:7.2f} -> {_COUNT / new / 1e6:7.2f} M/s"
+        f" ({old / new:5.1f}x)"
+    )
+
+
+def _benchmark(name: str, values: list[int], number: int = 20) -> None:
+    varint = serializers.VarIntSerializer
+    data = varint.encode_array(values)
+
+    def old_encode():
+        for value in values:
+            _old_serialize(value)
+
+    def new_encode():
+        for value in values:
+            varint.encode(value)
+
+    def old_decode():
+        buffer = io.BytesIO(data)
+        for _ in values:
+            _old_from_buffer(buffer)
+
+    def new_decode():
+        buffer = io.BytesIO(data)
+        for _ in values:
+            varint.from_buffer(buffer)
+
+    def measure(function) -> float:
+        return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+    _report(f"{name} encode", measure(old_encode), measure(new_encode))
+    _report(
+        f"{name} encode array",
+        measure(old_encode),
+        measure(lambda: varint.encode_array(values)),
+    )
+    _report(f"{name} decode", measure(old_decode), measure(new_decode))
+    _report(
+        f"{name} decode array",
+        measure(old_decode),
+        measure(lambda: varint.read_array(data, 0, len(values))),
+    )
+
+
+if __name__ == "__main__":
+    for sample_name, sample in _SAMPLES.items():
+        _benchmark(sample_name, sample)
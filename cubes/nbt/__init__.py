@@ -5,8 +5,15 @@ This module is a wrapper over the [nbtlib](https://github.com/vberlier/nbtlib).
     `Float`, `Int`, `IntArray`, `List`, `Long`, `LongArray`, `Short`, `String`
     and the function `schema`.
 
+Network payloads are better encoded and decoded with `dumps` and `loads`, they
+    work with plain Python values and don't build trees of nbtlib objects.
+    `loads_lazy` decodes only the accessed parts of a compound and keeps the
+    unchanged parts encoded.
+
 Examples:
     >>> cubes.nbt.String('vberlier is cool!')
+    >>> cubes.nbt.dumps({"text": "Hello"}, network=True)
+    b'\\n\\x08\\x00\\x04text\\x00\\x05Hello\\x00'
 """
 
 # pylint: disable=W0611
@@ -26,3 +33,6 @@ from nbtlib import (  # type: ignore
     String,
     schema,
 )
+
+from cubes.nbt._codec import MAX_DEPTH, TagType, dumps, loads, read, tag_type, write
+from cubes.nbt._lazy import LazyCompound, loads_lazy, read_lazy
@@ -0,0 +1,446 @@
+"""Streaming NBT codec working with plain Python values.
+
+Encoding accepts dicts, lists, `bool`, `int`, `float`, `str`, `bytes` and
+    `array.array` ('b', 'i' and 'q' typecodes) as well as nbtlib tags (their
+    types are kept). Decoding returns plain Python values: `dict`, `list`,
+    `int`, `float`, `str`, `bytes` and `array.array` for Int and Long arrays.
+"""
+
+import array
+import enum
+import struct
+import sys
+from typing import Any, Callable, Mapping
+
+MAX_DEPTH = 512
+
+_BYTE_STRUCT = struct.Struct(">b")
+_USHORT_STRUCT = struct.Struct(">H")
+_INT_STRUCT = struct.Struct(">i")
+_LONG_STRUCT = struct.Struct(">q")
+_FLOAT_STRUCT = struct.Struct(">f")
+_DOUBLE_STRUCT = struct.Struct(">d")
+_SHORT_STRUCT = struct.Struct(">h")
+
+_INT_RANGE = range(-(2**31), 2**31)
+_SWAP = sys.byteorder == "little"
+
+_Buffer = bytes | bytearray | memoryview
+_Writer = Callable[[bytearray, Any, int], None]
+_Reader = Callable[[_Buffer, int, int], tuple[Any, int]]
+
+
+class TagType(enum.IntEnum):
+    END = 0
+    BYTE = 1
+    SHORT = 2
+    INT = 3
+    LONG = 4
+    FLOAT = 5
+    DOUBLE = 6
+    BYTE_ARRAY = 7
+    STRING = 8
+    LIST = 9
+    COMPOUND = 10
+    INT_ARRAY = 11
+    LONG_ARRAY = 12
+
+
+# plain ints are compared much faster than enum members
+(
+    _END,
+    _BYTE,
+    _SHORT,
+    _INT,
+    _LONG,
+    _FLOAT,
+    _DOUBLE,
+    _BYTE_ARRAY,
+    _STRING,
+    _LIST,
+    _COMPOUND,
+    _INT_ARRAY,
+    _LONG_ARRAY,
+) = range(13)
+
+# struct format characters of the tags, lists of them are packed in one call
+_NUMERIC_FORMATS = {
+    _BYTE: "b",
+    _SHORT: "h",
+    _INT: "i",
+    _LONG: "q",
+    _FLOAT: "f",
+    _DOUBLE: "d",
+}
+_ITEM_FORMATS = {1: "b", 4: "i", 8: "q"}
+_ARRAY_TYPECODES = {"b": _BYTE_ARRAY, "i": _INT_ARRAY}
+_ARRAY_TYPECODES.update(
+    {code: _LONG_ARRAY for code in "lq" if array.array(code).itemsize == 8}
+)
+
+
+_TYPE_TAGS: dict[type, int] = {
+    bool: _BYTE,
+    float: _DOUBLE,
+    str: _STRING,
+    dict: _COMPOUND,
+    list: _LIST,
+    tuple: _LIST,
+    bytes: _BYTE_ARRAY,
+    bytearray: _BYTE_ARRAY,
+}
+
+# compound keys repeat a lot, their encoded form is cached
+_KEYS: dict[str, bytes] = {}
+_KEYS_LIMIT = 4096
+
+
+def tag_type(value: Any) -> int:  # pylint: disable=R0911
+    """Returns the tag type the value is encoded with."""
+    cls = type(value)
+    tag = _TYPE_TAGS.get(cls)
+    if tag is not None:
+        return tag
+    if cls is int:
+        return _INT if value in _INT_RANGE else _LONG
+    tag = getattr(cls, "tag_id", None)  # nbtlib tags
+    if tag is not None:
+        _TYPE_TAGS[cls] = tag
+        return tag
+    if isinstance(value, bool):
+        return _BYTE
+    if isinstance(value, int):
+        return _INT if value in _INT_RANGE else _LONG
+    if isinstance(value, float):
+        return _DOUBLE
+    if isinstance(value, str):
+        return _STRING
+    if isinstance(value, Mapping):
+        return _COMPOUND
+    if isinstance(value, (list, tuple)):
+        return _LIST
+    if isinstance(value, (bytes, bytearray)):
+        return _BYTE_ARRAY
+    if isinstance(value, array.array) and value.typecode in _ARRAY_TYPECODES:
+        return _ARRAY_TYPECODES[value.typecode]
+    raise TypeError(f"Can't encode {cls.__name__} as NBT.")
+
+
+def _split_surrogates(char: str) -> str:
+    code = ord(char) - 0x10000
+    if code < 0:
+        return char
+    return chr(0xD800 | code >> 10) + chr(0xDC00 | code & 0x3FF)
+
+
+def _encode_string(value: str) -> bytes:
+    """Encodes the string with Modified UTF-8 and its length."""
+    if value.isascii() and "\0" not in value:
+        data = value.encode("ascii")
+    else:
+        # NUL takes two bytes and characters outside of the BMP are encoded as
+        # surrogate pairs
+        if any(ord(char) > 0xFFFF for char in value):
+            value = "".join(map(_split_surrogates, value))
+        data = value.encode("utf-8", "surrogatepass").replace(b"\0", b"\xc0\x80")
+    if len(data) > 0xFFFF:
+        raise ValueError("String is too long for NBT.")
+    return _USHORT_STRUCT.pack(len(data)) + data
+
+
+def _encode_key(key: str) -> bytes:
+    data = _encode_string(key)
+    if len(_KEYS) < _KEYS_LIMIT:
+        _KEYS[key] = data
+    return data
+
+
+def _decode_string(data: bytes) -> str:
+    data = data.replace(b"\xc0\x80", b"\0")
+    return (
+        data.decode("utf-8", "surrogatepass")
+        .encode("utf-16-be", "surrogatepass")
+        .decode("utf-16-be")
+    )
+
+
+def _array_bytes(value: Any, item_size: int) -> bytes:
+    if isinstance(value, array.array):
+        if value.itemsize != item_size:
+            raise ValueError("Array items have a wrong size.")
+        if _SWAP:
+            value = array.array(value.typecode, value)
+            value.byteswap()
+        return value.tobytes()
+    if isinstance(value, (bytes, bytearray)) and item_size == 1:
+        return bytes(value)
+    if hasattr(value, "astype"):  # nbtlib arrays are numpy arrays
+        dtype = f">i{item_size}"
+        return (value if value.dtype == dtype else value.astype(dtype)).tobytes()
+    return struct.pack(f">{len(value)}{_ITEM_FORMATS[item_size]}", *value)
+
+
+def _array_writer(item_size: int) -> _Writer:
+    def write_array(out: bytearray, value: Any, _depth: int) -> None:
+        data = _array_bytes(value, item_size)
+        out += _INT_STRUCT.pack(len(data) // item_size)
+        out += data
+
+    return write_array
+
+
+def _numeric_writer(item: struct.Struct) -> _Writer:
+    pack = item.pack
+
+    def write_numeric(out: bytearray, value: Any, _depth: int) -> None:
+        out += pack(value)
+
+    return write_numeric
+
+
+def _write_string(out: bytearray, value: Any, _depth: int) -> None:
+    out += _encode_string(value)
+
+
+def _list_type(value: Any) -> int:
+    if type(value) is not list:  # pylint: disable=C0123
+        subtype = getattr(type(value), "subtype", None)  # typed nbtlib lists
+        if subtype is not None and subtype.tag_id:
+            return subtype.tag_id
+    if not value:
+        return _END
+    result = tag_type(value[0])
+    if result == _INT and type(value[0]) is int:  # pylint: disable=C0123
+        # plain ints are stored as Long if any of them doesn't fit Int
+        for item in value:
+            if item not in _INT_RANGE:
+                return _LONG
+    return result
+
+
+def _write_list(out: bytearray, value: Any, depth: int) -> None:
+    if depth > MAX_DEPTH:
+        raise ValueError("NBT is nested too deep.")
+    subtype = _list_type(value)
+    out.append(subtype)
+    out += _INT_STRUCT.pack(len(value))
+    if (item_format := _NUMERIC_FORMATS.get(subtype)) is not None:
+        out += struct.pack(f">{len(value)}{item_format}", *value)
+    elif subtype == _COMPOUND:
+        for item in value:
+            _write_compound(out, item, depth + 1)
+    elif subtype == _STRING:
+        for item in value:
+            out += _encode_string(item)
+    else:
+        writer = _WRITERS[subtype]
+        for item in value:
+            writer(out, item, depth + 1)
+
+
+def _write_compound(out: bytearray, value: Any, depth: int) -> None:
+    if depth > MAX_DEPTH:
+        raise ValueError("NBT is nested too deep.")
+    if type(value) is not dict:  # pylint: disable=C0123
+        # lazy compounds write unchanged parts as they were read
+        write_payload = getattr(value, "write_payload", None)
+        if write_payload is not None:
+            write_payload(out)
+            return
+    types, keys, writers = _TYPE_TAGS, _KEYS, _WRITERS
+    for key, item in value.items():
+        tag = types.get(cls := type(item))
+        if tag is None:
+            if cls is int:
+                tag = _INT if -0x80000000 <= item <= 0x7FFFFFFF else _LONG
+            else:
+                tag = tag_type(item)
+        out.append(tag)
+        out += keys.get(key) or _encode_key(key)
+        if tag == _STRING:
+            out += _encode_string(item)
+        elif tag == _INT:
+            out += _INT_STRUCT.pack(item)
+        elif tag == _COMPOUND:
+            _write_compound(out, item, depth + 1)
+        else:
+            writers[tag](out, item, depth + 1)
+    out.append(_END)
+
+
+_WRITERS: dict[int, _Writer] = {
+    _END: lambda out, value, depth: None,
+    _BYTE: _numeric_writer(_BYTE_STRUCT),
+    _SHORT: _numeric_writer(_SHORT_STRUCT),
+    _INT: _numeric_writer(_INT_STRUCT),
+    _LONG: _numeric_writer(_LONG_STRUCT),
+    _FLOAT: _numeric_writer(_FLOAT_STRUCT),
+    _DOUBLE: _numeric_writer(_DOUBLE_STRUCT),
+    _BYTE_ARRAY: _array_writer(1),
+    _STRING: _write_string,
+    _LIST: _write_list,
+    _COMPOUND: _write_compound,
+    _INT_ARRAY: _array_writer(4),
+    _LONG_ARRAY: _array_writer(8),
+}
+
+
+def write(out: bytearray, value: Any, *, network: bool = False, name: str = "") -> None:
+    """Appends the value with its root tag to `out`.
+
+    With `network` the root has no name, as it's sent since 1.20.2. `None` is
+        encoded as a single End tag (no value).
+    """
+    tag = _END if value is None else tag_type(value)
+    out.append(tag)
+    if tag == _END:
+        return
+    if not network:
+        out += _KEYS.get(name) or _encode_key(name)
+    try:
+        writer = _WRITERS[tag]
+    except KeyError:
+        raise ValueError(f"Unknown NBT tag type {tag}.") from None
+    writer(out, value, 0)
+
+
+def dumps(value: Any, *, network: bool = False, name: str = "") -> bytes:
+    """Encodes the value with its root tag."""
+    out = bytearray()
+    write(out, value, network=network, name=name)
+    return bytes(out)
+
+
+def _read_string(data: _Buffer, offset: int) -> tuple[str, int]:
+    (length,) = _USHORT_STRUCT.unpack_from(data, offset)
+    offset += 2
+    raw = data[offset : offset + length]
+    if len(raw) != length:
+        raise ValueError("Unexpected end of data.")
+    try:
+        return str(raw, "utf-8"), offset + length
+    except UnicodeDecodeError:
+        return _decode_string(bytes(raw)), offset + length
+
+
+def _read_compound(data: _Buffer, offset: int, depth: int) -> tuple[dict, int]:
+    if depth > MAX_DEPTH:
+        raise ValueError("NBT is nested too deep.")
+    result: dict[str, Any] = {}
+    readers, read_string = _READERS, _read_string
+    unpack_int = _INT_STRUCT.unpack_from
+    while True:
+        tag = data[offset]
+        if tag == _END:
+            return result, offset + 1
+        name, offset = read_string(data, offset + 1)
+        if tag == _STRING:
+            result[name], offset = read_string(data, offset)
+        elif tag == _INT:
+            result[name] = unpack_int(data, offset)[0]
+            offset += 4
+        elif tag == _COMPOUND:
+            result[name], offset = _read_compound(data, offset, depth + 1)
+        else:
+            try:
+                reader = readers[tag]
+            except KeyError:
+                raise ValueError(f"Unknown NBT tag type {tag}.") from None
+            result[name], offset = reader(data, offset, depth + 1)
+
+
+def _read_list(data: _Buffer, offset: int, depth: int) -> tuple[list, int]:
+    if depth > MAX_DEPTH:
+        raise ValueError("NBT is nested too deep.")
+    subtype = data[offset]
+    (length,) = _INT_STRUCT.unpack_from(data, offset + 1)
+    offset += 5
+    if length <= 0 or subtype == _END:
+        return [], offset
+    if subtype in _NUMERIC_FORMATS:
+        items = struct.Struct(f">{length}{_NUMERIC_FORMATS[subtype]}")
+        return list(items.unpack_from(data, offset)), offset + items.size
+    try:
+        reader = _READERS[subtype]
+    except KeyError:
+        raise ValueError(f"Unknown NBT tag type {subtype}.") from None
+    if length > len(data) - offset:  # every item takes at least one byte
+        raise ValueError("Unexpected end of data.")
+    result = [None] * length
+    for index in range(length):
+        result[index], offset = reader(data, offset, depth + 1)
+    return result, offset
+
+
+def _array_reader(typecode: str) -> _Reader:
+    item_size = array.array(typecode).itemsize
+
+    def read_array(data: _Buffer, offset: int, _depth: int) -> tuple[Any, int]:
+        (length,) = _INT_STRUCT.unpack_from(data, offset)
+        offset += 4
+        end = offset + max(length, 0) * item_size
+        if end > len(data):
+            raise ValueError("Unexpected end of data.")
+        if typecode == "b":
+            return bytes(data[offset:end]), end
+        result = array.array(typecode, data[offset:end])
+        if _SWAP:
+            result.byteswap()
+        return result, end
+
+    return read_array
+
+
+def _numeric_reader(item: struct.Struct) -> _Reader:
+    unpack_from, size = item.unpack_from, item.size
+
+    def read_numeric(data: _Buffer, offset: int, _depth: int) -> tuple[Any, int]:
+        return unpack_from(data, offset)[0], offset + size
+
+    return read_numeric
+
+
+_READERS: dict[int, _Reader] = {
+    _BYTE: _numeric_reader(_BYTE_STRUCT),
+    _SHORT: _numeric_reader(_SHORT_STRUCT),
+    _INT: _numeric_reader(_INT_STRUCT),
+    _LONG: _numeric_reader(_LONG_STRUCT),
+    _FLOAT: _numeric_reader(_FLOAT_STRUCT),
+    _DOUBLE: _numeric_reader(_DOUBLE_STRUCT),
+    _BYTE_ARRAY: _array_reader("b"),
+    _STRING: lambda data, offset, _depth: _read_string(data, offset),
+    _LIST: _read_list,
+    _COMPOUND: _read_compound,
+    _INT_ARRAY: _array_reader("i"),
+    _LONG_ARRAY: _array_reader("q"),
+}
+
+
+def read(data: _Buffer, offset: int = 0, *, network: bool = False) -> tuple[Any, int]:
+    """Decodes the value with its root tag at `offset` of `data`.
+
+    Returns the value (`None` for an End root tag) and offset of the data after
+        it. The name of the root tag is skipped.
+    """
+    try:
+        tag = data[offset]
+        offset += 1
+        if tag == _END:
+            return None, offset
+        if not network:
+            _, offset = _read_string(data, offset)
+        try:
+            reader = _READERS[tag]
+        except KeyError:
+            raise ValueError(f"Unknown NBT tag type {tag}.") from None
+        return reader(data, offset, 0)
+    except (IndexError, struct.error):
+        raise ValueError("Unexpected end of data.") from None
+
+
+def loads(data: _Buffer, *, network: bool = False) -> Any:
+    """Decodes the value with its root tag, the data must contain nothing else."""
+    value, offset = read(data, 0, network=network)
+    if offset != len(data):
+        raise ValueError("Unexpected data after NBT.")
+    return value
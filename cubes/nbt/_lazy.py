@@ -0,0 +1,303 @@
+"""Lazy compound views over encoded NBT.
+
+A view indexes offsets of its entries in one pass without building values.
+    Nested compounds are views too, they are indexed when they are accessed.
+    Scalars are decoded on every access, lists and arrays are decoded once (they
+    can be changed in place). When a view is encoded, entries that weren't
+    changed are copied as they were read, a view that wasn't accessed at all is
+    copied as a whole.
+
+Examples:
+    >>> item = loads_lazy(data, network=True)
+    >>> item["tag"]["CustomModelData"]
+    7
+    >>> item["tag"]["Damage"] = 3
+    >>> dumps(item, network=True)  # only "Damage" is encoded again
+"""
+
+# pylint: disable=W0212
+import struct
+from typing import Any, Iterator, MutableMapping, NamedTuple
+
+from cubes.nbt import _codec
+
+_FIXED_SIZES = {
+    _codec._BYTE: 1,
+    _codec._SHORT: 2,
+    _codec._INT: 4,
+    _codec._LONG: 8,
+    _codec._FLOAT: 4,
+    _codec._DOUBLE: 8,
+}
+_ARRAY_ITEM_SIZES = {
+    _codec._BYTE_ARRAY: 1,
+    _codec._INT_ARRAY: 4,
+    _codec._LONG_ARRAY: 8,
+}
+# values of these tags can be changed in place, they are decoded only once
+_MUTABLE_TAGS = frozenset((_codec._LIST, _codec._INT_ARRAY, _codec._LONG_ARRAY))
+
+
+class _Raw(NamedTuple):
+    """Entry as it was read: `start` is at its tag, `value_start` at its payload."""
+
+    tag: int
+    start: int
+    value_start: int
+    end: int
+
+
+class _Value(NamedTuple):
+    """Decoded or assigned entry, `subtype` is kept for decoded lists."""
+
+    tag: int
+    value: Any
+    subtype: int | None = None
+
+
+def _skip(  # pylint: disable=R0912
+    data: _codec._Buffer, offset: int, tag: int, depth: int
+) -> int:
+    """Returns offset of the data after the payload of the tag."""
+    unpack_ushort, unpack_int = (
+        _codec._USHORT_STRUCT.unpack_from,
+        _codec._INT_STRUCT.unpack_from,
+    )
+    if (size := _FIXED_SIZES.get(tag)) is not None:
+        end = offset + size
+    elif tag == _codec._STRING:
+        end = offset + 2 + unpack_ushort(data, offset)[0]
+    elif tag == _codec._COMPOUND:
+        if depth > _codec.MAX_DEPTH:
+            raise ValueError("NBT is nested too deep.")
+        fixed_sizes, string = _FIXED_SIZES, _codec._STRING
+        # reading a tag after the end of data fails, scalars aren't checked
+        while (item_tag := data[offset]) != _codec._END:
+            offset += 3 + unpack_ushort(data, offset + 1)[0]
+            if (size := fixed_sizes.get(item_tag)) is not None:
+                offset += size
+            elif item_tag == string:
+                offset += 2 + unpack_ushort(data, offset)[0]
+            else:
+                offset = _skip(data, offset, item_tag, depth + 1)
+        return offset + 1
+    elif tag == _codec._LIST:
+        if depth > _codec.MAX_DEPTH:
+            raise ValueError("NBT is nested too deep.")
+        subtype = data[offset]
+        length = max(unpack_int(data, offset + 1)[0], 0)
+        offset += 5
+        if (size := _FIXED_SIZES.get(subtype)) is not None:
+            end = offset + size * length
+        elif subtype == _codec._END:
+            return offset
+        else:
+            for _ in range(length):
+                offset = _skip(data, offset, subtype, depth + 1)
+            return offset
+    elif (size := _ARRAY_ITEM_SIZES.get(tag)) is not None:
+        end = offset + 4 + size * max(unpack_int(data, offset)[0], 0)
+    else:
+        raise ValueError(f"Unknown NBT tag type {tag}.")
+    if end > len(data):
+        raise ValueError("Unexpected end of data.")
+    return end
+
+
+def _read_lazy_list(data: _codec._Buffer, offset: int, depth: int) -> list:
+    """Decodes a list, compounds in it (at any depth) become views."""
+    subtype = data[offset]
+    if subtype not in (_codec._COMPOUND, _codec._LIST):
+        return _codec._read_list(data, offset, depth)[0]
+    length = _codec._INT_STRUCT.unpack_from(data, offset + 1)[0]
+    offset += 5
+    result: list[Any] = []
+    for _ in range(length):
+        end = _skip(data, offset, subtype, depth + 1)
+        if subtype == _codec._COMPOUND:
+            result.append(LazyCompound(data, offset, end, depth + 1))
+        else:
+            result.append(_read_lazy_list(data, offset, depth + 1))
+        offset = end
+    return result
+
+
+class LazyCompound(MutableMapping[str, Any]):
+    """Compound decoded on demand from `data`, which must not be changed.
+
+    Views are created with `read`, `loads` or by accessing nested compounds of
+        another view. `start` and `end` are offsets of the payload (the End tag
+        included).
+    """
+
+    tag_id = _codec._COMPOUND
+
+    __slots__ = ("_data", "_start", "_end", "_depth", "_entries")
+
+    def __init__(self, data: _codec._Buffer, start: int, end: int, depth: int = 0):
+        self._data = data
+        self._start = start
+        self._end = end
+        self._depth = depth
+        self._entries: dict[str, Any] | None = None
+
+    @classmethod
+    def read(
+        cls, data: _codec._Buffer, offset: int = 0, *, network: bool = False
+    ) -> tuple["LazyCompound", int]:
+        """Indexes the compound with its root tag at `offset` of `data`.
+
+        Returns the view and offset of the data after the compound.
+        """
+        try:
+            if data[offset] != _codec._COMPOUND:
+                raise ValueError("NBT root is not a compound.")
+            offset += 1
+            if not network:
+                offset += 2 + _codec._USHORT_STRUCT.unpack_from(data, offset)[0]
+            view = cls(data, offset, offset)
+            view._index()
+        except (IndexError, struct.error):
+            raise ValueError("Unexpected end of data.") from None
+        return view, view._end
+
+    @classmethod
+    def loads(cls, data: _codec._Buffer, *, network: bool = False) -> "LazyCompound":
+        """Indexes the compound, the data must contain nothing else."""
+        view, offset = cls.read(data, 0, network=network)
+        if offset != len(data):
+            raise ValueError("Unexpected data after NBT.")
+        return view
+
+    def _index(self) -> dict[str, Any]:
+        if (entries := self._entries) is not None:
+            return entries
+        entries = {}
+        data, offset, depth = self._data, self._start, self._depth
+        if depth > _codec.MAX_DEPTH:
+            raise ValueError("NBT is nested too deep.")
+        while (tag := data[offset]) != _codec._END:
+            name, value_start = _codec._read_string(data, offset + 1)
+            end = _skip(data, value_start, tag, depth + 1)
+            entries[name] = _Raw(tag, offset, value_start, end)
+            offset = end
+        self._end = offset + 1
+        self._entries = entries
+        return entries
+
+    @property
+    def is_indexed(self) -> bool:
+        return self._entries is not None
+
+    def tag(self, key: str) -> int:
+        """Returns the tag type of the entry without decoding it."""
+        entry = self._index()[key]
+        return _codec._COMPOUND if isinstance(entry, LazyCompound) else entry.tag
+
+    def __getitem__(self, key: str) -> Any:
+        entries = self._index()
+        entry = entries[key]
+        entry_type = type(entry)
+        if entry_type is _Value:
+            return entry.value
+        if entry_type is not _Raw:
+            return entry  # view of a nested compound
+        tag, data, depth = entry.tag, self._data, self._depth + 1
+        if tag == _codec._COMPOUND:
+            value: Any = LazyCompound(data, entry.value_start, entry.end, depth)
+            entries[key] = value
+        elif tag == _codec._LIST:
+            value = _read_lazy_list(data, entry.value_start, depth)
+            entries[key] = _Value(tag, value, data[entry.value_start])
+        else:
+            value = _codec._READERS[tag](data, entry.value_start, depth)[0]
+            if tag in _MUTABLE_TAGS:
+                entries[key] = _Value(tag, value)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if isinstance(value, LazyCompound):
+            self._index()[key] = value
+        else:
+            self._index()[key] = _Value(_codec.tag_type(value), value)
+
+    def __delitem__(self, key: str) -> None:
+        del self._index()[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index())
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Decodes the whole compound to plain Python values."""
+        if self._entries is None:
+            return _codec._read_compound(self._data, self._start, self._depth)[0]
+        return {key: _to_plain(self[key]) for key in self._entries}
+
+    def write_payload(self, out: bytearray) -> None:
+        """Appends the compound without its tag and name to `out`."""
+        data = self._data
+        if (entries := self._entries) is None:
+            out += data[self._start : self._end]
+            return
+        depth = self._depth + 1
+        for key, entry in entries.items():
+            entry_type = type(entry)
+            if entry_type is _Raw:
+                out += data[entry.start : entry.end]
+                continue
+            tag = _codec._COMPOUND if entry_type is not _Value else entry.tag
+            out.append(tag)
+            out += _codec._KEYS.get(key) or _codec._encode_key(key)
+            if entry_type is not _Value:
+                entry.write_payload(out)
+            elif entry.subtype is not None:
+                _write_list(out, entry.subtype, entry.value, depth)
+            else:
+                _codec._WRITERS[tag](out, entry.value, depth)
+        out.append(_codec._END)
+
+
+def _write_list(out: bytearray, subtype: int, value: list, depth: int) -> None:
+    """Encodes a decoded list keeping its original item type."""
+    if subtype == _codec._END and value:
+        subtype = _codec._list_type(value)
+    out.append(subtype)
+    out += _codec._INT_STRUCT.pack(len(value))
+    if (item_format := _codec._NUMERIC_FORMATS.get(subtype)) is not None:
+        try:
+            out += struct.pack(f">{len(value)}{item_format}", *value)
+        except struct.error as error:
+            raise ValueError(f"Invalid list item: {error}.") from None
+    else:
+        writer = _codec._WRITERS[subtype]
+        for item in value:
+            writer(out, item, depth + 1)
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, LazyCompound):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+def read_lazy(
+    data: _codec._Buffer, offset: int = 0, *, network: bool = False
+) -> tuple[LazyCompound, int]:
+    """Indexes the compound at `offset` of `data`, see `LazyCompound.read`."""
+    return LazyCompound.read(data, offset, network=network)
+
+
+def loads_lazy(data: _codec._Buffer, *, network: bool = False) -> LazyCompound:
+    """Indexes the compound, the data must contain nothing else."""
+    return LazyCompound.loads(data, network=network)
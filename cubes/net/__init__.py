@@ -1,2 +1,15 @@
-from cubes.net.connection import Connection
+from cubes.net.broadcast import BroadcastBus
+from cubes.net.configuration import ConfigurationData
+from cubes.net.connection import (
+    Connection,
+    ConnectionBackpressuredError,
+    ConnectionOverflowError,
+    ConnectionState,
+    Frame,
+    OverflowPolicy,
+    encode_frames,
+)
+from cubes.net.router import Direction, PacketRegistry, PacketRouter
 from cubes.net.server import Server
+from cubes.net.status import StatusProvider
+from cubes.net.supervisor import Supervisor
@@ -0,0 +1,122 @@
+"""Pure Python AES-128/CFB8 used when `cryptography` isn't installed.
+
+CFB8 uses only the forward cipher and only the first byte of every encrypted
+    block, so the last round computes just that byte.
+"""
+
+_MASK = 0xFFFFFFFF
+_REGISTER_MASK = (1 << 128) - 1
+
+
+def _xtime(value: int) -> int:
+    value <<= 1
+    return value ^ 0x11B if value & 0x100 else value
+
+
+def _sbox() -> list[int]:
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        # multiply p by 3 and divide q by 3 in GF(2^8)
+        p ^= _xtime(p)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        value = q ^ (q << 1 | q >> 7) ^ (q << 2 | q >> 6)
+        value ^= (q << 3 | q >> 5) ^ (q << 4 | q >> 4)
+        sbox[p] = (value ^ 0x63) & 0xFF
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    return sbox
+
+
+def _ror(value: int, bits: int) -> int:
+    return (value >> bits | value << 32 - bits) & _MASK
+
+
+_SBOX = _sbox()
+# SubBytes and MixColumns of one byte combined into a single lookup
+_TE0 = [_xtime(s) << 24 | s << 16 | s << 8 | _xtime(s) ^ s for s in _SBOX]
+_TE1 = [_ror(value, 8) for value in _TE0]
+_TE2 = [_ror(value, 16) for value in _TE0]
+_TE3 = [_ror(value, 24) for value in _TE0]
+
+
+def _expand_key(key: bytes) -> list[int]:
+    if len(key) != 16:
+        raise ValueError("AES-128 key must be 16 bytes long.")
+    words = [int.from_bytes(key[index : index + 4], "big") for index in (0, 4, 8, 12)]
+    rcon = 1
+    for index in range(4, 44):
+        word = words[index - 1]
+        if index % 4 == 0:
+            word = (
+                _SBOX[word >> 16 & 0xFF] << 24
+                | _SBOX[word >> 8 & 0xFF] << 16
+                | _SBOX[word & 0xFF] << 8
+                | _SBOX[word >> 24]
+            ) ^ rcon << 24
+            rcon = _xtime(rcon)
+        words.append(words[index - 4] ^ word)
+    return words
+
+
+class AESCFB8:
+    """AES-128 in CFB8 mode with the `cryptography` cipher context interface."""
+
+    # pylint: disable=R0903
+
+    __slots__ = ("_keys", "_register", "_decrypt")
+
+    def __init__(self, key: bytes, iv: bytes, *, decrypt: bool = False):
+        if len(iv) != 16:
+            raise ValueError("IV must be 16 bytes long.")
+        self._keys = _expand_key(key)
+        self._register = int.from_bytes(iv, "big")
+        self._decrypt = decrypt
+
+    def update(self, data: bytes | bytearray | memoryview) -> bytes:
+        # pylint: disable=R0914
+        keys = self._keys
+        first_keys, last_key = keys[:4], keys[40] >> 24
+        round_keys = [keys[index : index + 4] for index in range(4, 40, 4)]
+        te0, te1, te2, te3, sbox = _TE0, _TE1, _TE2, _TE3, _SBOX
+        decrypt = self._decrypt
+        register = self._register
+        result = bytearray(len(data))
+        for index, byte in enumerate(data):
+            s0 = register >> 96 ^ first_keys[0]
+            s1 = register >> 64 & _MASK ^ first_keys[1]
+            s2 = register >> 32 & _MASK ^ first_keys[2]
+            s3 = register & _MASK ^ first_keys[3]
+            for k0, k1, k2, k3 in round_keys:
+                s0, s1, s2, s3 = (
+                    te0[s0 >> 24]
+                    ^ te1[s1 >> 16 & 0xFF]
+                    ^ te2[s2 >> 8 & 0xFF]
+                    ^ te3[s3 & 0xFF]
+                    ^ k0,
+                    te0[s1 >> 24]
+                    ^ te1[s2 >> 16 & 0xFF]
+                    ^ te2[s3 >> 8 & 0xFF]
+                    ^ te3[s0 & 0xFF]
+                    ^ k1,
+                    te0[s2 >> 24]
+                    ^ te1[s3 >> 16 & 0xFF]
+                    ^ te2[s0 >> 8 & 0xFF]
+                    ^ te3[s1 & 0xFF]
+                    ^ k2,
+                    te0[s3 >> 24]
+                    ^ te1[s0 >> 16 & 0xFF]
+                    ^ te2[s1 >> 8 & 0xFF]
+                    ^ te3[s2 & 0xFF]
+                    ^ k3,
+                )
+            result[index] = output = byte ^ sbox[s0 >> 24] ^ last_key
+            register = (register << 8 & _REGISTER_MASK) | (byte if decrypt else output)
+        self._register = register
+        return bytes(result)
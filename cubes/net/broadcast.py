@@ -0,0 +1,106 @@
+"""Broadcasting packets between worker processes.
+
+Every worker binds a Unix datagram socket in a shared directory, a published
+    packet is sent to the sockets of the other workers as one datagram. Packets
+    are published already encoded (with their IDs, without framing), the
+    receiving worker only frames them for its connections.
+
+Examples:
+    >>> async def worker(index: int) -> None:
+    ...     bus = BroadcastBus("/run/cubes", index, 4)
+    ...     server = Server(..., broadcast_bus=bus)
+    ...     await server.run("0.0.0.0", 25565, reuse_port=True)
+    >>> await server.publish(chat_message)  # reaches players of every worker
+"""
+
+import contextlib
+import io
+import os
+from typing import Any, Callable, Coroutine
+
+import anyio
+import anyio.abc
+
+from cubes.net import connection
+
+# UNIX datagram sockets of AnyIO receive up to 64 KiB at once
+MAX_PACKET_SIZE = 65536
+
+PacketHandler = Callable[[bytes], Coroutine[Any, Any, None]]
+
+
+class BroadcastBus:
+    """Channel of a worker to all other workers of the same server.
+
+    Workers that aren't running (e.g. being restarted) miss the packets
+        published meanwhile.
+    """
+
+    __slots__ = ("_path", "_index", "_workers", "_socket")
+
+    def __init__(self, path: str | os.PathLike[str], index: int, workers: int):
+        """
+        Args:
+            path: Directory for the sockets, the same for all workers.
+            index: Index of this worker, from 0 to `workers - 1`.
+            workers: Number of workers.
+        """
+        if not 0 <= index < workers:
+            raise ValueError("Worker index must be between 0 and workers - 1.")
+        self._path = os.fspath(path)
+        self._index = index
+        self._workers = workers
+        self._socket: anyio.abc.UNIXDatagramSocket | None = None
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def is_serving(self) -> bool:
+        return self._socket is not None
+
+    def _socket_path(self, index: int) -> str:
+        return os.path.join(self._path, f"{index}.sock")
+
+    async def publish(self, packet: connection.PacketData) -> None:
+        """Sends the packet to all other workers.
+
+        Raises:
+            RuntimeError: The bus isn't being served.
+        """
+        if self._socket is None:
+            raise RuntimeError("Broadcast bus isn't being served.")
+        data = packet.getvalue() if isinstance(packet, io.BytesIO) else bytes(packet)
+        if len(data) > MAX_PACKET_SIZE:
+            raise ValueError("Packet is too big to be broadcast.")
+        for index in range(self._workers):
+            if index == self._index:
+                continue
+            with contextlib.suppress(FileNotFoundError, ConnectionRefusedError):
+                await self._socket.sendto(data, self._socket_path(index))
+
+    async def serve(
+        self,
+        handler: PacketHandler,
+        *,
+        task_status: anyio.abc.TaskStatus = anyio.TASK_STATUS_IGNORED,
+    ) -> None:
+        """Binds the socket of the worker and passes received packets to the
+        handler one by one until cancelled."""
+        path = self._socket_path(self._index)
+        os.makedirs(self._path, exist_ok=True)
+        async with await anyio.create_unix_datagram_socket(local_path=path) as sock:
+            self._socket = sock
+            try:
+                task_status.started()
+                async for data, _ in sock:
+                    await handler(data)
+            finally:
+                self._socket = None
+                with contextlib.suppress(OSError):
+                    os.unlink(path)
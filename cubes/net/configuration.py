@@ -0,0 +1,130 @@
+"""Registry Data and Update Tags packets of the configuration phase.
+
+They are the same for every joining player, so they are encoded once and framed
+    once per compression settings. Joining players get the cached bytes.
+
+Examples:
+    >>> data = ConfigurationData(
+    ...     {"minecraft:dimension_type": {"minecraft:overworld": {...}}},
+    ...     {"minecraft:block": {"minecraft:logs": [40, 41]}},
+    ... )
+    >>> await data.send(conn)  # in the configuration state
+"""
+
+import zlib
+from typing import Any, Mapping, Sequence
+
+import anyio
+import anyio.to_thread
+
+from cubes import nbt
+from cubes.net import connection, serializers
+
+# packet IDs of the protocol 766 (1.20.5)
+REGISTRY_DATA_ID = 0x07
+UPDATE_TAGS_ID = 0x0D
+
+Registries = Mapping[str, Mapping[str, Any]]
+Tags = Mapping[str, Mapping[str, Sequence[int]]]
+
+
+def encode_registry_data(
+    registry: str, entries: Mapping[str, Any], packet_id: int = REGISTRY_DATA_ID
+) -> bytes:
+    """Encodes Registry Data packet, entries without data must be `None`."""
+    varint, identifier = serializers.VarIntSerializer, serializers.IdentifierSerializer
+    packet = bytearray(varint.encode(packet_id))
+    identifier.write(packet, registry, validate=True)
+    varint.write(packet, len(entries))
+    for entry, data in entries.items():
+        identifier.write(packet, entry, validate=True)
+        serializers.BooleanSerializer.write(packet, data is not None)
+        if data is not None:
+            nbt.write(packet, data, network=True)
+    return bytes(packet)
+
+
+def encode_tags(tags: Tags, packet_id: int = UPDATE_TAGS_ID) -> bytes:
+    """Encodes Update Tags packet, tags are lists of registry entry IDs."""
+    varint, identifier = serializers.VarIntSerializer, serializers.IdentifierSerializer
+    packet = bytearray(varint.encode(packet_id))
+    varint.write(packet, len(tags))
+    for registry, registry_tags in tags.items():
+        identifier.write(packet, registry, validate=True)
+        varint.write(packet, len(registry_tags))
+        for tag, entries in registry_tags.items():
+            identifier.write(packet, tag, validate=True)
+            varint.write(packet, len(entries))
+            varint.write_array(packet, entries, validate=True)
+    return bytes(packet)
+
+
+class ConfigurationData:
+    """Registry Data packets (one per registry) and Update Tags packet.
+
+    Packets are encoded when the object is created. To change the registries a
+        new object must be created.
+    """
+
+    __slots__ = ("_packets", "_frames", "_lock")
+
+    def __init__(
+        self,
+        registries: Registries,
+        tags: Tags | None = None,
+        *,
+        registry_data_id: int = REGISTRY_DATA_ID,
+        update_tags_id: int = UPDATE_TAGS_ID,
+    ):
+        packets = [
+            encode_registry_data(registry, entries, registry_data_id)
+            for registry, entries in registries.items()
+        ]
+        if tags is not None:
+            packets.append(encode_tags(tags, update_tags_id))
+        self._packets = tuple(packets)
+        self._frames: dict[tuple[int, int], bytes] = {}
+        self._lock = anyio.Lock()
+
+    @property
+    def packets(self) -> tuple[bytes, ...]:
+        """Packets data (with packet IDs) without framing."""
+        return self._packets
+
+    def frames(
+        self,
+        compression_threshold: int = -1,
+        compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    ) -> bytes:
+        """Returns the framed packets, they are cached per compression settings."""
+        if compression_threshold < 0:
+            compression_level = zlib.Z_DEFAULT_COMPRESSION
+        key = (compression_threshold, compression_level)
+        if (frames := self._frames.get(key)) is None:
+            frames = self._frames[key] = connection.encode_frames(
+                *self._packets,
+                compression_threshold=compression_threshold,
+                compression_level=compression_level,
+            )
+        return frames
+
+    async def _connection_frames(self, conn: connection.Connection) -> bytes:
+        threshold, level = conn.compression_threshold, conn.compression_level
+        if threshold < 0 or (threshold, level) in self._frames:
+            return self.frames(threshold, level)
+        # the first login after a start compresses the packets in a worker
+        # thread, logins coming at the same time wait for it
+        async with self._lock:
+            if (threshold, level) not in self._frames:
+                await anyio.to_thread.run_sync(self.frames, threshold, level)
+        return self._frames[(threshold, level)]
+
+    def write(self, conn: connection.Connection) -> None:
+        """Queues the packets, see `Connection.write_raw`."""
+        frames = self.frames(conn.compression_threshold, conn.compression_level)
+        conn.write_raw(frames, packets=len(self._packets))
+
+    async def send(self, conn: connection.Connection) -> None:
+        """Sends the packets, see `Connection.send_raw`."""
+        frames = await self._connection_frames(conn)
+        await conn.send_raw(frames, packets=len(self._packets))
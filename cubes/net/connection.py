@@ -1,21 +1,248 @@
+import contextlib
+import enum
 import io
-from typing import cast
+import socket
+import zlib
+from typing import TYPE_CHECKING, Any, Generic, Iterator, Sequence, TypeVar, cast
 
 import anyio
 import anyio.abc
+import anyio.lowlevel
+import anyio.to_thread
 
-from cubes.net import serializers
+from cubes.net import encryption, serializers
 
+Buffer = bytes | bytearray | memoryview
+PacketData = Buffer | io.BytesIO
 
-class _LengthVarIntSerializer(serializers.VarIntSerializer):
-    _MAX_BYTES = 3
-    _RANGE = (1, 2097151)
+_RECEIVE_SIZE = 65536
+_LENGTH_MAX_BYTES = 3
+_MAX_PACKET_LENGTH = 2097151
+_DATA_LENGTH_MAX_BYTES = 4
+_PACKET_ID_MAX_BYTES = 5
+_MAX_UNCOMPRESSED_LENGTH = 8388608
+_COMPRESSION_THREAD_SIZE = 65536
+_FLUSH_SIZE = 65536
 
+if TYPE_CHECKING:
+    # mypy depends on typing_extensions, so it's always there for type checking,
+    # connections created without a type argument have untyped data
+    import typing_extensions
 
-class Connection:
-    __slots__ = ("_stream", "_remote_address", "_local_address", "_state")
+    _DataT = typing_extensions.TypeVar("_DataT", default=Any)
+else:
+    _DataT = TypeVar("_DataT")
 
-    def __init__(self, stream: anyio.abc.SocketStream):
+
+def _length_prefix(length: int) -> bytes:
+    if length > _MAX_PACKET_LENGTH:
+        raise ValueError("Packet is too big.")
+    return serializers.VarIntSerializer.encode(length)
+
+
+def _read_length(
+    buffer: Buffer, offset: int, max_bytes: int = _LENGTH_MAX_BYTES
+) -> tuple[int, int] | None:
+    """Reads length VarInt from `buffer` starting at `offset`.
+
+    Returns length and offset of the data after it or `None` if the buffer
+        doesn't contain the whole VarInt yet.
+    """
+    result = 0
+    for index in range(max_bytes):
+        if offset + index >= len(buffer):
+            return None
+        byte = buffer[offset + index]
+        result |= (byte & 0x7F) << 7 * index
+        if not byte & 0x80:
+            return result, offset + index + 1
+    raise ValueError("Length VarInt is too big.")
+
+
+@contextlib.contextmanager
+def _packet_views(packets: Sequence[PacketData]) -> Iterator[list[memoryview]]:
+    views = [
+        packet.getbuffer() if isinstance(packet, io.BytesIO) else memoryview(packet)
+        for packet in packets
+    ]
+    try:
+        yield views
+    finally:
+        for view in views:
+            view.release()
+
+
+def _compress_packet(data: Buffer, threshold: int, level: int) -> tuple[bytes, Buffer]:
+    """Returns data length header and data of the compressed packet format."""
+    length = memoryview(data).nbytes
+    if length < threshold:
+        return b"\x00", data
+    return serializers.VarIntSerializer.encode(length), zlib.compress(data, level)
+
+
+def _frame_packets(
+    views: list[memoryview], threshold: int, level: int, *, detach: bool = False
+) -> tuple[list[Buffer], int]:
+    """Prepends packets with their length prefixes (and compression headers).
+
+    Returns parts of the frames and their total size. With `detach` packets
+        data is copied unless it is immutable `bytes`, so the parts can outlive
+        the views.
+    """
+    parts: list[Buffer] = []
+    size = 0
+    for view in views:
+        data: Buffer = view
+        if detach:
+            if isinstance(view.obj, bytes) and view.nbytes == len(view.obj):
+                data = view.obj
+            else:
+                data = view.tobytes()
+        if threshold < 0:
+            length = view.nbytes
+            prefix = _length_prefix(length)
+            parts += prefix, data
+        else:
+            header, data = _compress_packet(data, threshold, level)
+            length = len(header) + memoryview(data).nbytes
+            prefix = _length_prefix(length)
+            parts += prefix, header, data
+        size += len(prefix) + length
+    return parts, size
+
+
+def encode_frames(
+    *packets: PacketData,
+    compression_threshold: int = -1,
+    compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+) -> bytes:
+    """Frames packets to be sent with `Connection.write_raw` or `send_raw`.
+
+    Frames depend only on the compression settings, so packets sent to many
+        connections can be framed (and compressed) once.
+    """
+    with _packet_views(packets) as views:
+        parts, _ = _frame_packets(views, compression_threshold, compression_level)
+        return b"".join(parts)
+
+
+class Frame:
+    """Received packet data with the already parsed packet ID.
+
+    Packet fields start at `offset` of `data`, they aren't parsed until someone
+        needs them (see `cubes.net.packets.Packet.from_frame`).
+    """
+
+    # pylint: disable=R0903
+
+    __slots__ = ("data", "offset", "packet_id")
+
+    def __init__(self, data: memoryview, offset: int, packet_id: int):
+        self.data = data
+        self.offset = offset
+        self.packet_id = packet_id
+
+    def __repr__(self) -> str:
+        return (
+            f"Frame(packet_id={self.packet_id:#x}, "
+            f"size={len(self.data) - self.offset})"
+        )
+
+
+class ConnectionState(enum.IntEnum):
+    HANDSHAKE = 0
+    STATUS = 1
+    LOGIN = 2
+    CONFIGURATION = 3
+    PLAY = 4
+
+
+class OverflowPolicy(enum.Enum):
+    """What to do when outbound data of a connection exceeds the high watermark.
+
+    `BLOCK`: `Connection.send` waits until queued data is sent,
+        `Connection.write` refuses packets until the connection is drained.
+    `DROP`: packets which aren't marked as essential are dropped until the
+        outbound data falls below the low watermark.
+    `DISCONNECT`: queued data is discarded and the connection is closed.
+    """
+
+    BLOCK = enum.auto()
+    DROP = enum.auto()
+    DISCONNECT = enum.auto()
+
+
+class ConnectionOverflowError(Exception):
+    pass
+
+
+class ConnectionBackpressuredError(Exception):
+    pass
+
+
+def _decompress(data: Buffer, length: int) -> bytes:
+    decompressor = zlib.decompressobj()
+    result = decompressor.decompress(data, length)
+    if len(result) != length or decompressor.unconsumed_tail:
+        raise ValueError("Invalid uncompressed packet length.")
+    return result
+
+
+class Connection(Generic[_DataT]):
+    """Connection of the Minecraft protocol.
+
+    `data` holds data attached by the application (e.g. a session object with
+        `__slots__`), annotate connections as `Connection[Session]` to type it.
+    """
+
+    # pylint: disable=R0902,R0904
+    __slots__ = (
+        "data",
+        "_stream",
+        "_remote_address",
+        "_local_address",
+        "_state",
+        "_buffer",
+        "_offset",
+        "_compression_threshold",
+        "_compression_level",
+        "_compression_thread_size",
+        "_outbound",
+        "_outbound_size",
+        "_outbound_packets",
+        "_inflight_size",
+        "_dropped_packets",
+        "_high_watermark",
+        "_low_watermark",
+        "_overflow_policy",
+        "_is_backpressured",
+        "_is_overflowed",
+        "_send_lock",
+        "_write_event",
+    )
+
+    _stream: anyio.abc.ByteStream
+
+    def __init__(
+        self,
+        stream: anyio.abc.SocketStream,
+        *,
+        high_watermark: int | None = None,
+        low_watermark: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        data: Any = None,
+    ):
+        """
+        Args:
+            high_watermark: Size of outbound data (queued and being sent) above
+                which `overflow_policy` is applied. `None` means unlimited.
+            low_watermark: Size of outbound data below which the connection stops
+                being backpressured. Defaults to a half of `high_watermark`.
+            overflow_policy: What to do with a backpressured connection.
+            data: Initial value of `data`.
+        """
+        # pylint: disable=R0913
+        self.data: _DataT = data
         self._stream = stream
         self._remote_address = cast(
             anyio.abc.IPSockAddrType,
@@ -25,6 +252,26 @@ class Connection:
             anyio.abc.IPSockAddrType,
             stream.extra(anyio.abc.SocketAttribute.local_address),
         )
+        self._state = ConnectionState.HANDSHAKE
+        self._buffer = bytearray()
+        self._offset = 0
+        self._compression_threshold = -1
+        self._compression_level = zlib.Z_DEFAULT_COMPRESSION
+        self._compression_thread_size = _COMPRESSION_THREAD_SIZE
+        self._outbound: list[Buffer] = []
+        self._outbound_size = 0
+        self._outbound_packets = 0
+        self._inflight_size = 0
+        self._dropped_packets = 0
+        if low_watermark is None and high_watermark is not None:
+            low_watermark = high_watermark // 2
+        self._high_watermark = high_watermark
+        self._low_watermark = low_watermark
+        self._overflow_policy = overflow_policy
+        self._is_backpressured = False
+        self._is_overflowed = False
+        self._send_lock = anyio.Lock()
+        self._write_event = anyio.Event()
 
     @property
     def remote_address(self) -> anyio.abc.IPSockAddrType:
@@ -34,16 +281,373 @@ class Connection:
     def local_address(self) -> anyio.abc.IPSockAddrType:
         return self._local_address
 
+    @property
+    def state(self) -> ConnectionState:
+        """Protocol state, selects packet tables of `PacketRouter.route`.
+
+        Must be changed by the handlers of packets switching the state.
+        """
+        return self._state
+
+    @state.setter
+    def state(self, value: ConnectionState) -> None:
+        self._state = value
+
+    @property
+    def compression_threshold(self) -> int:
+        """Compression threshold, negative if compression is disabled."""
+        return self._compression_threshold
+
+    @property
+    def compression_level(self) -> int:
+        return self._compression_level
+
+    def set_compression(
+        self,
+        threshold: int,
+        *,
+        level: int = zlib.Z_DEFAULT_COMPRESSION,
+        thread_size: int = _COMPRESSION_THREAD_SIZE,
+    ) -> None:
+        """Switches the connection to the compressed packet format.
+
+        Must be called right after sending or receiving the Set Compression
+            packet.
+
+        Args:
+            threshold: Minimal size of a packet to compress it. Negative value
+                disables compression.
+            level: zlib compression level.
+            thread_size: Packets of this size and above are compressed and
+                decompressed in a worker thread to not block the event loop.
+        """
+        if not -1 <= level <= 9:
+            raise ValueError("Compression level must be between -1 and 9.")
+        if thread_size < 0:
+            raise ValueError("Compression thread size must not be negative.")
+        self._compression_threshold = threshold
+        self._compression_level = level
+        self._compression_thread_size = thread_size
+
+    @property
+    def is_encrypted(self) -> bool:
+        return isinstance(self._stream, encryption.EncryptedStream)
+
+    def enable_encryption(self, shared_secret: bytes) -> None:
+        """Encrypts all further data passing through the connection.
+
+        Must be called right after sending or receiving the Encryption Response
+            packet. Data that was already received after it is decrypted too.
+            Queued packets must be flushed before, as they are encrypted only
+            when sent.
+        """
+        if self.is_encrypted:
+            raise RuntimeError("Encryption is already enabled.")
+        if self._outbound:
+            raise RuntimeError("Queued packets must be flushed before encryption.")
+        stream = encryption.EncryptedStream(self._stream, shared_secret)
+        if self._offset < len(self._buffer):
+            with memoryview(self._buffer) as view:
+                tail = stream.decryptor.update(view[self._offset :])
+            self._buffer[self._offset :] = tail
+        self._stream = stream
+
+    def _read_frame(self) -> bytes | None:
+        """Cuts the next complete packet out of the receive buffer.
+
+        Returns `None` if the buffer doesn't contain the whole packet yet.
+        """
+        header = _read_length(self._buffer, self._offset)
+        if header is None:
+            return None
+        length, start = header
+        end = start + length
+        if end > len(self._buffer):
+            return None
+        with memoryview(self._buffer) as view:
+            frame = bytes(view[start:end])
+        if end == len(self._buffer):
+            self._buffer.clear()
+            self._offset = 0
+        elif end > _RECEIVE_SIZE:
+            del self._buffer[:end]
+            self._offset = 0
+        else:
+            self._offset = end
+        return frame
+
+    async def _receive_data(self) -> tuple[bytes, int]:
+        """Receives the next packet, returns its data and offset of the packet ID.
+
+        Data is read from the socket in big chunks, so packets that are already
+            buffered are returned without touching the socket.
+        """
+        while (frame := self._read_frame()) is None:
+            self._buffer += await self._stream.receive(_RECEIVE_SIZE)
+        if self._compression_threshold < 0:
+            return frame, 0
+        return await self._decompress_frame(frame)
+
+    async def peek(self, size: int = 1) -> bytes:
+        """Returns the next `size` received bytes without consuming them.
+
+        Bytes are returned as they were received (decrypted, but not decompressed).
+        """
+        while len(self._buffer) - self._offset < size:
+            self._buffer += await self._stream.receive(_RECEIVE_SIZE)
+        return bytes(self._buffer[self._offset : self._offset + size])
+
     async def receive(self) -> io.BytesIO:
-        length = await _LengthVarIntSerializer.from_stream(self._stream)
-        return io.BytesIO(await self._stream.receive(length))
+        """Receives the next packet."""
+        data, offset = await self._receive_data()
+        return io.BytesIO(data[offset:] if offset else data)
+
+    async def receive_frame(self) -> Frame:
+        """Receives the next packet without copying it to a buffer.
+
+        Only the packet ID is parsed, so packets that nobody is interested in
+            can be dropped cheaply.
+        """
+        data, offset = await self._receive_data()
+        header = _read_length(data, offset, _PACKET_ID_MAX_BYTES)
+        if header is None:
+            raise ValueError("Packet has no packet ID.")
+        packet_id, offset = header
+        return Frame(memoryview(data), offset, packet_id)
+
+    async def _decompress_frame(self, frame: bytes) -> tuple[bytes, int]:
+        header = _read_length(frame, 0, _DATA_LENGTH_MAX_BYTES)
+        if header is None:
+            raise ValueError("Compressed packet has no data length.")
+        length, start = header
+        if length == 0:
+            return frame, start
+        if length < self._compression_threshold:
+            raise ValueError("Compressed packet is smaller than the threshold.")
+        if length > _MAX_UNCOMPRESSED_LENGTH:
+            raise ValueError("Compressed packet is too big.")
+        if length >= self._compression_thread_size:
+            return (
+                await anyio.to_thread.run_sync(
+                    _decompress, memoryview(frame)[start:], length
+                ),
+                0,
+            )
+        return _decompress(memoryview(frame)[start:], length), 0
+
+    def _frame(
+        self, views: list[memoryview], *, detach: bool = False
+    ) -> tuple[list[Buffer], int]:
+        return _frame_packets(
+            views,
+            self._compression_threshold,
+            self._compression_level,
+            detach=detach,
+        )
+
+    @property
+    def outbound_size(self) -> int:
+        """Size of data waiting to be sent and being sent."""
+        return self._outbound_size + self._inflight_size
+
+    @property
+    def queued_packets(self) -> int:
+        """Number of packets waiting to be sent."""
+        return self._outbound_packets
+
+    @property
+    def dropped_packets(self) -> int:
+        """Number of non-essential packets dropped because of backpressure."""
+        return self._dropped_packets
+
+    @property
+    def is_backpressured(self) -> bool:
+        """Whether outbound data exceeded the high watermark and didn't fall below
+        the low watermark yet."""
+        return self._is_backpressured
+
+    def _overflow(self) -> None:
+        """Discards queued data and shuts the socket down.
+
+        The shutdown wakes up both ends of the connection right away, the stream
+            itself is closed by its owner.
+        """
+        self._is_overflowed = True
+        self._outbound.clear()
+        self._outbound_size = self._outbound_packets = 0
+        raw_socket = self._stream.extra(anyio.abc.SocketAttribute.raw_socket)
+        with contextlib.suppress(OSError):
+            raw_socket.shutdown(socket.SHUT_RDWR)
+
+    def _accept(self, packets: int, essential: bool) -> bool:
+        """Checks if packets can be queued according to the overflow policy."""
+        if self._is_overflowed:
+            raise ConnectionOverflowError
+        if not self._is_backpressured:
+            return True
+        if self._overflow_policy is OverflowPolicy.DROP and not essential:
+            self._dropped_packets += packets
+            return False
+        return True
+
+    def _enqueue(self, parts: list[Buffer], size: int, packets: int) -> None:
+        self._outbound += parts
+        self._outbound_size += size
+        self._outbound_packets += packets
+        self._write_event.set()
+        if self._high_watermark is None or self.outbound_size <= self._high_watermark:
+            return
+        self._is_backpressured = True
+        if self._overflow_policy is OverflowPolicy.DISCONNECT:
+            self._overflow()
+            raise ConnectionOverflowError
+
+    def write(self, *packets: PacketData, essential: bool = True) -> None:
+        """Queues packets to be sent by the next `flush`.
+
+        Packets are compressed in the current thread, use `send` for big packets.
+            Packets data other than `bytes` is copied, as the caller may change it
+            before the flush.
+
+        Raises:
+            ConnectionOverflowError: The connection was overflowed with
+                `OverflowPolicy.DISCONNECT`, it is shut down.
+            ConnectionBackpressuredError: The connection is backpressured with
+                `OverflowPolicy.BLOCK`, wait for `drain` or use `send`.
+        """
+        if self._is_backpressured and self._overflow_policy is OverflowPolicy.BLOCK:
+            raise ConnectionBackpressuredError
+        if not self._accept(len(packets), essential):
+            return
+        with _packet_views(packets) as views:
+            self._enqueue(*self._frame(views, detach=True), len(packets))
+
+    def write_raw(
+        self, data: bytes, *, packets: int = 1, essential: bool = True
+    ) -> None:
+        """Queues already framed packets (see `encode_frames`).
+
+        Frames must match the compression threshold of the connection, they are
+            encrypted when sent, so the same data can be written to many
+            connections. `packets` is the number of packets in the data.
+
+        Raises:
+            ConnectionOverflowError: See `write`.
+            ConnectionBackpressuredError: See `write`.
+        """
+        if self._is_backpressured and self._overflow_policy is OverflowPolicy.BLOCK:
+            raise ConnectionBackpressuredError
+        if not self._accept(packets, essential):
+            return
+        self._enqueue([bytes(data)], len(data), packets)
+
+    async def flush(self) -> None:
+        """Sends all queued data with a single write.
+
+        Raises:
+            ConnectionOverflowError: The connection was overflowed with
+                `OverflowPolicy.DISCONNECT`, it is closed.
+        """
+        async with self._send_lock:
+            if self._is_overflowed:
+                await self._stream.aclose()
+                raise ConnectionOverflowError
+            if not self._outbound:
+                return
+            data = b"".join(self._outbound)
+            self._outbound.clear()
+            self._outbound_size = self._outbound_packets = 0
+            self._inflight_size = len(data)
+            try:
+                await self._stream.send(data)
+            finally:
+                self._inflight_size = 0
+            if self._is_backpressured and self.outbound_size <= cast(
+                int, self._low_watermark
+            ):
+                self._is_backpressured = False
+
+    async def drain(self) -> None:
+        """Flushes queued data until the connection isn't backpressured."""
+        while self._is_backpressured:
+            await self.flush()
+
+    def _detach(self, views: list[memoryview]) -> None:
+        """Replaces views that are still queued with copies of their data."""
+        ids = {id(view) for view in views}
+        self._outbound[:] = [
+            part.tobytes() if id(part) in ids else part  # type: ignore[union-attr]
+            for part in self._outbound
+        ]
+
+    async def send(self, *packets: PacketData, essential: bool = True) -> None:
+        """Sends packets right away (together with already queued data).
+
+        Packets data is copied only once, into the buffer that is sent.
+
+        Raises:
+            ConnectionOverflowError: The connection was overflowed with
+                `OverflowPolicy.DISCONNECT`, it is closed.
+        """
+        if self._is_overflowed:
+            await self.flush()
+        if self._overflow_policy is OverflowPolicy.BLOCK:
+            await self.drain()
+        if not self._accept(len(packets), essential):
+            return
+        with _packet_views(packets) as views:
+            if 0 <= self._compression_threshold and any(
+                view.nbytes >= self._compression_thread_size for view in views
+            ):
+                parts, size = await anyio.to_thread.run_sync(self._frame, views)
+            else:
+                parts, size = self._frame(views)
+            try:
+                self._enqueue(parts, size, len(packets))
+            except ConnectionOverflowError:
+                await self._stream.aclose()
+                raise
+            try:
+                await self.flush()
+            finally:
+                if self._outbound:
+                    self._detach(views)
+
+    async def send_raw(
+        self, data: bytes, *, packets: int = 1, essential: bool = True
+    ) -> None:
+        """Sends already framed packets right away, see `write_raw`.
+
+        Raises:
+            ConnectionOverflowError: See `send`.
+        """
+        if self._is_overflowed:
+            await self.flush()
+        if self._overflow_policy is OverflowPolicy.BLOCK:
+            await self.drain()
+        if not self._accept(packets, essential):
+            return
+        try:
+            self._enqueue([bytes(data)], len(data), packets)
+        except ConnectionOverflowError:
+            await self._stream.aclose()
+            raise
+        await self.flush()
+
+    async def autoflush(self, size: int = _FLUSH_SIZE) -> None:
+        """Flushes queued packets at the end of every event loop tick.
 
-    async def send(self, *packets: io.BytesIO) -> None:
-        buffer = io.BytesIO()
-        for packet in packets:
-            _LengthVarIntSerializer(packet.getbuffer().nbytes).to_buffer(buffer)
-            buffer.write(packet.getvalue())
-        await self._stream.send(buffer.getvalue())
+        Packets written during one tick are sent with a single write. If `size`
+            bytes or more are queued, they are sent without waiting for the tick
+            to end. Should be run as a separate task.
+        """
+        while True:
+            await self._write_event.wait()
+            self._write_event = anyio.Event()
+            if self._outbound_size < size:
+                await anyio.lowlevel.checkpoint()
+            await self.flush()
 
     async def close(self) -> None:
+        """Closes the connection. Packets that weren't flushed are discarded."""
         await self._stream.aclose()
@@ -0,0 +1,90 @@
+"""Stream encryption used by the protocol in online mode (AES-128/CFB8).
+
+The fast C-backed cipher from the [cryptography](https://cryptography.io) package
+    is used when it's installed (`pip install pyCubes[encryption]`). Otherwise a
+    pure Python implementation is used, which is orders of magnitude slower (run
+    `benchmarks/encryption.py` to compare).
+"""
+
+from typing import Any, Callable, Mapping, Protocol
+
+import anyio.abc
+
+from cubes.net import _aes
+
+try:
+    from cryptography.hazmat.primitives.ciphers import (  # type: ignore
+        Cipher,
+        algorithms,
+    )
+
+    try:
+        from cryptography.hazmat.decrepit.ciphers.modes import CFB8  # type: ignore
+    except ImportError:  # cryptography<43.0.0
+        from cryptography.hazmat.primitives.ciphers.modes import CFB8  # type: ignore
+except ImportError:
+    FAST_CIPHER_AVAILABLE = False
+else:
+    FAST_CIPHER_AVAILABLE = True
+
+
+class CipherContext(Protocol):
+    # pylint: disable=R0903
+    def update(self, data: bytes | bytearray | memoryview) -> bytes: ...
+
+
+def create_ciphers(
+    shared_secret: bytes, *, fast: bool = FAST_CIPHER_AVAILABLE
+) -> tuple[CipherContext, CipherContext]:
+    """Creates encryptor and decryptor for the shared secret.
+
+    The shared secret is used both as the key and as the initial vector.
+    """
+    if len(shared_secret) != 16:
+        raise ValueError("Shared secret must be 16 bytes long.")
+    if fast:
+        cipher = Cipher(algorithms.AES(shared_secret), CFB8(shared_secret))
+        return cipher.encryptor(), cipher.decryptor()
+    return (
+        _aes.AESCFB8(shared_secret, shared_secret),
+        _aes.AESCFB8(shared_secret, shared_secret, decrypt=True),
+    )
+
+
+class EncryptedStream(anyio.abc.ByteStream):
+    """Encrypts and decrypts all data passing through the wrapped stream.
+
+    Data is processed by whole chunks, as it is sent and received.
+    """
+
+    __slots__ = ("_stream", "_encryptor", "_decryptor")
+
+    def __init__(
+        self,
+        stream: anyio.abc.ByteStream,
+        shared_secret: bytes,
+        *,
+        fast: bool = FAST_CIPHER_AVAILABLE,
+    ):
+        self._stream = stream
+        self._encryptor, self._decryptor = create_ciphers(shared_secret, fast=fast)
+
+    @property
+    def decryptor(self) -> CipherContext:
+        return self._decryptor
+
+    async def receive(self, max_bytes: int = 65536) -> bytes:
+        return self._decryptor.update(await self._stream.receive(max_bytes))
+
+    async def send(self, item: bytes) -> None:
+        await self._stream.send(self._encryptor.update(item))
+
+    async def send_eof(self) -> None:
+        await self._stream.send_eof()
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    @property
+    def extra_attributes(self) -> Mapping[Any, Callable[[], Any]]:
+        return self._stream.extra_attributes
@@ -0,0 +1,233 @@
+"""Declarative network packets.
+
+Packet fields are declared with type annotations, which map to serializers.
+    Specialized encode and decode functions are compiled once, when a packet
+    class is created. Runs of fixed size fields are packed and unpacked with a
+    single `struct.Struct` call.
+
+Examples:
+    >>> class Handshake(Packet, packet_id=0x00):
+    ...     protocol: VarInt
+    ...     host: String
+    ...     port: UnsignedShort
+    ...     intention: VarInt
+    >>> Handshake(766, "localhost", 25565, 1).serialize()
+"""
+
+import io
+import struct
+import typing
+import uuid
+from typing import Annotated, Any, Callable, ClassVar, Generic, Sequence, TypeVar
+
+from cubes.net import connection, serializers
+
+# pylint: disable=C0103
+_T = TypeVar("_T", bound="Packet")
+
+Boolean = Annotated[bool, serializers.BooleanSerializer]
+Byte = Annotated[int, serializers.ByteSerializer]
+UnsignedByte = Annotated[int, serializers.UnsignedByteSerializer]
+Angle = Annotated[int, serializers.AngleSerializer]
+Short = Annotated[int, serializers.ShortSerializer]
+UnsignedShort = Annotated[int, serializers.UnsignedShortSerializer]
+Int = Annotated[int, serializers.IntSerializer]
+Long = Annotated[int, serializers.LongSerializer]
+Float = Annotated[float, serializers.FloatSerializer]
+Double = Annotated[float, serializers.DoubleSerializer]
+VarInt = Annotated[int, serializers.VarIntSerializer]
+VarLong = Annotated[int, serializers.VarLongSerializer]
+String = Annotated[str, serializers.StringSerializer]
+Identifier = Annotated[str, serializers.IdentifierSerializer]
+UUID = Annotated[uuid.UUID, serializers.UUIDSerializer]
+Position = Annotated[tuple[int, int, int], serializers.PositionSerializer]
+NBT = Annotated[dict, serializers.NBTSerializer]
+NetworkNBT = Annotated[Any, serializers.NetworkNBTSerializer]
+PlainNBT = Annotated[dict, serializers.PlainNBTSerializer]
+PlainNetworkNBT = Annotated[Any, serializers.PlainNetworkNBTSerializer]
+LongArray = Annotated[Sequence[int], serializers.LongArraySerializer]
+BitSet = Annotated[int, serializers.BitSetSerializer]
+ByteArray = Annotated[bytes, serializers.ByteArraySerializer]
+
+
+def _field_serializer(hint: Any) -> type[serializers.AbstractSerializer]:
+    for metadata in getattr(hint, "__metadata__", ()):
+        if isinstance(metadata, type) and issubclass(
+            metadata, serializers.AbstractSerializer
+        ):
+            return metadata
+    raise TypeError(f"Field type {hint!r} has no serializer.")
+
+
+def _compile(
+    cls: type, fields: dict[str, type[serializers.AbstractSerializer]]
+) -> tuple[Callable, Callable]:
+    """Compiles encode and decode functions for the packet fields."""
+    # pylint: disable=R0914
+    namespace: dict[str, Any] = {"cls": cls}
+    encode_parts, decode_lines = [], []
+    fixed: list[tuple[str, str]] = []
+
+    def flush_fixed() -> None:
+        if not fixed:
+            return
+        name = f"_struct{len(namespace)}"
+        namespace[name] = packer = struct.Struct(">" + "".join(fmt for _, fmt in fixed))
+        targets = ", ".join(f"self.{field}" for field, _ in fixed)
+        encode_parts.append(f"{name}.pack({targets})")
+        decode_lines.append(f"{targets}, = {name}.unpack_from(data, offset)")
+        decode_lines.append(f"offset += {packer.size}")
+        fixed.clear()
+
+    for field, serializer in fields.items():
+        if fmt := getattr(serializer, "FMT", None):
+            fixed.append((field, fmt))
+            continue
+        flush_fixed()
+        namespace[f"_write_{field}"] = serializer.encode
+        namespace[f"_read_{field}"] = serializer.read
+        encode_parts.append(f"_write_{field}(self.{field})")
+        decode_lines.append(f"self.{field}, offset = _read_{field}(data, offset)")
+    flush_fixed()
+
+    source = "\n".join(
+        (
+            "def encode(self):",
+            f"    return b''.join(({''.join(f'{part}, ' for part in encode_parts)}))",
+            "def decode(data, offset):",
+            "    self = cls.__new__(cls)",
+            *(f"    {line}" for line in decode_lines),
+            "    return self, offset",
+        )
+    )
+    exec(source, namespace)  # pylint: disable=W0122
+    return namespace["encode"], namespace["decode"]
+
+
+class _PacketMeta(type):
+    """Declares slots for the annotated fields of a packet class."""
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        annotations = namespace.get("__annotations__", {})
+        namespace.setdefault(
+            "__slots__", tuple(field for field in annotations if field not in namespace)
+        )
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class Packet(metaclass=_PacketMeta):
+    """Base class of declarative packets.
+
+    Serializer of every field is taken from its `Annotated` type (see the types
+        of this module).
+    """
+
+    __slots__ = ()
+
+    packet_id: ClassVar[int]
+    _fields: ClassVar[tuple[str, ...]] = ()
+    _header: ClassVar[bytes]
+    _encode: ClassVar[Callable[[Any], bytes]]
+    _decode: ClassVar[Callable[[memoryview, int], tuple[Any, int]]]
+
+    def __init_subclass__(cls, packet_id: int | None = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if packet_id is not None:
+            cls.packet_id = packet_id
+            cls._header = serializers.VarIntSerializer.encode(packet_id)
+        hints = typing.get_type_hints(cls, include_extras=True)
+        fields = {
+            name: _field_serializer(hint)
+            for name, hint in hints.items()
+            if typing.get_origin(hint) is not ClassVar and not name.startswith("_")
+        }
+        cls._fields = tuple(fields)
+        cls._encode, cls._decode = _compile(cls, fields)  # type: ignore[assignment]
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        if len(args) > len(self._fields):
+            raise TypeError(f"{type(self).__name__} takes {len(self._fields)} fields.")
+        values = dict(zip(self._fields, args))
+        values.update(kwargs)
+        if set(values) != set(self._fields):
+            raise TypeError(f"{type(self).__name__} requires fields {self._fields}.")
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def serialize(self) -> bytes:
+        """Returns packet data with the packet ID, ready for `Connection.send`."""
+        return self._header + self._encode()
+
+    @classmethod
+    def deserialize(cls: type[_T], data: bytes) -> _T:
+        """Parses packet data with the packet ID."""
+        with memoryview(data) as view:
+            packet_id, offset = serializers.VarIntSerializer.read(view, 0)
+            if packet_id != cls.packet_id:
+                raise ValueError(f"Unexpected packet ID {packet_id:#x}.")
+            packet, _ = cls._decode(view, offset)
+        return packet
+
+    def write(self, buffer: bytearray) -> None:
+        """Appends packet data with the packet ID to the buffer."""
+        buffer += self._header
+        buffer += self._encode()
+
+    def to_buffer(self, buffer: io.BytesIO) -> None:
+        """Writes packet fields (without the packet ID) to the buffer."""
+        buffer.write(self._encode())
+
+    @classmethod
+    def from_buffer(cls: type[_T], buffer: io.BytesIO) -> _T:
+        """Reads packet fields from the buffer, the packet ID must be read already."""
+        with buffer.getbuffer() as view:
+            packet, offset = cls._decode(view, buffer.tell())
+        buffer.seek(offset)
+        return packet
+
+    @classmethod
+    def from_frame(cls: type[_T], frame: connection.Frame) -> _T:
+        """Decodes packet fields of the received frame."""
+        packet, _ = cls._decode(frame.data, frame.offset)
+        return packet
+
+
+class LazyPacket(Generic[_T]):
+    """Packet view which decodes the frame on the first access to its fields.
+
+    Examples:
+        >>> move = LazyPacket(SetPlayerPosition, await conn.receive_frame())
+        >>> move.x  # the whole packet is decoded here
+    """
+
+    __slots__ = ("_packet_type", "_frame", "_packet")
+
+    def __init__(self, packet_type: type[_T], frame: connection.Frame):
+        self._packet_type = packet_type
+        self._frame = frame
+        self._packet: _T | None = None
+
+    @property
+    def packet_id(self) -> int:
+        return self._frame.packet_id
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._packet is not None
+
+    def decode(self) -> _T:
+        if self._packet is None:
+            self._packet = self._packet_type.from_frame(self._frame)
+        return self._packet
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.decode(), name)
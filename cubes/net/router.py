@@ -0,0 +1,184 @@
+import enum
+import io
+from typing import Any, Callable, Coroutine, Iterable, NamedTuple
+
+from cubes.net import connection, packets, serializers
+
+PacketHandler = Callable[[connection.Connection, Any], Coroutine[Any, Any, None]]
+
+
+class Direction(enum.Enum):
+    SERVERBOUND = enum.auto()
+    CLIENTBOUND = enum.auto()
+
+
+class _PacketKey(NamedTuple):
+    protocol: int
+    state: connection.ConnectionState
+    direction: Direction
+    packet_id: int
+
+
+class PacketRegistry:
+    """Maps protocol version, connection state, direction and packet ID to packet
+    classes."""
+
+    __slots__ = ("_packets", "_keys")
+
+    def __init__(self) -> None:
+        self._packets: dict[_PacketKey, type[packets.Packet]] = {}
+        self._keys: dict[type[packets.Packet], list[_PacketKey]] = {}
+
+    def register(
+        self,
+        packet: type[packets.Packet],
+        state: connection.ConnectionState,
+        direction: Direction,
+        protocols: Iterable[int],
+        packet_id: int | None = None,
+    ) -> None:
+        """Registers packet class for the protocol versions.
+
+        `packet_id` defaults to the `packet_id` of the class.
+        """
+        if packet_id is None:
+            packet_id = packet.packet_id
+        for protocol in protocols:
+            key = _PacketKey(protocol, state, direction, packet_id)
+            if key in self._packets:
+                raise ValueError(f"Packet is already registered for {key}.")
+            self._packets[key] = packet
+            self._keys.setdefault(packet, []).append(key)
+
+    def get(
+        self,
+        protocol: int,
+        state: connection.ConnectionState,
+        direction: Direction,
+        packet_id: int,
+    ) -> type[packets.Packet] | None:
+        return self._packets.get(_PacketKey(protocol, state, direction, packet_id))
+
+    def find(
+        self, packet: type[packets.Packet], protocol: int, direction: Direction
+    ) -> list[tuple[connection.ConnectionState, int]]:
+        """Returns states and packet IDs of the packet class for the protocol."""
+        return [
+            (key.state, key.packet_id)
+            for key in self._keys.get(packet, ())
+            if key.protocol == protocol and key.direction == direction
+        ]
+
+
+class _Route(NamedTuple):
+    packet: type[packets.Packet]
+    handler: PacketHandler
+    lazy: bool
+
+
+class PacketRouter:
+    """Dispatches received packets to handlers of one protocol version.
+
+    Handlers are stored in tables indexed by connection state and packet ID, so
+        dispatching costs two list lookups. Packets without a handler are not
+        decoded. `route` selects the table by `Connection.state`.
+
+    Examples:
+        >>> router = PacketRouter(registry, 766)
+        >>> @router.handler(Handshake)
+        ... async def process_handshake(conn: Connection, packet: Handshake): ...
+        >>> await router.route(conn, buffer)  # conn.state is HANDSHAKE
+    """
+
+    __slots__ = ("_registry", "_protocol", "_direction", "_tables")
+
+    def __init__(
+        self,
+        registry: PacketRegistry,
+        protocol: int,
+        direction: Direction = Direction.SERVERBOUND,
+    ):
+        self._registry = registry
+        self._protocol = protocol
+        self._direction = direction
+        self._tables: list[list[_Route | None]] = [
+            [] for _ in connection.ConnectionState
+        ]
+
+    @property
+    def protocol(self) -> int:
+        return self._protocol
+
+    def add_handler(
+        self,
+        packet: type[packets.Packet],
+        handler: PacketHandler,
+        *,
+        lazy: bool = False,
+    ) -> None:
+        """Adds packet handler.
+
+        If `lazy` is true, the handler receives `cubes.net.packets.LazyPacket`,
+            which is decoded only when the handler accesses its fields.
+        """
+        routes = self._registry.find(packet, self._protocol, self._direction)
+        if not routes:
+            raise ValueError(
+                f"{packet.__name__} isn't registered for protocol {self._protocol}."
+            )
+        for state, packet_id in routes:
+            table = self._tables[state]
+            if packet_id >= len(table):
+                table += [None] * (packet_id + 1 - len(table))
+            table[packet_id] = _Route(packet, handler, lazy)
+
+    def handler(
+        self, packet: type[packets.Packet], *, lazy: bool = False
+    ) -> Callable[[PacketHandler], PacketHandler]:
+        """Decorator version of `add_handler`."""
+
+        def decorator(handler: PacketHandler) -> PacketHandler:
+            self.add_handler(packet, handler, lazy=lazy)
+            return handler
+
+        return decorator
+
+    async def route(
+        self, conn: connection.Connection, packet: connection.Frame | io.BytesIO
+    ) -> bool:
+        """Dispatches the packet by the state of the connection, see `dispatch`."""
+        return await self._dispatch(conn, self._tables[conn.state], packet)
+
+    async def dispatch(
+        self,
+        conn: connection.Connection,
+        state: connection.ConnectionState,
+        packet: connection.Frame | io.BytesIO,
+    ) -> bool:
+        """Decodes the packet and calls its handler.
+
+        Returns `False` if the packet has no handler, it isn't decoded then.
+        """
+        return await self._dispatch(conn, self._tables[state], packet)
+
+    async def _dispatch(
+        self,
+        conn: connection.Connection,
+        table: list[_Route | None],
+        packet: connection.Frame | io.BytesIO,
+    ) -> bool:
+        if isinstance(packet, connection.Frame):
+            packet_id = packet.packet_id
+        else:
+            packet_id = serializers.VarIntSerializer.from_buffer(packet)
+        if not 0 <= packet_id < len(table) or (route := table[packet_id]) is None:
+            return False
+        if isinstance(packet, io.BytesIO):
+            packet = connection.Frame(
+                memoryview(packet.getvalue()), packet.tell(), packet_id
+            )
+        if route.lazy:
+            await route.handler(conn, packets.LazyPacket(route.packet, packet))
+        else:
+            await route.handler(conn, route.packet.from_frame(packet))
+        return True
@@ -1,5 +1,15 @@
 from cubes.net.serializers._abc import AbstractSerializer
-from cubes.net.serializers._nbt import NBTSerializer
+from cubes.net.serializers._arrays import (
+    BitSetSerializer,
+    ByteArraySerializer,
+    LongArraySerializer,
+)
+from cubes.net.serializers._nbt import (
+    NBTSerializer,
+    NetworkNBTSerializer,
+    PlainNBTSerializer,
+    PlainNetworkNBTSerializer,
+)
 from cubes.net.serializers._position import PositionSerializer
 from cubes.net.serializers._simple import (
     AngleSerializer,
@@ -5,6 +5,7 @@ from typing import Generic, TypeVar
 # pylint: disable=C0103
 
 T = TypeVar("T")
+Buffer = bytes | bytearray | memoryview
 
 
 class AbstractSerializer(abc.ABC, Generic[T]):
@@ -41,3 +42,26 @@ class AbstractSerializer(abc.ABC, Generic[T]):
     @abc.abstractmethod
     def from_buffer(cls, buffer: io.BytesIO) -> T:
         """"""
+
+    @classmethod
+    def encode(cls, value: T) -> bytes:
+        """Encodes the value without validation."""
+        return cls(value, validate=False).serialize()  # type: ignore[call-arg]
+
+    @classmethod
+    def read(cls, data: Buffer, offset: int) -> tuple[T, int]:
+        """Decodes the value at `offset` of `data`.
+
+        Returns the value and offset of the data after it.
+        """
+        with memoryview(data) as view:
+            buffer = io.BytesIO(view[offset:])
+        value = cls.from_buffer(buffer)
+        return value, offset + buffer.tell()
+
+    @classmethod
+    def write(cls, buffer: bytearray, value: T, validate: bool = False) -> None:
+        """Appends the encoded value to `buffer`."""
+        if validate:
+            cls.validate(value)
+        buffer += cls.encode(value)
@@ -0,0 +1,160 @@
+import array
+import io
+import sys
+from typing import Sequence
+
+from cubes.net.serializers import _abc, _var_length
+
+_LONG_RANGE = (-9223372036854775808, 18446744073709551615)
+_LONG_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _longs_to_bytes(values: array.array) -> bytes:
+    if sys.byteorder == "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _longs_from_bytes(data: _abc.Buffer) -> array.array:
+    values = array.array("q")
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+class LongArraySerializer(_abc.AbstractSerializer[Sequence[int]]):
+    """VarInt length prefixed array of Longs.
+
+    Values are decoded to `array.array` of signed Longs. `array.array` values
+        with "q" or "Q" typecode are encoded without converting every item, so
+        bit-packed data can be kept unsigned.
+    """
+
+    @classmethod
+    def validate(cls, value: Sequence[int]) -> None:
+        if isinstance(value, array.array) and value.typecode in "qQ":
+            return
+        min_, max_ = _LONG_RANGE
+        for item in value:
+            if not isinstance(item, int) or item < min_ or item > max_:
+                raise ValueError
+
+    def serialize(self) -> bytes:
+        return self.encode(self._value)
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> Sequence[int]:
+        return cls.read(data, 0)[0]
+
+    def to_buffer(self, buffer: io.BytesIO) -> None:
+        buffer.write(self.encode(self._value))
+
+    @classmethod
+    def from_buffer(cls, buffer: io.BytesIO) -> Sequence[int]:
+        length = _var_length.VarIntSerializer.from_buffer(buffer)
+        data = buffer.read(length * 8)
+        if length < 0 or len(data) != length * 8:
+            raise ValueError
+        return _longs_from_bytes(data)
+
+    @classmethod
+    def encode(cls, value: Sequence[int]) -> bytes:
+        if not isinstance(value, array.array) or value.typecode not in "qQ":
+            value = array.array("Q", [item & _LONG_MASK for item in value])
+        return _var_length.VarIntSerializer.encode(len(value)) + _longs_to_bytes(value)
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[Sequence[int], int]:
+        length, offset = _var_length.VarIntSerializer.read(data, offset)
+        end = offset + length * 8
+        if length < 0 or end > len(data):
+            raise ValueError
+        with memoryview(data) as view:
+            return _longs_from_bytes(view[offset:end]), end
+
+
+class BitSetSerializer(_abc.AbstractSerializer[int]):
+    """BitSet (VarInt length prefixed array of Longs) represented by `int`.
+
+    Bit `n` of the value is bit `n % 64` of the Long `n // 64`.
+    """
+
+    @classmethod
+    def validate(cls, value: int) -> None:
+        if not isinstance(value, int) or value < 0:
+            raise ValueError
+
+    def serialize(self) -> bytes:
+        return self.encode(self._value)
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> int:
+        return cls.read(data, 0)[0]
+
+    def to_buffer(self, buffer: io.BytesIO) -> None:
+        buffer.write(self.encode(self._value))
+
+    @classmethod
+    def from_buffer(cls, buffer: io.BytesIO) -> int:
+        return cls._from_longs(LongArraySerializer.from_buffer(buffer))
+
+    @staticmethod
+    def _from_longs(longs: Sequence[int]) -> int:
+        result = 0
+        for index, long in enumerate(longs):
+            result |= (long & _LONG_MASK) << 64 * index
+        return result
+
+    @classmethod
+    def encode(cls, value: int) -> bytes:
+        longs = array.array(
+            "Q",
+            [value >> shift & _LONG_MASK for shift in range(0, value.bit_length(), 64)],
+        )
+        return LongArraySerializer.encode(longs)
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[int, int]:
+        longs, offset = LongArraySerializer.read(data, offset)
+        return cls._from_longs(longs), offset
+
+
+class ByteArraySerializer(_abc.AbstractSerializer[bytes]):
+    """VarInt length prefixed bytes."""
+
+    @classmethod
+    def validate(cls, value: bytes) -> None:
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise ValueError
+
+    def serialize(self) -> bytes:
+        return self.encode(self._value)
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> bytes:
+        return cls.read(data, 0)[0]
+
+    def to_buffer(self, buffer: io.BytesIO) -> None:
+        buffer.write(self.encode(self._value))
+
+    @classmethod
+    def from_buffer(cls, buffer: io.BytesIO) -> bytes:
+        length = _var_length.VarIntSerializer.from_buffer(buffer)
+        data = buffer.read(length)
+        if length < 0 or len(data) != length:
+            raise ValueError
+        return data
+
+    @classmethod
+    def encode(cls, value: bytes) -> bytes:
+        return _var_length.VarIntSerializer.encode(len(value)) + value
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[bytes, int]:
+        length, offset = _var_length.VarIntSerializer.read(data, offset)
+        end = offset + length
+        if length < 0 or end > len(data):
+            raise ValueError
+        return bytes(data[offset:end]), end
@@ -1,31 +1,131 @@
 import io
+import struct
+from typing import Any, Mapping
 
 from cubes import nbt
-from cubes.net.serializers import _abc, _mixins
+from cubes.net.serializers import _abc
 
-_WRAPPER_PREFIX = b"\x0A\x00\x00"
+_TAG_END = 0
+_TAG_COMPOUND = 10
+_USHORT = struct.Struct(">H")
 
 
-class NBTSerializer(
-    _mixins.BufferSerializeMixin[nbt.Compound], _abc.AbstractSerializer[nbt.Compound]
-):
-    def __init__(self, value: dict | nbt.Compound, validate: bool = True):
-        super().__init__(nbt.Compound(value), validate=False)
+class _StrictReader(io.BytesIO):
+    """Fails on reads past the end of data, nbtlib would read zeros there."""
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = super().read(size)
+        if size is not None and 0 <= size != len(data):
+            raise EOFError
+        return data
+
+
+def _read_typed(data: _abc.Buffer, offset: int, network: bool) -> tuple[Any, int]:
+    """Decodes NBT to nbtlib tags, which keep the exact tag types."""
+    try:
+        tag = data[offset]
+        offset += 1
+        if not network:
+            if tag != _TAG_COMPOUND:
+                raise ValueError("NBT root is not a compound.")
+            offset += 2 + _USHORT.unpack_from(data, offset)[0]
+        elif tag == _TAG_END:
+            return None, offset
+        tag_class = nbt.Compound.all_tags[tag]
+        with memoryview(data) as view:
+            fileobj = _StrictReader(view[offset:])
+        value = tag_class.parse(fileobj)
+    except KeyError:
+        raise ValueError(f"Unknown NBT tag type {tag}.") from None
+    except (IndexError, struct.error, EOFError):
+        raise ValueError("Unexpected end of data.") from None
+    except RecursionError:
+        raise ValueError("NBT is nested too deep.") from None
+    return value, offset + fileobj.tell()
+
+
+class NBTSerializer(_abc.AbstractSerializer[dict]):
+    """Compound with a named root, as it's sent before 1.20.2.
+
+    Values are encoded with the native codec, decoded values are nbtlib tags, so
+        encoding them again gives the same bytes.
+    """
+
+    _NETWORK = False
+    _PLAIN = False
 
     @classmethod
-    def validate(cls, value: nbt.Compound) -> None:
-        nbt.Compound(value)
+    def validate(cls, value: Any) -> None:
+        if not isinstance(value, Mapping):
+            raise ValueError
+
+    def serialize(self) -> bytes:
+        return nbt.dumps(self._value, network=self._NETWORK)
 
     @classmethod
-    def deserialize(cls, data: bytes) -> nbt.Compound:
-        return cls.from_buffer(io.BytesIO(data))
+    def deserialize(cls, data: bytes) -> Any:
+        value, offset = cls.read(data, 0)
+        if offset != len(data):
+            raise ValueError("Unexpected data after NBT.")
+        return value
 
     def to_buffer(self, buffer: io.BytesIO) -> None:
-        buffer.write(_WRAPPER_PREFIX)
-        self._value.write(buffer)
+        buffer.write(self.serialize())
+
+    @classmethod
+    def from_buffer(cls, buffer: io.BytesIO) -> Any:
+        with buffer.getbuffer() as view:
+            value, offset = cls.read(view, buffer.tell())
+        buffer.seek(offset)
+        return value
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return nbt.dumps(value, network=cls._NETWORK)
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[Any, int]:
+        if cls._PLAIN:
+            return nbt.read(data, offset, network=cls._NETWORK)
+        return _read_typed(data, offset, cls._NETWORK)
 
     @classmethod
-    def from_buffer(cls, buffer: io.BytesIO) -> nbt.Compound:
-        buffer.read(3)
-        result = nbt.Compound.parse(buffer)
-        return result
+    def write(cls, buffer: bytearray, value: Any, validate: bool = False) -> None:
+        if validate:
+            cls.validate(value)
+        nbt.write(buffer, value, network=cls._NETWORK)
+
+
+class PlainNBTSerializer(NBTSerializer):
+    """`NBTSerializer` decoding to plain Python values with the native codec.
+
+    Decoding is faster, but tag types aren't kept: e.g. Short and Int are both
+        decoded to `int` and encoded back as Int.
+    """
+
+    _PLAIN = True
+
+
+class NetworkNBTSerializer(NBTSerializer):
+    """NBT with a nameless root, as it's sent since 1.20.2.
+
+    The root can be any tag (text components are sent as String tags), `None`
+        is sent as an End tag.
+    """
+
+    _NETWORK = True
+
+    @classmethod
+    def validate(cls, value: Any) -> None:
+        if value is not None:
+            try:
+                nbt.tag_type(value)
+            except TypeError:
+                raise ValueError from None
+
+
+class PlainNetworkNBTSerializer(NetworkNBTSerializer):
+    """`NetworkNBTSerializer` decoding to plain Python values, see
+    `PlainNBTSerializer`."""
+
+    _PLAIN = True
@@ -1,7 +1,49 @@
+"""Block position serializer.
+
+Batch methods use [NumPy](https://numpy.org) when it's installed
+    (`pip install pyCubes[numpy]`) and fall back to `array` otherwise.
+"""
+
+import array
 import io
 import struct
+import sys
+from typing import Any, Iterable
+
+from cubes.net.serializers import _abc, _var_length
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    NUMPY_AVAILABLE = False
+else:
+    NUMPY_AVAILABLE = True
+
+_STRUCT = struct.Struct(">Q")
+
+Positions = Iterable[tuple[int, int, int]]
+
+
+def _to_big_endian(values: array.array) -> bytes:
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values.tobytes()
+
 
-from cubes.net.serializers import _abc
+def _from_big_endian(data: _abc.Buffer, offset: int, count: int) -> array.array:
+    values = array.array("Q")
+    with memoryview(data) as view:
+        values.frombytes(view[offset : offset + count * values.itemsize])
+    if len(values) != count:
+        raise ValueError
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def _signed(values: Any, bits: int) -> Any:
+    """Converts NumPy array of unsigned `bits` wide fields to signed values."""
+    return (values ^ 1 << bits - 1) - (1 << bits - 1)
 
 
 class PositionSerializer(_abc.AbstractSerializer[tuple[int, int, int]]):
@@ -18,37 +60,135 @@ class PositionSerializer(_abc.AbstractSerializer[tuple[int, int, int]]):
             raise ValueError
 
     @staticmethod
-    def _to_twos_complement(num: int, bits: int) -> int:
-        return num + (1 << bits) if num < 0 else num
+    def _pack(value: tuple[int, int, int]) -> int:
+        x, y, z = value
+        return (x & 0x3FFFFFF) << 38 | (z & 0x3FFFFFF) << 12 | y & 0xFFF
 
     @staticmethod
-    def _from_twos_complement(num: int, bits: int) -> int:
-        if num & (1 << bits - 1) != 0:
-            num -= 1 << bits
-        return num
+    def _unpack(value: int) -> tuple[int, int, int]:
+        x, z, y = value >> 38, value >> 12 & 0x3FFFFFF, value & 0xFFF
+        return (
+            x - (1 << 26) if x & 1 << 25 else x,
+            y - (1 << 12) if y & 1 << 11 else y,
+            z - (1 << 26) if z & 1 << 25 else z,
+        )
 
     def serialize(self) -> bytes:
-        x, y, z = self._value
-        value = sum(
-            (
-                self._to_twos_complement(x, 26) << 38,
-                self._to_twos_complement(z, 26) << 12,
-                self._to_twos_complement(y, 12),
-            )
-        )
-        return struct.pack(">Q", value)
+        return _STRUCT.pack(self._pack(self._value))
 
     @classmethod
     def deserialize(cls, data: bytes) -> tuple[int, int, int]:
-        _data = struct.unpack(">Q", data)[0]
-        x = cls._from_twos_complement(_data >> 38, 26)
-        z = cls._from_twos_complement(_data >> 12 & 0x3FFFFFF, 26)
-        y = cls._from_twos_complement(_data & 0xFFF, 12)
-        return x, y, z
+        return cls._unpack(_STRUCT.unpack(data)[0])
 
     def to_buffer(self, buffer: io.BytesIO) -> None:
         buffer.write(self.serialize())
 
     @classmethod
     def from_buffer(cls, buffer: io.BytesIO) -> tuple[int, int, int]:
-        return cls.deserialize(buffer.read(struct.calcsize("Q")))
+        return cls.deserialize(buffer.read(_STRUCT.size))
+
+    @classmethod
+    def encode(cls, value: tuple[int, int, int]) -> bytes:
+        return _STRUCT.pack(cls._pack(value))
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[tuple[int, int, int], int]:
+        return cls._unpack(_STRUCT.unpack_from(data, offset)[0]), offset + _STRUCT.size
+
+    @classmethod
+    def encode_array(
+        cls, positions: Positions, *, fast: bool = NUMPY_AVAILABLE
+    ) -> bytes:
+        """Encodes positions one after another without validation.
+
+        `positions` can also be NumPy array of shape (N, 3).
+        """
+        if fast:
+            xyz = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+            x, y, z = (xyz[:, index].astype(np.uint64) for index in range(3))
+            packed = (x & 0x3FFFFFF) << 38 | (z & 0x3FFFFFF) << 12 | (y & 0xFFF)
+            return packed.astype(">u8").tobytes()
+        pack = cls._pack
+        return _to_big_endian(array.array("Q", [pack(value) for value in positions]))
+
+    @classmethod
+    def read_array(
+        cls,
+        data: _abc.Buffer,
+        offset: int,
+        count: int,
+        *,
+        fast: bool = NUMPY_AVAILABLE,
+    ) -> tuple[list[tuple[int, int, int]], int]:
+        """Decodes `count` positions one after another starting at `offset`.
+
+        Returns the positions and offset of the data after them.
+        """
+        end = offset + count * _STRUCT.size
+        if fast:
+            if end > len(data):
+                raise ValueError
+            packed = np.frombuffer(data, ">u8", count, offset).astype(np.int64)
+            x = _signed(packed >> 38 & 0x3FFFFFF, 26)
+            z = _signed(packed >> 12 & 0x3FFFFFF, 26)
+            y = _signed(packed & 0xFFF, 12)
+            return list(zip(x.tolist(), y.tolist(), z.tolist())), end
+        unpack = cls._unpack
+        return [unpack(value) for value in _from_big_endian(data, offset, count)], end
+
+    @staticmethod
+    def encode_section(section: tuple[int, int, int]) -> bytes:
+        """Encodes chunk section position (in sections, not blocks) as a Long.
+
+        It's the section position of Update Section Blocks packet.
+        """
+        x, y, z = section
+        return _STRUCT.pack((x & 0x3FFFFF) << 42 | (z & 0x3FFFFF) << 20 | y & 0xFFFFF)
+
+    @staticmethod
+    def read_section(
+        data: _abc.Buffer, offset: int
+    ) -> tuple[tuple[int, int, int], int]:
+        (value,) = _STRUCT.unpack_from(data, offset)
+        x, z, y = value >> 42, value >> 20 & 0x3FFFFF, value & 0xFFFFF
+        section = (
+            x - (1 << 22) if x & 1 << 21 else x,
+            y - (1 << 20) if y & 1 << 19 else y,
+            z - (1 << 22) if z & 1 << 21 else z,
+        )
+        return section, offset + _STRUCT.size
+
+    @staticmethod
+    def encode_section_blocks(
+        blocks: Iterable[tuple[int, int, int, int]], *, fast: bool = NUMPY_AVAILABLE
+    ) -> bytes:
+        """Encodes block changes of one chunk section as VarLong array entries.
+
+        Every block is `(state_id, x, y, z)` with coordinates relative to the
+            section (0-15). The array length isn't included.
+        """
+        if fast:
+            blocks = np.asarray(blocks, dtype=np.int64).reshape(-1, 4)
+            state, x, y, z = (blocks[:, index] for index in range(4))
+            values = (state << 12 | (x & 0xF) << 8 | (z & 0xF) << 4 | y & 0xF).tolist()
+        else:
+            values = [
+                state << 12 | (x & 0xF) << 8 | (z & 0xF) << 4 | y & 0xF
+                for state, x, y, z in blocks
+            ]
+        return _var_length.VarLongSerializer.encode_array(values)
+
+    @staticmethod
+    def read_section_blocks(
+        data: _abc.Buffer, offset: int, count: int
+    ) -> tuple[list[tuple[int, int, int, int]], int]:
+        """Decodes `count` block change entries encoded by `encode_section_blocks`.
+
+        Returns the blocks and offset of the data after them.
+        """
+        values, offset = _var_length.VarLongSerializer.read_array(data, offset, count)
+        blocks = [
+            (value >> 12, value >> 8 & 0xF, value & 0xF, value >> 4 & 0xF)
+            for value in values
+        ]
+        return blocks, offset
@@ -6,44 +6,68 @@ from cubes.net.serializers import _abc, _mixins
 
 class _BaseSimpleSerializer(_abc.AbstractSerializer[_abc.T]):
     FMT: str
+    _STRUCT: struct.Struct
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "FMT" in cls.__dict__:
+            cls._STRUCT = struct.Struct(f">{cls.FMT}")
 
     def serialize(self) -> bytes:
-        return struct.pack(f">{self.FMT}", self._value)
+        return self._STRUCT.pack(self._value)
 
     @classmethod
     def deserialize(cls, data: bytes) -> _abc.T:
-        return struct.unpack(f">{cls.FMT}", data)[0]
+        return cls._STRUCT.unpack(data)[0]
 
     def to_buffer(self, buffer: io.BytesIO) -> None:
-        buffer.write(self.serialize())
+        buffer.write(self._STRUCT.pack(self._value))
 
     @classmethod
     def from_buffer(cls, buffer: io.BytesIO) -> _abc.T:
-        size = struct.calcsize(f"{cls.FMT}")
-        return cls.deserialize(buffer.read(size))
+        return cls._STRUCT.unpack(buffer.read(cls._STRUCT.size))[0]
 
+    @classmethod
+    def encode(cls, value: _abc.T) -> bytes:
+        """Encodes the value without validation."""
+        return cls._STRUCT.pack(value)
 
-class _OneByteBaseType(_BaseSimpleSerializer[_abc.T]):
-    def serialize(self) -> bytes:
-        return struct.pack(self.FMT, self._value)
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[_abc.T, int]:
+        """Decodes the value at `offset` of `data`.
+
+        Returns the value and offset of the data after it.
+        """
+        return cls._STRUCT.unpack_from(data, offset)[0], offset + cls._STRUCT.size
 
     @classmethod
-    def deserialize(cls, data: bytes) -> _abc.T:
-        return struct.unpack(cls.FMT, data)[0]
+    def pack_into(
+        cls, buffer: bytearray | memoryview, offset: int, value: _abc.T
+    ) -> int:
+        """Encodes the value at `offset` of preallocated `buffer` without validation.
+
+        Returns offset of the data after it.
+        """
+        cls._STRUCT.pack_into(buffer, offset, value)
+        return offset + cls._STRUCT.size
 
 
-class BooleanSerializer(_mixins.StupidValidationMixin[bool], _OneByteBaseType[bool]):
+class BooleanSerializer(
+    _mixins.StupidValidationMixin[bool], _BaseSimpleSerializer[bool]
+):
     FMT = "?"
     _TYPE = bool
 
 
-class ByteSerializer(_mixins.RangeValidationMixin[int], _OneByteBaseType[int]):
+class ByteSerializer(_mixins.RangeValidationMixin[int], _BaseSimpleSerializer[int]):
     FMT = "b"
     _TYPE = int
     _RANGE = (-128, 127)
 
 
-class UnsignedByteSerializer(_mixins.RangeValidationMixin[int], _OneByteBaseType[int]):
+class UnsignedByteSerializer(
+    _mixins.RangeValidationMixin[int], _BaseSimpleSerializer[int]
+):
     FMT = "B"
     _TYPE = int
     _RANGE = (0, 255)
@@ -60,7 +84,7 @@ class AngleSerializer(UnsignedByteSerializer):
 class ShortSerializer(_mixins.RangeValidationMixin[int], _BaseSimpleSerializer[int]):
     FMT = "h"
     _TYPE = int
-    _RANGE = (-32678, 32767)
+    _RANGE = (-32768, 32767)
 
 
 class UnsignedShortSerializer(
@@ -29,6 +29,19 @@ class StringSerializer(_mixins.BufferSerializeMixin[str], _abc.AbstractSerialize
             raise ValueError
         return buffer.read(length).decode()
 
+    @classmethod
+    def encode(cls, value: str) -> bytes:
+        data = value.encode()
+        return _var_length.VarIntSerializer.encode(len(data)) + data
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[str, int]:
+        length, offset = _var_length.VarIntSerializer.read(data, offset)
+        end = offset + length
+        if length > _MAX_STRING_LENGTH or end > len(data):
+            raise ValueError
+        return str(data[offset:end], "utf-8"), end
+
 
 class IdentifierSerializer(StringSerializer):
     @classmethod
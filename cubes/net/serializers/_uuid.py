@@ -23,3 +23,14 @@ class UUIDSerializer(_abc.AbstractSerializer[uuid.UUID]):
     @classmethod
     def from_buffer(cls, buffer: io.BytesIO) -> uuid.UUID:
         return cls.deserialize(buffer.read(16))
+
+    @classmethod
+    def encode(cls, value: uuid.UUID) -> bytes:
+        return value.bytes
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[uuid.UUID, int]:
+        end = offset + 16
+        if end > len(data):
+            raise ValueError
+        return uuid.UUID(bytes=bytes(data[offset:end])), end
@@ -1,63 +1,166 @@
 import io
-import struct
+from typing import Iterable
 
 import anyio.abc
 
 from cubes.net.serializers import _abc, _mixins
 
+# values below 2 ** 14 take one or two bytes, they cover most of the lengths, IDs
+# and counts in the protocol
+_TABLE_SIZE = 1 << 14
+_SMALL_VALUES = tuple(
+    bytes((value,)) if value < 0x80 else bytes((value & 0x7F | 0x80, value >> 7))
+    for value in range(_TABLE_SIZE)
+)
+
 
 class _BaseVarSerializer(_abc.AbstractSerializer[int]):
     _BYTES_SHIFT: int
     _MAX_BYTES: int
+    _MASK: int
+    _SIGN_BIT: int
+    _SIGN_OFFSET: int
 
     def serialize(self) -> bytes:
-        value = self._value
-        if value < 0:
-            value += 1 << self._BYTES_SHIFT
-        result = b""
-        for _ in range(self._MAX_BYTES):
-            byte = value & 0x7F
-            value >>= 7
-            result += struct.pack("B", byte | (0x80 if value > 0 else 0))
-            if value == 0:
-                break
-        return result
+        return self.encode(self._value)
 
     @classmethod
     def deserialize(cls, data: bytes) -> int:
-        return cls.from_buffer(io.BytesIO(data))
+        return cls.read(data, 0)[0]
 
     def to_buffer(self, buffer: io.BytesIO) -> None:
-        buffer.write(self.serialize())
+        buffer.write(self.encode(self._value))
 
     @classmethod
     def from_buffer(cls, buffer: io.BytesIO) -> int:
-        result = 0
-        for index in range(cls._MAX_BYTES):
-            byte = ord(buffer.read(1))
-            result |= (byte & 0x7F) << 7 * index
-            if not byte & 0x80:
-                break
-        if result & (1 << (cls._BYTES_SHIFT - 1)):
-            result -= 1 << cls._BYTES_SHIFT
+        read = buffer.read
+        try:
+            byte = read(1)[0]
+            if byte < 0x80:
+                return byte
+            result, shift, max_shift = byte & 0x7F, 7, 7 * cls._MAX_BYTES
+            while (byte := read(1)[0]) >= 0x80:
+                result |= (byte & 0x7F) << shift
+                shift += 7
+                if shift >= max_shift:
+                    raise ValueError("VarInt is too big.")
+        except IndexError:
+            raise ValueError("Unexpected end of data.") from None
+        result |= byte << shift
+        if result >= cls._SIGN_BIT:
+            result = cls._signed(result)
         return result
 
     @classmethod
     async def from_stream(cls, buffer: anyio.abc.ByteReceiveStream) -> int:
         result = 0
-        for index in range(cls._MAX_BYTES):
-            byte = ord(await buffer.receive(1))
-            result |= (byte & 0x7F) << 7 * index
-            if not byte & 0x80:
-                break
-        if result & (1 << (cls._BYTES_SHIFT - 1)):
-            result -= 1 << cls._BYTES_SHIFT
-        return result
+        for shift in range(0, 7 * cls._MAX_BYTES, 7):
+            byte = (await buffer.receive(1))[0]
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return cls._signed(result)
+        raise ValueError("VarInt is too big.")
+
+    @classmethod
+    def _signed(cls, value: int) -> int:
+        value &= cls._MASK
+        return value - cls._SIGN_OFFSET if value & cls._SIGN_BIT else value
+
+    @classmethod
+    def encode(cls, value: int) -> bytes:
+        """Encodes the value without validation."""
+        if 0 <= value < _TABLE_SIZE:
+            return _SMALL_VALUES[value]
+        if value < 0:
+            value += 1 << cls._BYTES_SHIFT
+        result = bytearray()
+        while value >= 0x80:
+            result.append(value & 0x7F | 0x80)
+            value >>= 7
+        result.append(value)
+        return bytes(result)
+
+    @classmethod
+    def read(cls, data: _abc.Buffer, offset: int) -> tuple[int, int]:
+        """Decodes the value at `offset` of `data`.
+
+        Returns the value and offset of the data after it.
+        """
+        try:
+            byte = data[offset]
+            if byte < 0x80:
+                return byte, offset + 1
+            result = byte & 0x7F
+            byte = data[offset + 1]
+            if byte < 0x80:
+                return result | byte << 7, offset + 2
+            result |= (byte & 0x7F) << 7
+            offset += 2
+            shift, max_shift = 14, 7 * cls._MAX_BYTES
+            while (byte := data[offset]) >= 0x80:
+                result |= (byte & 0x7F) << shift
+                shift += 7
+                offset += 1
+                if shift >= max_shift:
+                    raise ValueError("VarInt is too big.")
+            result |= byte << shift
+            if result >= cls._SIGN_BIT:
+                result = cls._signed(result)
+            return result, offset + 1
+        except IndexError:
+            raise ValueError("Unexpected end of data.") from None
+
+    @classmethod
+    def encode_array(cls, values: Iterable[int]) -> bytes:
+        """Encodes values one after another without validation."""
+        table, encode = _SMALL_VALUES, cls.encode
+        return b"".join(
+            [
+                table[value] if 0 <= value < _TABLE_SIZE else encode(value)
+                for value in values
+            ]
+        )
+
+    @classmethod
+    def write_array(
+        cls, buffer: bytearray, values: Iterable[int], validate: bool = False
+    ) -> None:
+        """Appends values encoded one after another to `buffer`."""
+        if validate:
+            values = list(values)
+            for value in values:
+                cls.validate(value)
+        buffer += cls.encode_array(values)
+
+    @classmethod
+    def read_array(
+        cls, data: _abc.Buffer, offset: int, count: int
+    ) -> tuple[list[int], int]:
+        """Decodes `count` values one after another starting at `offset`.
+
+        Returns the values and offset of the data after them.
+        """
+        result = [0] * count
+        read = cls.read
+        try:
+            for index in range(count):
+                byte = data[offset]
+                if byte < 0x80:
+                    result[index] = byte
+                    offset += 1
+                else:
+                    result[index], offset = read(data, offset)
+        except IndexError:
+            raise ValueError("Unexpected end of data.") from None
+        return result, offset
 
 
 class VarIntSerializer(_BaseVarSerializer, _mixins.RangeValidationMixin[int]):
     _BYTES_SHIFT = 32
     _MAX_BYTES = 5
+    _MASK = (1 << 32) - 1
+    _SIGN_BIT = 1 << 31
+    _SIGN_OFFSET = 1 << 32
     _TYPE = int
     _RANGE = (-2147483648, 2147483647)
 
@@ -65,5 +168,8 @@ class VarIntSerializer(_BaseVarSerializer, _mixins.RangeValidationMixin[int]):
 class VarLongSerializer(_BaseVarSerializer, _mixins.RangeValidationMixin[int]):
     _BYTES_SHIFT = 64
     _MAX_BYTES = 10
+    _MASK = (1 << 64) - 1
+    _SIGN_BIT = 1 << 63
+    _SIGN_OFFSET = 1 << 64
     _TYPE = int
     _RANGE = (-9223372036854775808, 9223372036854775807)
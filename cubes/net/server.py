@@ -1,19 +1,33 @@
+import functools
 import io
-from typing import Any, Callable, Coroutine
+from typing import AbstractSet, Any, Callable, Coroutine, Iterable
 
 import anyio
 import anyio.abc
 
-from cubes.net import connection
+from cubes.net import connection, status, timers
+from cubes.net.broadcast import BroadcastBus
+
+Recipients = Iterable[connection.Connection] | Callable[[connection.Connection], bool]
 
 
 class Server:
+    # pylint: disable=R0902
     __slots__ = (
         "_new_connection_handler",
         "_packet_receive_timeout_handler",
         "_process_packet_handler",
         "_close_connection_handler",
         "_packet_receive_timeout",
+        "_autoflush",
+        "_connection_factory",
+        "_connection_data",
+        "_timers",
+        "_status_provider",
+        "_broadcast_bus",
+        "_connections",
+        "_flushing",
+        "_task_group",
         "_is_running",
     )
 
@@ -32,56 +46,265 @@ class Server:
             [connection.Connection, Exception | None], Coroutine[Any, Any, None]
         ],
         packet_receive_timeout: float = 20,
+        *,
+        autoflush: bool = False,
+        high_watermark: int | None = None,
+        low_watermark: int | None = None,
+        overflow_policy: connection.OverflowPolicy = connection.OverflowPolicy.BLOCK,
+        status_provider: status.StatusProvider | None = None,
+        broadcast_bus: BroadcastBus | None = None,
+        connection_data: Callable[[], Any] | None = None,
+        timer_resolution: float = 0.1,
     ):
+        """Low level server, every connection is processed in its own task.
+
+        Args:
+            autoflush: Run `Connection.autoflush` for every connection, so packets
+                queued with `Connection.write` are sent at the end of the tick.
+            high_watermark: See `Connection`.
+            low_watermark: See `Connection`.
+            overflow_policy: See `Connection`.
+            status_provider: Answers status requests and pings. Status
+                connections are processed by the server itself and never reach
+                the handlers, other connections get their handshake packet as
+                the first packet.
+            broadcast_bus: Delivers packets published by other worker processes
+                to the connections of this server, see `publish`.
+            connection_data: Creates `Connection.data` of every new connection.
+            timer_resolution: Resolution of `timers`, receive timeouts fire up
+                to two resolutions late.
+        """
         # pylint: disable=R0913
         self._new_connection_handler = new_connection_handler
         self._packet_receive_timeout_handler = packet_receive_timeout_handler
         self._process_packet_handler = process_packet_handler
         self._packet_receive_timeout = packet_receive_timeout
         self._close_connection_handler = close_connection_handler
+        self._autoflush = autoflush
+        self._connection_factory = functools.partial(
+            connection.Connection,
+            high_watermark=high_watermark,
+            low_watermark=low_watermark,
+            overflow_policy=overflow_policy,
+        )
+        self._connection_data = connection_data
+        self._timers = timers.TimerWheel(timer_resolution)
+        self._status_provider = status_provider
+        self._broadcast_bus = broadcast_bus
+        self._connections: set[connection.Connection] = set()
+        self._flushing: set[connection.Connection] = set()
+        self._task_group: anyio.abc.TaskGroup | None = None
         self._is_running = False
 
     @property
     def is_running(self) -> bool:
         return self._is_running
 
-    async def _process_packet(self, conn: connection.Connection) -> None:
+    @property
+    def timers(self) -> timers.TimerWheel:
+        """Timer wheel of receive timeouts, handlers can use it for keep-alives
+        and other timeouts, it runs together with the server."""
+        return self._timers
+
+    @property
+    def connections(self) -> AbstractSet[connection.Connection]:
+        """Currently open connections."""
+        return self._connections
+
+    async def _flush(self, conn: connection.Connection) -> None:
+        """Sends broadcast packets queued on a connection of a server without
+        autoflush."""
+        # pylint: disable=W0703
         try:
-            with anyio.fail_after(self._packet_receive_timeout):
-                packet = await conn.receive()
-        except TimeoutError:
-            await self._packet_receive_timeout_handler(conn)
-            return
-        await self._process_packet_handler(conn, packet)
+            while conn.queued_packets:
+                await conn.flush()
+        except Exception:
+            # the connection is being closed, its handler gets the error
+            pass
+        finally:
+            self._flushing.discard(conn)
+
+    async def broadcast(
+        self,
+        packet: connection.PacketData,
+        connections: Recipients | None = None,
+        *,
+        essential: bool = False,
+    ) -> None:
+        """Queues the packet (with its ID) on many connections at once.
+
+        The packet is framed (and compressed) once per compression settings,
+            the frames are shared by all recipients. The packet is sent by
+            `Connection.autoflush` or, if the server doesn't use it, by a task
+            of the server, so slow connections don't delay the caller and other
+            recipients. Backpressured connections get the packet queued if their
+            overflow policy allows it (see `Connection.write_raw`), otherwise
+            they are skipped. Errors of separate connections are ignored.
+
+        Args:
+            connections: Recipients or a predicate selecting them from the
+                connections of the server. Defaults to all connections.
+            essential: See `Connection.write`.
+        """
+        if connections is None:
+            recipients: Iterable[connection.Connection] = tuple(self._connections)
+        elif callable(connections):
+            recipients = [conn for conn in self._connections if connections(conn)]
+        else:
+            recipients = connections
+        frames: dict[tuple[int, int], bytes] = {}
+        task_group = None if self._autoflush else self._task_group
+        for conn in recipients:
+            threshold = conn.compression_threshold
+            key = (threshold, conn.compression_level if threshold >= 0 else 0)
+            if (data := frames.get(key)) is None:
+                data = frames[key] = connection.encode_frames(
+                    packet, compression_threshold=key[0], compression_level=key[1]
+                )
+            try:
+                conn.write_raw(data, essential=essential)
+            except (
+                connection.ConnectionBackpressuredError,
+                connection.ConnectionOverflowError,
+            ):
+                continue
+            if task_group is not None and conn not in self._flushing:
+                self._flushing.add(conn)
+                task_group.start_soon(self._flush, conn)
+
+    @staticmethod
+    def _is_playing(conn: connection.Connection) -> bool:
+        return conn.state is connection.ConnectionState.PLAY
+
+    async def _broadcast_to_players(self, packet: bytes) -> None:
+        await self.broadcast(packet, self._is_playing)
+
+    async def publish(self, packet: connection.PacketData) -> None:
+        """Sends the packet (with its ID) to the connections in the play state of
+        this server and of all other workers sharing the broadcast bus.
+
+        Connections that are still logging in or being configured would be
+            disconnected by a play packet, so they are skipped.
+        """
+        data = packet.getvalue() if isinstance(packet, io.BytesIO) else bytes(packet)
+        if self._broadcast_bus is not None:
+            await self._broadcast_bus.publish(data)
+        await self._broadcast_to_players(data)
 
     async def _process_packets(self, conn: connection.Connection) -> None:
+        # the receive timeout is a timer refreshed after every packet, a new
+        # cancel scope is needed only after a timeout
+        timeout = self._packet_receive_timeout
         while True:
-            await self._process_packet(conn)
+            packet = None
+            with anyio.CancelScope() as scope:
+                timer = self._timers.call_later(timeout, scope.cancel)
+                try:
+                    while True:
+                        packet = await conn.receive()
+                        timer.cancel()
+                        if scope.cancel_called:
+                            # the timer fired while a shielded receive was
+                            # finishing, the packet is processed outside of
+                            # the cancelled scope
+                            break
+                        await self._process_packet_handler(conn, packet)
+                        packet = None
+                        timer.reset(timeout)
+                finally:
+                    timer.cancel()
+            if packet is not None:
+                await self._process_packet_handler(conn, packet)
+            if scope.cancelled_caught:
+                await self._packet_receive_timeout_handler(conn)
+
+    async def _process_packets_with_autoflush(
+        self, conn: connection.Connection
+    ) -> None:
+        # pylint: disable=W0703
+        error: Exception | None = None
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(conn.autoflush)
+            try:
+                await self._process_packets(conn)
+            except Exception as exc:
+                error = exc
+            task_group.cancel_scope.cancel()
+        if error is not None:
+            raise error
+
+    async def _process_status(self, conn: connection.Connection) -> io.BytesIO | None:
+        """Returns the handshake packet if the connection isn't a status one."""
+        # pylint: disable=W0703
+        assert self._status_provider is not None
+        with anyio.CancelScope() as scope:
+            timer = self._timers.call_later(self._packet_receive_timeout, scope.cancel)
+            try:
+                return await self._status_provider.process(conn)
+            except Exception:
+                # broken pings aren't reported to the handlers
+                return None
+            finally:
+                timer.cancel()
+        # timed out pings too
+        return None
 
     async def _accept_connection(self, stream: anyio.abc.SocketStream) -> None:
         # pylint: disable=W0703
         reason = None
-        try:
-            async with stream:
-                conn = connection.Connection(stream)
+        async with stream:
+            conn = self._connection_factory(stream)
+            if self._connection_data is not None:
+                conn.data = self._connection_data()
+            handshake = None
+            if self._status_provider is not None:
+                handshake = await self._process_status(conn)
+                if handshake is None:
+                    return
+            try:
+                self._connections.add(conn)
                 await self._new_connection_handler(conn)
-                await self._process_packets(conn)
-        except Exception as exc:
-            reason = exc
-        finally:
-            await self._close_connection_handler(conn, reason)
+                if handshake is not None:
+                    await self._process_packet_handler(conn, handshake)
+                if self._autoflush:
+                    await self._process_packets_with_autoflush(conn)
+                else:
+                    await self._process_packets(conn)
+            except Exception as exc:
+                reason = exc
+            finally:
+                self._connections.discard(conn)
+                await self._close_connection_handler(conn, reason)
 
     async def run(
         self,
         host: str,
         port: int,
         *,
+        reuse_port: bool = False,
         task_status: anyio.abc.TaskStatus = anyio.TASK_STATUS_IGNORED,
     ) -> None:
-        listener = await anyio.create_tcp_listener(local_host=host, local_port=port)
+        """Accepts connections until cancelled.
+
+        Args:
+            reuse_port: Set `SO_REUSEPORT`, so several processes can listen on the
+                same port and the kernel distributes connections between them,
+                see `Supervisor`.
+        """
+        listener = await anyio.create_tcp_listener(
+            local_host=host, local_port=port, reuse_port=reuse_port
+        )
         self._is_running = True
         try:
-            task_status.started()
-            await listener.serve(self._accept_connection)
+            async with anyio.create_task_group() as task_group:
+                self._task_group = task_group
+                task_group.start_soon(self._timers.run)
+                if self._broadcast_bus is not None:
+                    await task_group.start(
+                        self._broadcast_bus.serve, self._broadcast_to_players
+                    )
+                task_status.started()
+                await listener.serve(self._accept_connection)
         finally:
+            self._task_group = None
             await listener.aclose()
@@ -0,0 +1,221 @@
+"""Server List Ping responses.
+
+The status response is encoded once and cached until the status is changed, so
+    bursts of pings cost only the copying of the cached bytes. Ping requests are
+    echoed back as they were received. Legacy pings (clients older than 1.7) get
+    a precomputed response too.
+
+Examples:
+    >>> status = StatusProvider("1.20.5-1.20.6", 766, "A Minecraft Server")
+    >>> server = Server(..., status_provider=status)
+    >>> status.online_players += 1  # the next ping gets a new response
+"""
+
+import base64
+import io
+import json
+from typing import Any
+
+from cubes.net import connection, serializers
+
+_HANDSHAKE_ID = 0x00
+_STATUS_REQUEST_ID = 0x00
+_PING_REQUEST_ID = 0x01
+_STATUS_RESPONSE_ID = 0x00
+_STATUS_INTENTION = 1
+_LEGACY_PING = 0xFE
+# legacy clients show the version as incompatible unless the protocol matches,
+# vanilla servers send this one
+_LEGACY_PROTOCOL = 127
+
+
+def _plain_text(component: str | dict | list) -> str:
+    """Returns text of a chat component without formatting."""
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(_plain_text(item) for item in component)
+    return str(component.get("text", "")) + "".join(
+        _plain_text(item) for item in component.get("extra", ())
+    )
+
+
+def _handshake_intention(frame: connection.Frame) -> int:
+    offset = frame.offset
+    _, offset = serializers.VarIntSerializer.read(frame.data, offset)  # protocol
+    _, offset = serializers.StringSerializer.read(frame.data, offset)  # host
+    intention, _ = serializers.VarIntSerializer.read(frame.data, offset + 2)
+    return intention
+
+
+class StatusProvider:
+    """Status of the server for the server list, with cached responses.
+
+    Changing the description, player counts or the favicon invalidates the
+        cached responses, they are built again on the next ping.
+    """
+
+    # pylint: disable=R0902
+    __slots__ = (
+        "_version",
+        "_protocol",
+        "_description",
+        "_max_players",
+        "_online_players",
+        "_favicon",
+        "_enforces_secure_chat",
+        "_response",
+        "_legacy_response",
+    )
+
+    def __init__(
+        self,
+        version: str,
+        protocol: int,
+        description: str | dict,
+        *,
+        max_players: int = 20,
+        online_players: int = 0,
+        favicon: bytes | str | None = None,
+        enforces_secure_chat: bool = False,
+    ):
+        """
+        Args:
+            description: MOTD, a text or a chat component.
+            favicon: 64x64 PNG image or its data URI.
+        """
+        # pylint: disable=R0913
+        self._version = version
+        self._protocol = protocol
+        self._description = description
+        self._max_players = max_players
+        self._online_players = online_players
+        self._favicon = self._favicon_uri(favicon)
+        self._enforces_secure_chat = enforces_secure_chat
+        self._response: bytes | None = None
+        self._legacy_response: bytes | None = None
+
+    @staticmethod
+    def _favicon_uri(favicon: bytes | str | None) -> str | None:
+        if isinstance(favicon, bytes):
+            return "data:image/png;base64," + base64.b64encode(favicon).decode()
+        return favicon
+
+    def invalidate(self) -> None:
+        """Drops the cached responses."""
+        self._response = self._legacy_response = None
+
+    @property
+    def description(self) -> str | dict:
+        return self._description
+
+    @description.setter
+    def description(self, value: str | dict) -> None:
+        if value != self._description:
+            self._description = value
+            self.invalidate()
+
+    @property
+    def max_players(self) -> int:
+        return self._max_players
+
+    @max_players.setter
+    def max_players(self, value: int) -> None:
+        if value != self._max_players:
+            self._max_players = value
+            self.invalidate()
+
+    @property
+    def online_players(self) -> int:
+        return self._online_players
+
+    @online_players.setter
+    def online_players(self, value: int) -> None:
+        if value != self._online_players:
+            self._online_players = value
+            self.invalidate()
+
+    @property
+    def favicon(self) -> str | None:
+        """Data URI of the favicon."""
+        return self._favicon
+
+    @favicon.setter
+    def favicon(self, value: bytes | str | None) -> None:
+        self._favicon = self._favicon_uri(value)
+        self.invalidate()
+
+    def status(self) -> dict[str, Any]:
+        """Returns the status response object."""
+        result: dict[str, Any] = {
+            "version": {"name": self._version, "protocol": self._protocol},
+            "players": {"max": self._max_players, "online": self._online_players},
+            "description": (
+                {"text": self._description}
+                if isinstance(self._description, str)
+                else self._description
+            ),
+            "enforcesSecureChat": self._enforces_secure_chat,
+        }
+        if self._favicon is not None:
+            result["favicon"] = self._favicon
+        return result
+
+    @property
+    def response(self) -> bytes:
+        """Framed Status Response packet."""
+        if self._response is None:
+            packet = bytearray(serializers.VarIntSerializer.encode(_STATUS_RESPONSE_ID))
+            serializers.StringSerializer.write(
+                packet, json.dumps(self.status(), separators=(",", ":")), validate=True
+            )
+            self._response = connection.encode_frames(packet)
+        return self._response
+
+    @property
+    def legacy_response(self) -> bytes:
+        """Kick packet answering pings of clients older than 1.7."""
+        if self._legacy_response is None:
+            fields = (
+                "\xa71",
+                str(_LEGACY_PROTOCOL),
+                self._version,
+                _plain_text(self._description),
+                str(self._online_players),
+                str(self._max_players),
+            )
+            text = "\0".join(fields).encode("utf-16-be")
+            self._legacy_response = (
+                b"\xff"
+                + serializers.UnsignedShortSerializer.encode(len(text) // 2)
+                + text
+            )
+        return self._legacy_response
+
+    async def process(self, conn: connection.Connection) -> io.BytesIO | None:
+        """Answers the pings if the connection is a status one and closes it.
+
+        Must be called before anything is received from the connection. Returns
+            the handshake packet of other connections.
+        """
+        if (await conn.peek())[0] == _LEGACY_PING:
+            await conn.send_raw(self.legacy_response)
+            await conn.close()
+            return None
+        frame = await conn.receive_frame()
+        if (
+            frame.packet_id != _HANDSHAKE_ID
+            or _handshake_intention(frame) != _STATUS_INTENTION
+        ):
+            return io.BytesIO(
+                serializers.VarIntSerializer.encode(frame.packet_id)
+                + frame.data[frame.offset :]
+            )
+        conn.state = connection.ConnectionState.STATUS
+        while (frame := await conn.receive_frame()).packet_id == _STATUS_REQUEST_ID:
+            await conn.send_raw(self.response)
+        if frame.packet_id == _PING_REQUEST_ID:
+            # Pong Response is the same packet with the same payload
+            await conn.send(frame.data)
+        await conn.close()
+        return None
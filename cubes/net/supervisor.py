@@ -0,0 +1,162 @@
+"""Running a server in several worker processes.
+
+Every worker runs its own event loop and its own `Server` listening on the same
+    port with `SO_REUSEPORT`, the kernel distributes new connections between
+    them. Handlers run unchanged in every worker, they just don't share memory.
+    The parent process only supervises the workers and restarts crashed ones.
+
+`SO_REUSEPORT` isn't available on Windows.
+
+Examples:
+    >>> async def worker(index: int) -> None:
+    ...     server = Server(...)
+    ...     await server.run("0.0.0.0", 25565, reuse_port=True)
+    >>> if __name__ == "__main__":
+    ...     Supervisor(worker, 4).run()
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Coroutine
+
+import anyio
+
+WorkerTarget = Callable[[int], Coroutine[Any, Any, None]]
+
+
+def _run_worker(target: WorkerTarget, index: int, backend: str) -> None:
+    anyio.run(target, index, backend=backend)
+
+
+class Supervisor:
+    """Starts worker processes and restarts them when they crash.
+
+    A worker which exits with zero code isn't restarted, `run` returns when all
+        workers have exited.
+    """
+
+    # pylint: disable=R0902
+    __slots__ = (
+        "_target",
+        "_workers",
+        "_backend",
+        "_restart_delay",
+        "_context",
+        "_processes",
+        "_restarts",
+        "_is_running",
+    )
+
+    def __init__(
+        self,
+        target: WorkerTarget,
+        workers: int | None = None,
+        *,
+        backend: str = "asyncio",
+        restart_delay: float = 1,
+        start_method: str | None = None,
+    ):
+        """
+        Args:
+            target: Coroutine function run in every worker with the worker index,
+                it must be picklable unless the "fork" start method is used.
+            workers: Number of worker processes, defaults to the number of CPUs.
+            backend: AnyIO backend of the workers.
+            restart_delay: Seconds to wait before restarting a crashed worker.
+            start_method: `multiprocessing` start method.
+        """
+        # pylint: disable=R0913
+        self._target = target
+        self._workers = (os.cpu_count() or 1) if workers is None else workers
+        if self._workers < 1:
+            raise ValueError("There must be at least one worker.")
+        self._backend = backend
+        self._restart_delay = restart_delay
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: dict[int, multiprocessing.process.BaseProcess] = {}
+        self._restarts = 0
+        self._is_running = False
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def restarts(self) -> int:
+        """Number of times crashed workers were restarted."""
+        return self._restarts
+
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
+
+    @property
+    def pids(self) -> dict[int, int | None]:
+        """PIDs of the running workers by their indices."""
+        return {index: process.pid for index, process in list(self._processes.items())}
+
+    def _start(self, index: int) -> None:
+        process = self._context.Process(  # type: ignore[attr-defined]
+            target=_run_worker,
+            args=(self._target, index, self._backend),
+            name=f"cubes-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _reap(self, restarts: dict[int, float]) -> None:
+        """Removes exited workers, schedules restarts of the crashed ones."""
+        for index, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[index]
+            if process.exitcode != 0 and self._is_running:
+                restarts[index] = time.monotonic() + self._restart_delay
+
+    def run(self) -> None:
+        """Runs the workers until they exit or `stop` is called (blocks).
+
+        SIGTERM stops the workers when called from the main thread.
+        """
+        self._is_running = True
+        restarts: dict[int, float] = {}
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            for index in range(self._workers):
+                self._start(index)
+            while self._is_running and (self._processes or restarts):
+                timeout = None
+                if restarts:
+                    timeout = max(min(restarts.values()) - time.monotonic(), 0)
+                multiprocessing.connection.wait(
+                    [process.sentinel for process in self._processes.values()],
+                    timeout,
+                )
+                self._reap(restarts)
+                now = time.monotonic()
+                for index, restart_time in list(restarts.items()):
+                    if restart_time <= now and self._is_running:
+                        del restarts[index]
+                        self._restarts += 1
+                        self._start(index)
+        finally:
+            self._is_running = False
+            for process in self._processes.values():
+                process.terminate()
+            for process in self._processes.values():
+                process.join()
+            self._processes.clear()
+
+    def stop(self) -> None:
+        """Terminates the workers, `run` returns after they exit."""
+        self._is_running = False
+        for process in list(self._processes.values()):
+            process.terminate()
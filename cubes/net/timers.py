@@ -0,0 +1,123 @@
+"""Hashed timer wheel for timeouts of many connections.
+
+Timers are kept in buckets of a ring, a single task advances the ring by one
+    bucket every `resolution` seconds and fires the expired timers. Resetting a
+    timer to a later time only stores its new deadline, the timer is moved to
+    another bucket when its old bucket is reached. So refreshing a timeout on
+    every packet costs a couple of attribute writes instead of a cancel scope
+    with a deadline.
+
+Examples:
+    >>> wheel = TimerWheel()
+    >>> task_group.start_soon(wheel.run)
+    >>> timer = wheel.call_later(15, send_keep_alive)
+    >>> timer.reset(15)  # postpones the call
+"""
+
+# pylint: disable=W0212
+import math
+from typing import Callable
+
+import anyio
+
+
+class Timer:
+    """Callback scheduled by `TimerWheel.call_later`."""
+
+    __slots__ = ("_wheel", "_callback", "_deadline", "_slot")
+
+    def __init__(self, wheel: "TimerWheel", callback: Callable[[], object]):
+        self._wheel = wheel
+        self._callback = callback
+        # ticks of the expiration and of the bucket the timer is in
+        self._deadline: int | None = None
+        self._slot: int | None = None
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the timer is scheduled and didn't fire yet."""
+        return self._deadline is not None
+
+    def reset(self, delay: float) -> None:
+        """Schedules the timer to fire after `delay` seconds (from now)."""
+        wheel = self._wheel
+        # the current tick may have started up to one resolution ago
+        deadline = wheel._tick + math.ceil(delay / wheel._resolution) + 1
+        self._deadline = deadline
+        if self._slot is None or deadline < self._slot:
+            wheel._insert(self, deadline)
+
+    def cancel(self) -> None:
+        """Unschedules the timer, it can be scheduled again with `reset`."""
+        self._deadline = None
+
+
+class TimerWheel:
+    """Timers sharing one task, they fire up to two resolutions late.
+
+    Callbacks are called from the task running `run`, they must not block or
+        raise.
+    """
+
+    __slots__ = ("_resolution", "_buckets", "_tick")
+
+    def __init__(self, resolution: float = 0.1, size: int = 512):
+        """
+        Args:
+            resolution: Duration of one tick in seconds.
+            size: Number of buckets. Timers further than `size` ticks away are
+                checked once per turn of the wheel.
+        """
+        if resolution <= 0:
+            raise ValueError("Resolution must be positive.")
+        if size < 1:
+            raise ValueError("There must be at least one bucket.")
+        self._resolution = resolution
+        self._buckets: list[list[tuple[int, Timer]]] = [[] for _ in range(size)]
+        self._tick = 0
+
+    @property
+    def resolution(self) -> float:
+        return self._resolution
+
+    def call_later(self, delay: float, callback: Callable[[], object]) -> Timer:
+        """Schedules the callback to be called after `delay` seconds."""
+        timer = Timer(self, callback)
+        timer.reset(delay)
+        return timer
+
+    def _insert(self, timer: Timer, slot: int) -> None:
+        # a timer moved to an earlier bucket leaves a stale entry in the old one
+        timer._slot = slot
+        self._buckets[slot % len(self._buckets)].append((slot, timer))
+
+    def _advance(self) -> None:
+        """Moves to the next tick and fires the timers expired by it."""
+        self._tick += 1
+        tick = self._tick
+        index = tick % len(self._buckets)
+        bucket = self._buckets[index]
+        self._buckets[index] = []
+        for slot, timer in bucket:
+            if slot > tick:
+                # the timer is in one of the next turns of the wheel
+                self._buckets[index].append((slot, timer))
+            elif timer._slot != slot:
+                continue  # stale entry
+            elif timer._deadline is None:
+                timer._slot = None
+            elif timer._deadline <= tick:
+                timer._slot = timer._deadline = None
+                timer._callback()
+            else:
+                self._insert(timer, timer._deadline)
+
+    async def run(self) -> None:
+        """Fires the timers until cancelled, should be run as a separate task."""
+        start = anyio.current_time() - self._tick * self._resolution
+        while True:
+            await anyio.sleep(self._resolution)
+            # catch up if the event loop was blocked for a few ticks
+            target = int((anyio.current_time() - start) / self._resolution)
+            while self._tick < target:
+                self._advance()
@@ -0,0 +1,3 @@
+from cubes.world.chunk import ChunkColumn, ChunkSection
+from cubes.world.light import LightStorage
+from cubes.world.palette import Biomes, BlockStates, PalettedContainer
@@ -0,0 +1,233 @@
+"""Chunk sections and columns.
+
+A chunk column keeps the encoded body of Chunk Data and Update Light packet, so
+    sending an unchanged chunk to many players encodes it only once. Changes
+    made with `ChunkColumn.set_block` and `ChunkColumn.set_biome` invalidate
+    only the changed section, other sections aren't encoded again.
+
+Examples:
+    >>> column = ChunkColumn(0, 0)
+    >>> column.set_block(0, -64, 0, 1)
+    >>> await conn.send(column.to_packet(0x27))
+"""
+
+from typing import Any, Mapping
+
+from cubes import nbt
+from cubes.net import serializers
+from cubes.world import light, palette
+
+_AIR = 0
+
+
+class ChunkSection:
+    """16x16x16 blocks of a chunk column."""
+
+    __slots__ = ("blocks", "biomes")
+
+    def __init__(
+        self,
+        blocks: palette.BlockStates | None = None,
+        biomes: palette.Biomes | None = None,
+    ):
+        self.blocks = palette.BlockStates() if blocks is None else blocks
+        self.biomes = palette.Biomes() if biomes is None else biomes
+
+    @property
+    def block_count(self) -> int:
+        """Number of non-air blocks."""
+        return self.blocks.SIZE - self.blocks.count(_AIR)
+
+    def serialize(self) -> bytes:
+        return b"".join(
+            (
+                serializers.ShortSerializer.encode(self.block_count),
+                self.blocks.serialize(),
+                self.biomes.serialize(),
+            )
+        )
+
+
+class ChunkColumn:
+    """Chunk column (16 blocks wide, the whole world high).
+
+    Sections and light can be changed directly, then `mark_dirty` or
+        `mark_light_dirty` must be called. By default the sky light is full and
+        there is no block light.
+    """
+
+    # pylint: disable=R0902
+
+    __slots__ = (
+        "_x",
+        "_z",
+        "_min_y",
+        "_sections",
+        "_heightmaps",
+        "_sky_light",
+        "_block_light",
+        "_encoded_sections",
+        "_encoded_light",
+        "_encoded",
+        "_packets",
+    )
+
+    def __init__(self, x: int, z: int, *, min_y: int = -64, height: int = 384):
+        if min_y % 16 or height % 16 or height <= 0:
+            raise ValueError("World height and bottom must be multiples of 16.")
+        self._x = x
+        self._z = z
+        self._min_y = min_y
+        self._sections = tuple(ChunkSection() for _ in range(height // 16))
+        self._heightmaps: dict[str, Any] = {}
+        # light sections include one section below and one above the world
+        self._sky_light = light.LightStorage(len(self._sections) + 2, light.MAX_LEVEL)
+        self._block_light = light.LightStorage(len(self._sections) + 2)
+        self._encoded_sections: list[bytes | None] = [None] * len(self._sections)
+        self._encoded_light: bytes | None = None
+        self._encoded: bytes | None = None
+        self._packets: dict[int, bytes] = {}
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def z(self) -> int:
+        return self._z
+
+    @property
+    def sections(self) -> tuple[ChunkSection, ...]:
+        return self._sections
+
+    @property
+    def heightmaps(self) -> dict[str, Any]:
+        """Heightmaps compound, values are Long arrays (nbtlib or `array.array`)."""
+        return self._heightmaps
+
+    @heightmaps.setter
+    def heightmaps(self, value: Mapping[str, Any]) -> None:
+        self._heightmaps = dict(value)
+        self._encoded = None
+        self._packets.clear()
+
+    @property
+    def sky_light(self) -> light.LightStorage:
+        return self._sky_light
+
+    @property
+    def block_light(self) -> light.LightStorage:
+        return self._block_light
+
+    def _section_index(self, y: int) -> int:
+        index = (y - self._min_y) >> 4
+        if not 0 <= index < len(self._sections):
+            raise IndexError("Block is outside of the world height.")
+        return index
+
+    def mark_dirty(self, index: int | None = None) -> None:
+        """Drops cached encoding of the section or of all sections."""
+        if index is None:
+            self._encoded_sections = [None] * len(self._sections)
+        else:
+            self._encoded_sections[index] = None
+        self._encoded = None
+        self._packets.clear()
+
+    def mark_light_dirty(self) -> None:
+        """Drops cached encoding of the light."""
+        self._encoded_light = None
+        self._encoded = None
+        self._packets.clear()
+
+    def _light_index(self, y: int) -> int:
+        index = ((y - self._min_y) >> 4) + 1
+        if not 0 <= index < len(self._sky_light):
+            raise IndexError("Block is outside of the light sections.")
+        return index
+
+    def get_light(self, x: int, y: int, z: int) -> tuple[int, int]:
+        """Returns sky and block light levels by coordinates relative to the column."""
+        index, position = self._light_index(y), (x & 0xF, y & 0xF, z & 0xF)
+        return (
+            self._sky_light.get(index, *position),
+            self._block_light.get(index, *position),
+        )
+
+    def set_light(
+        self, x: int, y: int, z: int, sky: int | None = None, block: int | None = None
+    ) -> None:
+        """Sets sky and (or) block light levels by coordinates relative to the column."""
+        index, position = self._light_index(y), (x & 0xF, y & 0xF, z & 0xF)
+        if sky is not None:
+            self._sky_light.set(index, *position, sky)
+        if block is not None:
+            self._block_light.set(index, *position, block)
+        self.mark_light_dirty()
+
+    def get_block(self, x: int, y: int, z: int) -> int:
+        """Returns block state by coordinates relative to the column."""
+        section = self._sections[self._section_index(y)]
+        return section.blocks.get(x & 0xF, y & 0xF, z & 0xF)
+
+    def set_block(self, x: int, y: int, z: int, state: int) -> None:
+        """Sets block state by coordinates relative to the column."""
+        index = self._section_index(y)
+        blocks = self._sections[index].blocks
+        position = (x & 0xF, y & 0xF, z & 0xF)
+        if blocks.get(*position) != state:
+            blocks.set(*position, state)
+            self.mark_dirty(index)
+
+    def get_biome(self, x: int, y: int, z: int) -> int:
+        """Returns biome by block coordinates relative to the column."""
+        section = self._sections[self._section_index(y)]
+        return section.biomes.get(x >> 2 & 3, y >> 2 & 3, z >> 2 & 3)
+
+    def set_biome(self, x: int, y: int, z: int, biome: int) -> None:
+        """Sets biome of the 4x4x4 cell containing the block."""
+        index = self._section_index(y)
+        biomes = self._sections[index].biomes
+        position = (x >> 2 & 3, y >> 2 & 3, z >> 2 & 3)
+        if biomes.get(*position) != biome:
+            biomes.set(*position, biome)
+            self.mark_dirty(index)
+
+    def serialize(self) -> bytes:
+        """Returns body of Chunk Data and Update Light packet (without packet ID).
+
+        Only the sections changed since the previous call are encoded again, the
+            light is encoded again only if it was changed.
+        """
+        if self._encoded is None:
+            encoded_sections = self._encoded_sections
+            for index, section in enumerate(self._sections):
+                if encoded_sections[index] is None:
+                    encoded_sections[index] = section.serialize()
+            data = b"".join(encoded_sections)  # type: ignore[arg-type]
+            self._encoded = b"".join(
+                (
+                    serializers.IntSerializer.encode(self._x),
+                    serializers.IntSerializer.encode(self._z),
+                    nbt.dumps(self._heightmaps, network=True),
+                    serializers.VarIntSerializer.encode(len(data)),
+                    data,
+                    serializers.VarIntSerializer.encode(0),  # block entities
+                    self.serialize_light(),
+                )
+            )
+        return self._encoded
+
+    def serialize_light(self) -> bytes:
+        """Returns light data of Chunk Data and Update Light packets."""
+        if self._encoded_light is None:
+            self._encoded_light = light.encode_light(self._sky_light, self._block_light)
+        return self._encoded_light
+
+    def to_packet(self, packet_id: int) -> bytes:
+        """Returns packet data with the packet ID, cached until the next change."""
+        if (packet := self._packets.get(packet_id)) is None:
+            packet = self._packets[packet_id] = (
+                serializers.VarIntSerializer.encode(packet_id) + self.serialize()
+            )
+        return packet
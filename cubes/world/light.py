@@ -0,0 +1,102 @@
+"""Sky and block light of chunk columns.
+
+Every section has a 2048 bytes nibble array. Sections without light and fully
+    lit sections share one immutable array, an array is copied only when a single
+    value in it is changed. Sections without light are sent as bits of the empty
+    mask, without the array at all.
+"""
+
+from cubes.net import serializers
+
+ARRAY_SIZE = 2048
+MAX_LEVEL = 15
+
+_LEVEL_ARRAYS = tuple(bytes((level * 0x11,)) * ARRAY_SIZE for level in range(16))
+_EMPTY = _LEVEL_ARRAYS[0]
+_ARRAY_PREFIX = serializers.VarIntSerializer.encode(ARRAY_SIZE)
+
+
+class LightStorage:
+    """Light levels of every section of a chunk column.
+
+    The number of sections includes one section below and one above the world.
+        A section can have no light data, then it's sent in none of the masks
+        (the client keeps what it has).
+    """
+
+    __slots__ = ("_arrays",)
+
+    def __init__(self, sections: int, level: int | None = 0):
+        self._arrays: list[bytes | bytearray | None] = [
+            None if level is None else _LEVEL_ARRAYS[level]
+        ] * sections
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def section(self, index: int) -> bytes | bytearray | None:
+        """Returns the nibble array of the section."""
+        return self._arrays[index]
+
+    def fill(self, index: int, level: int | None) -> None:
+        """Sets the light level of the whole section, `None` drops its data."""
+        if level is not None and not 0 <= level <= MAX_LEVEL:
+            raise ValueError("Light level must be between 0 and 15.")
+        self._arrays[index] = None if level is None else _LEVEL_ARRAYS[level]
+
+    def set_section(self, index: int, data: bytes | bytearray) -> None:
+        if len(data) != ARRAY_SIZE:
+            raise ValueError("Light array must be 2048 bytes long.")
+        self._arrays[index] = data
+
+    def get(self, index: int, x: int, y: int, z: int) -> int:
+        """Returns the light level by coordinates relative to the section."""
+        data = self._arrays[index]
+        if data is None:
+            return 0
+        position = y << 8 | z << 4 | x
+        return data[position >> 1] >> (position & 1) * 4 & 0xF
+
+    def set(self, index: int, x: int, y: int, z: int, level: int) -> None:
+        """Sets the light level by coordinates relative to the section."""
+        if not 0 <= level <= MAX_LEVEL:
+            raise ValueError("Light level must be between 0 and 15.")
+        data = self._arrays[index]
+        if not isinstance(data, bytearray):
+            data = self._arrays[index] = bytearray(_EMPTY if data is None else data)
+        position = y << 8 | z << 4 | x
+        shift = (position & 1) * 4
+        byte = position >> 1
+        data[byte] = data[byte] & ~(0xF << shift) | level << shift
+
+    def encode(self) -> tuple[int, int, list[bytes | bytearray]]:
+        """Returns the light mask, the empty light mask and the arrays to send."""
+        mask = empty_mask = 0
+        arrays = []
+        for index, data in enumerate(self._arrays):
+            if data is None:
+                continue
+            if data is _EMPTY:
+                empty_mask |= 1 << index
+            else:
+                mask |= 1 << index
+                arrays.append(data)
+        return mask, empty_mask, arrays
+
+
+def encode_light(sky_light: LightStorage, block_light: LightStorage) -> bytes:
+    """Encodes light data of Chunk Data and Update Light packets."""
+    bitset, varint = serializers.BitSetSerializer, serializers.VarIntSerializer
+    sky_mask, empty_sky_mask, sky_arrays = sky_light.encode()
+    block_mask, empty_block_mask, block_arrays = block_light.encode()
+    parts: list[bytes | bytearray] = [
+        bitset.encode(sky_mask),
+        bitset.encode(block_mask),
+        bitset.encode(empty_sky_mask),
+        bitset.encode(empty_block_mask),
+    ]
+    for arrays in (sky_arrays, block_arrays):
+        parts.append(varint.encode(len(arrays)))
+        for data in arrays:
+            parts += (_ARRAY_PREFIX, data)
+    return b"".join(parts)
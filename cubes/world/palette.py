@@ -0,0 +1,257 @@
+"""Paletted containers of chunk sections.
+
+Entries are stored in the network layout: palette indices (or values with the
+    direct palette) bit-packed into Longs, entries don't span Longs. A container
+    is sent without repacking, its encoded form is cached until it's changed.
+
+Examples:
+    >>> blocks = BlockStates(0)  # all air
+    >>> blocks.set(0, 0, 0, 1)
+    >>> blocks.get(0, 0, 0)
+    1
+    >>> blocks.serialize()
+"""
+
+import array
+from typing import ClassVar, Iterable, Iterator, TypeVar
+
+from cubes.net import serializers
+
+_T = TypeVar("_T", bound="PalettedContainer")
+
+
+def _pack(values: Iterable[int], bits: int, size: int) -> array.array:
+    per_long = 64 // bits
+    longs = array.array("Q", bytes(8 * -(-size // per_long)))
+    for index, value in enumerate(values):
+        long_index, slot = divmod(index, per_long)
+        longs[long_index] |= value << slot * bits
+    return longs
+
+
+class PalettedContainer:
+    """Fixed size container of IDs compressed with a palette.
+
+    A container with a single value has no data at all. Up to `MAX_BITS` bits
+        per entry indices into the palette are stored, above that the IDs
+        themselves are stored using `direct_bits` bits (depends on the size of the
+        registry).
+    """
+
+    SIZE: ClassVar[int]
+    EDGE_BITS: ClassVar[int]
+    MIN_BITS: ClassVar[int]
+    MAX_BITS: ClassVar[int]
+    DIRECT_BITS: ClassVar[int]
+
+    __slots__ = ("_direct_bits", "_bits", "_palette", "_indices", "_data", "_encoded")
+
+    def __init__(self, value: int = 0, *, direct_bits: int | None = None):
+        self._direct_bits = self.DIRECT_BITS if direct_bits is None else direct_bits
+        if self._direct_bits <= self.MAX_BITS:
+            raise ValueError("Direct palette must use more bits than the indirect.")
+        self._bits = 0
+        self._palette: list[int] | None = []
+        self._indices: dict[int, int] = {}
+        self._data = array.array("Q")
+        self._encoded: bytes | None = None
+        self.fill(value)
+
+    @property
+    def bits_per_entry(self) -> int:
+        return self._bits
+
+    @property
+    def palette(self) -> tuple[int, ...] | None:
+        """Values of the palette or `None` if the direct palette is used."""
+        return None if self._palette is None else tuple(self._palette)
+
+    def __len__(self) -> int:
+        return self.SIZE
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._values())
+
+    def _values(self) -> list[int]:
+        bits, palette = self._bits, self._palette
+        if bits == 0:
+            return [palette[0]] * self.SIZE  # type: ignore[index]
+        mask, shifts = (1 << bits) - 1, range(0, 64 // bits * bits, bits)
+        values = [long >> shift & mask for long in self._data for shift in shifts]
+        del values[self.SIZE :]
+        return values if palette is None else [palette[value] for value in values]
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self.SIZE:
+            raise IndexError("Container index out of range.")
+        bits = self._bits
+        if bits == 0:
+            return self._palette[0]  # type: ignore[index]
+        long_index, slot = divmod(index, 64 // bits)
+        value = self._data[long_index] >> slot * bits & (1 << bits) - 1
+        return value if self._palette is None else self._palette[value]
+
+    def __setitem__(self, index: int, value: int) -> None:
+        if not 0 <= index < self.SIZE:
+            raise IndexError("Container index out of range.")
+        if self._palette is None:
+            if not 0 <= value < 1 << self._bits:
+                raise ValueError("Value doesn't fit the direct palette.")
+            stored = value
+        elif (stored := self._indices.get(value, -1)) < 0:
+            stored = self._add_to_palette(index, value)
+            if stored < 0:
+                return
+        bits = self._bits
+        if bits == 0:
+            return
+        long_index, slot = divmod(index, 64 // bits)
+        shift = slot * bits
+        long = self._data[long_index]
+        if long >> shift & (1 << bits) - 1 != stored:
+            self._data[long_index] = (
+                long & ~((1 << bits) - 1 << shift) | stored << shift
+            )
+            self._encoded = None
+
+    def _add_to_palette(self, index: int, value: int) -> int:
+        """Adds the value to the palette, resizing the container when needed.
+
+        Returns index of the value in the palette or -1 if the value was already
+            set while resizing.
+        """
+        palette = self._palette
+        assert palette is not None
+        bits = max(self.MIN_BITS, len(palette).bit_length())
+        if bits == self._bits:
+            palette.append(value)
+            self._indices[value] = len(palette) - 1
+            return len(palette) - 1
+        values = self._values()
+        values[index] = value
+        if bits > self.MAX_BITS:
+            self._palette = None
+            self._indices = {}
+            self._bits = self._direct_bits
+            if max(values) >= 1 << self._bits:
+                raise ValueError("Value doesn't fit the direct palette.")
+            self._data = _pack(values, self._bits, self.SIZE)
+        else:
+            palette.append(value)
+            self._indices[value] = len(palette) - 1
+            self._bits = bits
+            indices = self._indices
+            self._data = _pack((indices[item] for item in values), bits, self.SIZE)
+        self._encoded = None
+        return -1
+
+    def count(self, value: int) -> int:
+        """Returns number of entries equal to the value."""
+        if self._bits == 0:
+            return self.SIZE if self._palette[0] == value else 0  # type: ignore[index]
+        if self._palette is not None and value not in self._indices:
+            return 0
+        return self._values().count(value)
+
+    def _entry_index(self, x: int, y: int, z: int) -> int:
+        edge_bits = self.EDGE_BITS
+        return y << 2 * edge_bits | z << edge_bits | x
+
+    def get(self, x: int, y: int, z: int) -> int:
+        """Returns entry by coordinates relative to the section."""
+        return self[self._entry_index(x, y, z)]
+
+    def set(self, x: int, y: int, z: int, value: int) -> None:
+        """Sets entry by coordinates relative to the section."""
+        self[self._entry_index(x, y, z)] = value
+
+    def fill(self, value: int) -> None:
+        """Sets all entries to the value, the container becomes single valued."""
+        if value < 0:
+            raise ValueError("Value must not be negative.")
+        self._bits = 0
+        self._palette = [value]
+        self._indices = {value: 0}
+        self._data = array.array("Q")
+        self._encoded = None
+
+    def serialize(self) -> bytes:
+        """Returns the network representation, it's cached until the next change."""
+        if self._encoded is None:
+            varint = serializers.VarIntSerializer
+            if self._bits == 0:
+                palette = varint.encode(self._palette[0])  # type: ignore[index]
+            elif self._palette is None:
+                palette = b""
+            else:
+                palette = varint.encode(len(self._palette)) + varint.encode_array(
+                    self._palette
+                )
+            self._encoded = b"".join(
+                (
+                    serializers.UnsignedByteSerializer.encode(self._bits),
+                    palette,
+                    serializers.LongArraySerializer.encode(self._data),
+                )
+            )
+        return self._encoded
+
+    @classmethod
+    def read(
+        cls: type[_T],
+        data: bytes | bytearray | memoryview,
+        offset: int,
+        *,
+        direct_bits: int | None = None,
+    ) -> tuple[_T, int]:
+        """Decodes the container at `offset` of `data`.
+
+        Returns the container and offset of the data after it.
+        """
+        varint = serializers.VarIntSerializer
+        bits, offset = serializers.UnsignedByteSerializer.read(data, offset)
+        container = cls(direct_bits=direct_bits)
+        if bits == 0:
+            value, offset = varint.read(data, offset)
+            container.fill(value)
+        elif bits <= cls.MAX_BITS:
+            length, offset = varint.read(data, offset)
+            palette, offset = varint.read_array(data, offset, length)
+            bits = max(bits, cls.MIN_BITS)
+            container._palette = palette
+            container._indices = {value: index for index, value in enumerate(palette)}
+        else:
+            bits = container._direct_bits
+            container._palette = None
+            container._indices = {}
+        longs, offset = serializers.LongArraySerializer.read(data, offset)
+        if bits:
+            if len(longs) != -(-cls.SIZE // (64 // bits)):
+                raise ValueError("Invalid paletted container data length.")
+            container._data = array.array("Q", longs.tobytes())  # type: ignore
+        container._bits = bits
+        return container, offset
+
+
+class BlockStates(PalettedContainer):
+    """Block states of a chunk section (16x16x16)."""
+
+    __slots__ = ()
+
+    SIZE = 4096
+    EDGE_BITS = 4
+    MIN_BITS = 4
+    MAX_BITS = 8
+    DIRECT_BITS = 15
+
+
+class Biomes(PalettedContainer):
+    """Biomes of a chunk section (4x4x4)."""
+
+    __slots__ = ()
+
+    SIZE = 64
+    EDGE_BITS = 2
+    MIN_BITS = 1
+    MAX_BITS = 3
+    DIRECT_BITS = 6
@@ -1,4 +1,3 @@
-import enum
 import io
 import json
 import logging
@@ -8,104 +7,77 @@ import anyio
 import anyio.abc
 
 from cubes import net
-from cubes.net import serializers
+from cubes.net import packets
 
 _VERSION = "1.20.5-1.20.6"
 _PROTOCOL = 766
 _SERVER_DESCRIPTION = "Example server"
 
 
-class ConnectionState(enum.IntEnum):
-    HANDSHAKE = 0
-    STATUS = 1
-    LOGIN = 2
-    TRANSFER = 3
-    CONFIGURATION = 4
-    PLAY = 5
+_INTENTION_STATES = {
+    1: net.ConnectionState.STATUS,
+    2: net.ConnectionState.LOGIN,
+    3: net.ConnectionState.LOGIN,  # transfer
+}
 
 
-CONNECTION_STATES: dict[net.Connection, ConnectionState] = {}
+class Handshake(packets.Packet, packet_id=0x00):
+    protocol: packets.VarInt
+    host: packets.String
+    port: packets.UnsignedShort
+    intention: packets.VarInt
 
 
-async def process_handshake(conn: net.Connection, packet: io.BytesIO):
-    protocol = serializers.VarIntSerializer.from_buffer(packet)
-    serializers.StringSerializer.from_buffer(packet)  # host
-    serializers.UnsignedShortSerializer.from_buffer(packet)  # port
-    CONNECTION_STATES[conn] = intention = ConnectionState(
-        serializers.VarIntSerializer.from_buffer(packet)
-    )
-    if (
-        intention in (ConnectionState.LOGIN, ConnectionState.TRANSFER)
-        and protocol != _PROTOCOL
-    ):
-        disconnect_packet = io.BytesIO()
-        serializers.VarIntSerializer(0).to_buffer(disconnect_packet)
-        serializers.StringSerializer(
-            json.dumps(
-                {
-                    "translate": "disconnect.genericReason",
-                    "with": [{"text": f'Unsupported protocol version "{protocol}".'}],
-                }
-            )
-        ).to_buffer(disconnect_packet)
-        await conn.send(disconnect_packet)
-        await conn.close()
+class LoginDisconnect(packets.Packet, packet_id=0x00):
+    reason: packets.String
 
 
-async def process_legacy_ping(conn: net.Connection):
-    await conn.close()
+REGISTRY = net.PacketRegistry()
+REGISTRY.register(
+    Handshake, net.ConnectionState.HANDSHAKE, net.Direction.SERVERBOUND, [_PROTOCOL]
+)
+ROUTER = net.PacketRouter(REGISTRY, _PROTOCOL)
 
+# status requests and pings are answered by the server with cached responses
+STATUS = net.StatusProvider(_VERSION, _PROTOCOL, _SERVER_DESCRIPTION, max_players=0)
 
-async def process_status(conn: net.Connection):
-    response = io.BytesIO()
-    serializers.VarIntSerializer(0).to_buffer(response)
-    serializers.StringSerializer(
-        json.dumps(
-            {
-                "version": {"name": _VERSION, "protocol": _PROTOCOL},
-                "players": {"max": 0, "online": 0},
-                "description": {"text": _SERVER_DESCRIPTION},
-            }
-        )
-    ).to_buffer(response)
-    await conn.send(response)
-
-
-async def process_status_ping(conn: net.Connection, packet: io.BytesIO):
-    packet.seek(0)
-    await conn.send(packet)
-    await conn.close()
+
+class Session:
+    __slots__ = ("protocol",)
+
+    def __init__(self) -> None:
+        self.protocol: int | None = None
+
+
+@ROUTER.handler(Handshake)
+async def process_handshake(conn: net.Connection[Session], handshake: Handshake):
+    intention = _INTENTION_STATES.get(handshake.intention)
+    if intention is None:
+        await conn.close()
+        return
+    conn.state = intention
+    conn.data.protocol = handshake.protocol
+    if intention == net.ConnectionState.LOGIN and handshake.protocol != _PROTOCOL:
+        reason = {
+            "translate": "disconnect.genericReason",
+            "with": [{"text": f'Unsupported protocol version "{handshake.protocol}".'}],
+        }
+        await conn.send(LoginDisconnect(json.dumps(reason)).serialize())
+        await conn.close()
 
 
 async def process_packet(conn: net.Connection, packet: io.BytesIO):
-    state = CONNECTION_STATES[conn]
-    packet_id = serializers.VarIntSerializer.from_buffer(packet)
-    match (state, packet_id):
-        case (ConnectionState.HANDSHAKE, 0x00):
-            await process_handshake(conn, packet)
-        case (ConnectionState.HANDSHAKE, 0xFE):
-            await process_legacy_ping(conn)
-        case (ConnectionState.STATUS, 0x00):
-            await process_status(conn)
-        case (ConnectionState.STATUS, 0x01):
-            await process_status_ping(conn, packet)
-        case _:
-            pass
+    await ROUTER.route(conn, packet)
 
 
 async def process_new_connection(conn: net.Connection):
     logging.info('"%s:%i" connected to server.', *conn.remote_address)
-    CONNECTION_STATES[conn] = ConnectionState.HANDSHAKE
 
 
 async def process_packet_receive_timeout(conn: net.Connection):
-    if CONNECTION_STATES[conn] == ConnectionState.LOGIN:
-        packet = io.BytesIO()
-        serializers.VarIntSerializer(0x00).to_buffer(packet)
-        serializers.StringSerializer(
-            json.dumps({"translate": "disconnect.timeout"})
-        ).to_buffer(packet)
-        await conn.send(packet)
+    if conn.state == net.ConnectionState.LOGIN:
+        reason = json.dumps({"translate": "disconnect.timeout"})
+        await conn.send(LoginDisconnect(reason).serialize())
     await conn.close()
 
 
@@ -115,7 +87,6 @@ async def process_close_connection(conn: net.Connection, reason: Exception | Non
         *conn.remote_address,
         repr(reason),
     )
-    del CONNECTION_STATES[conn]
 
 
 async def sygnal_handler(scope: anyio.CancelScope):
@@ -131,6 +102,8 @@ async def main():
         process_packet,
         process_close_connection,
         packet_receive_timeout=5,
+        status_provider=STATUS,
+        connection_data=Session,
     )
     async with anyio.create_task_group() as task_group:
         task_group.start_soon(sygnal_handler, task_group.cancel_scope)
@@ -0,0 +1,19 @@
+from typing import AsyncGenerator, cast
+
+import anyio
+import anyio.abc
+import pytest
+
+
+@pytest.fixture
+async def streams() -> AsyncGenerator[tuple[anyio.abc.SocketStream, ...], None]:
+    """Client and server ends of a TCP connection."""
+    async with await anyio.create_tcp_listener(
+        local_host="127.0.0.1", local_port=0
+    ) as listener:
+        port = listener.extra(anyio.abc.SocketAttribute.local_port)
+        client = await anyio.connect_tcp("127.0.0.1", port)
+        socket_listener = cast(anyio.abc.SocketListener, listener.listeners[0])
+        server = await socket_listener.accept()
+        async with client, server:
+            yield client, server
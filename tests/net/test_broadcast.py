@@ -0,0 +1,146 @@
+import anyio
+import anyio.abc
+import pytest
+
+from cubes import net
+
+pytestmark = pytest.mark.anyio
+
+_HOST = "127.0.0.1"
+_PORTS = (25563, 25564)
+
+
+async def _noop(*_):
+    pass
+
+
+def test_invalid_index(tmp_path):
+    with pytest.raises(ValueError):
+        net.BroadcastBus(tmp_path, 2, 2)
+
+
+async def test_publish_not_served(tmp_path):
+    with pytest.raises(RuntimeError):
+        await net.BroadcastBus(tmp_path, 0, 2).publish(b"\x00")
+
+
+async def test_too_big_packet(tmp_path):
+    bus = net.BroadcastBus(tmp_path, 0, 2)
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(bus.serve, _noop)
+        with pytest.raises(ValueError):
+            await bus.publish(bytes(net.broadcast.MAX_PACKET_SIZE + 1))
+        task_group.cancel_scope.cancel()
+    assert not bus.is_serving
+    assert not list(tmp_path.iterdir())
+
+
+async def test_publish(tmp_path):
+    servers = [
+        net.Server(
+            _noop,
+            _noop,
+            _noop,
+            _noop,
+            broadcast_bus=net.BroadcastBus(tmp_path, index, len(_PORTS)),
+        )
+        for index in range(len(_PORTS))
+    ]
+    async with anyio.create_task_group() as task_group:
+        for server, port in zip(servers, _PORTS):
+            await task_group.start(server.run, _HOST, port)
+        streams = [await anyio.connect_tcp(_HOST, port) for port in _PORTS]
+        conns = [net.Connection(stream) for stream in streams]
+        await anyio.sleep(0.1)
+        for server in servers:
+            next(iter(server.connections)).state = net.ConnectionState.PLAY
+        # the second worker compresses everything
+        next(iter(servers[1].connections)).set_compression(0)
+        conns[1].set_compression(0)
+        # a connection that is still logging in doesn't get play packets
+        streams.append(await anyio.connect_tcp(_HOST, _PORTS[1]))
+        await anyio.sleep(0.1)
+        await servers[0].publish(b"\x01hello")
+        for conn in conns:
+            with anyio.fail_after(1):
+                assert (await conn.receive()).getvalue() == b"\x01hello"
+        with anyio.move_on_after(0.1) as scope:
+            await streams[-1].receive()
+        assert scope.cancelled_caught
+        for stream in streams:
+            await stream.aclose()
+        task_group.cancel_scope.cancel()
+
+
+async def test_broadcast():
+    server = net.Server(
+        _noop,
+        _noop,
+        _noop,
+        _noop,
+        high_watermark=64,
+        overflow_policy=net.OverflowPolicy.DROP,
+    )
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORTS[0])
+        streams = [await anyio.connect_tcp(_HOST, _PORTS[0]) for _ in range(3)]
+        clients = {
+            stream.extra(anyio.abc.SocketAttribute.local_address)[1]: net.Connection(
+                stream
+            )
+            for stream in streams
+        }
+        await anyio.sleep(0.1)
+        conns = sorted(server.connections, key=lambda conn: conn.remote_address[1])
+        conns[0].set_compression(0)
+        clients[conns[0].remote_address[1]].set_compression(0)
+        await server.broadcast(b"\x01all")
+        await server.broadcast(b"\x02two", lambda conn: conn is not conns[2])
+        for conn in conns:
+            client = clients[conn.remote_address[1]]
+            with anyio.fail_after(1):
+                assert (await client.receive()).getvalue() == b"\x01all"
+                if conn is not conns[2]:
+                    assert (await client.receive()).getvalue() == b"\x02two"
+
+        conns[1].write(bytes(100))
+        assert conns[1].is_backpressured
+        await server.broadcast(b"\x03", [conns[1]], essential=True)
+        await server.broadcast(b"\x04", [conns[1]])
+        assert conns[1].queued_packets == 2
+        assert conns[1].dropped_packets == 1
+
+        for stream in streams:
+            await stream.aclose()
+        task_group.cancel_scope.cancel()
+
+
+@pytest.mark.parametrize("autoflush", (False, True))
+async def test_broadcast_stalled_connection(autoflush: bool):
+    server = net.Server(_noop, _noop, _noop, _noop, autoflush=autoflush)
+    packet = b"\x01" + bytes(65536)
+    count = 64  # more than socket buffers of the stalled connection hold
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORTS[0])
+        streams = [await anyio.connect_tcp(_HOST, _PORTS[0]) for _ in range(3)]
+        await anyio.sleep(0.1)
+        received = [0, 0]
+
+        async def _receive(index: int) -> None:
+            conn = net.Connection(streams[index + 1])
+            for _ in range(count):
+                assert (await conn.receive()).getvalue() == packet
+                received[index] += 1
+
+        with anyio.fail_after(5):
+            async with anyio.create_task_group() as receivers:
+                # the first client never reads
+                receivers.start_soon(_receive, 0)
+                receivers.start_soon(_receive, 1)
+                for _ in range(count):
+                    await server.broadcast(packet)
+                    await anyio.sleep(0)
+        assert received == [count, count]
+        for stream in streams:
+            await stream.aclose()
+        task_group.cancel_scope.cancel()
@@ -0,0 +1,78 @@
+import zlib
+
+import anyio
+import anyio.abc
+import pytest
+
+from cubes import nbt, net
+from cubes.net import configuration, serializers
+
+pytestmark = pytest.mark.anyio
+
+_REGISTRIES: configuration.Registries = {
+    "minecraft:dimension_type": {
+        "minecraft:overworld": {"min_y": -64, "height": 384, "natural": True},
+        "minecraft:the_end": None,
+    },
+    "minecraft:damage_type": {"minecraft:fall": {"scaling": "never"}},
+}
+_TAGS = {"minecraft:block": {"minecraft:logs": [40, 41], "minecraft:air": [0]}}
+
+
+def test_registry_data():
+    data = configuration.encode_registry_data(
+        "minecraft:dimension_type", _REGISTRIES["minecraft:dimension_type"]
+    )
+    offset = 1
+    assert data[0] == configuration.REGISTRY_DATA_ID
+    registry, offset = serializers.IdentifierSerializer.read(data, offset)
+    assert registry == "minecraft:dimension_type"
+    count, offset = serializers.VarIntSerializer.read(data, offset)
+    assert count == 2
+    entry, offset = serializers.IdentifierSerializer.read(data, offset)
+    assert (entry, data[offset]) == ("minecraft:overworld", 1)
+    value, offset = nbt.read(data, offset + 1, network=True)
+    assert value == {"min_y": -64, "height": 384, "natural": 1}
+    entry, offset = serializers.IdentifierSerializer.read(data, offset)
+    assert (entry, data[offset:]) == ("minecraft:the_end", b"\x00")
+
+
+def test_tags():
+    data = configuration.encode_tags(_TAGS)
+    assert data == (
+        b"\x0d\x01\x0fminecraft:block\x02"
+        b"\x0eminecraft:logs\x02\x28\x29\x0dminecraft:air\x01\x00"
+    )
+    with pytest.raises(ValueError):
+        configuration.encode_tags({"block": {}})
+
+
+def test_frames_are_cached():
+    data = net.ConfigurationData(_REGISTRIES, _TAGS)
+    assert len(data.packets) == 3
+    assert data.frames() is data.frames()
+    assert data.frames() == net.encode_frames(*data.packets)
+    compressed = data.frames(16, 9)
+    assert compressed is data.frames(16, 9)
+    assert compressed != data.frames(16)
+    # the first packet is compressed, its length is followed by data length
+    length, offset = serializers.VarIntSerializer.read(compressed, 0)
+    data_length, start = serializers.VarIntSerializer.read(compressed, offset)
+    assert data_length == len(data.packets[0])
+    assert zlib.decompress(compressed[start : offset + length]) == data.packets[0]
+
+
+@pytest.mark.parametrize("threshold", (-1, 16))
+async def test_send(streams: tuple[anyio.abc.SocketStream, ...], threshold: int):
+    client, server = (net.Connection(stream) for stream in streams)
+    for conn in (client, server):
+        conn.set_compression(threshold)
+    data = net.ConfigurationData(_REGISTRIES, _TAGS)
+    await server.send_raw(net.encode_frames(b"\x00", compression_threshold=threshold))
+    await data.send(server)
+    data.write(server)
+    assert server.queued_packets == 3
+    await server.flush()
+    assert (await client.receive()).getvalue() == b"\x00"
+    for packet in data.packets * 2:
+        assert (await client.receive()).getvalue() == packet
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from cubes.net import _aes, encryption
+
+_KEY = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+_IV = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+_PLAINTEXT = bytes.fromhex("6bc1bee22e409f96e93d7e117393172aae2d")
+_CIPHERTEXT = bytes.fromhex("3b79424c9c0dd436bace9e0ed4586a4f32b9")
+
+
+def test_aes_cfb8_vector():
+    assert _aes.AESCFB8(_KEY, _IV).update(_PLAINTEXT) == _CIPHERTEXT
+    decryptor = _aes.AESCFB8(_KEY, _IV, decrypt=True)
+    assert decryptor.update(_CIPHERTEXT) == _PLAINTEXT
+
+
+@pytest.mark.parametrize(
+    "fast",
+    (
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not encryption.FAST_CIPHER_AVAILABLE,
+                reason="cryptography is not installed",
+            ),
+        ),
+    ),
+)
+def test_ciphers(fast: bool):
+    secret = random.randbytes(16)
+    data = random.randbytes(512)
+    encryptor, decryptor = encryption.create_ciphers(secret, fast=fast)
+    encrypted = encryptor.update(data[:100]) + encryptor.update(data[100:])
+    fallback, _ = encryption.create_ciphers(secret, fast=False)
+    assert encrypted == fallback.update(data)
+    decrypted = decryptor.update(encrypted[:300]) + decryptor.update(encrypted[300:])
+    assert decrypted == data
+
+
+def test_invalid_shared_secret():
+    with pytest.raises(ValueError):
+        encryption.create_ciphers(b"\x00" * 15)
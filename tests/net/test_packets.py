@@ -0,0 +1,128 @@
+import io
+import uuid
+
+import nbtlib  # type: ignore
+import pytest
+
+from cubes import net
+from cubes.net import packets
+
+
+class _Handshake(packets.Packet, packet_id=0x00):
+    protocol: packets.VarInt
+    host: packets.String
+    port: packets.UnsignedShort
+    intention: packets.VarInt
+
+
+class _Everything(packets.Packet, packet_id=0x7F):
+    boolean: packets.Boolean
+    byte: packets.Byte
+    unsigned_byte: packets.UnsignedByte
+    angle: packets.Angle
+    short: packets.Short
+    unsigned_short: packets.UnsignedShort
+    int_: packets.Int
+    long: packets.Long
+    float_: packets.Float
+    double: packets.Double
+    varint: packets.VarInt
+    varlong: packets.VarLong
+    string: packets.String
+    identifier: packets.Identifier
+    uuid_: packets.UUID
+    position: packets.Position
+    nbt: packets.NBT
+    last: packets.Long
+
+
+def test_packet_serialize():
+    packet = _Handshake(766, "localhost", 25565, intention=1)
+    data = packet.serialize()
+    assert data == b"\x00\xfe\x05\x09localhost\x63\xdd\x01"
+    assert _Handshake.deserialize(data) == packet
+    assert repr(packet) == (
+        "_Handshake(protocol=766, host='localhost', port=25565, intention=1)"
+    )
+
+
+def test_packet_all_field_types():
+    packet = _Everything(
+        True,
+        -1,
+        255,
+        128,
+        -2,
+        65535,
+        -3,
+        -4,
+        0.5,
+        1.25,
+        -5,
+        -6,
+        "test",
+        "some:thing",
+        uuid.uuid4(),
+        (-30000000, -2048, 30000000),
+        nbtlib.Compound({"key": nbtlib.Int(1)}),
+        7,
+    )
+    assert _Everything.deserialize(packet.serialize()) == packet
+
+
+def test_packet_buffer():
+    packet = _Handshake(766, "localhost", 25565, 1)
+    buffer = io.BytesIO()
+    packet.to_buffer(buffer)
+    buffer.write(b"\xff")
+    buffer.seek(0)
+    assert _Handshake.from_buffer(buffer) == packet
+    assert buffer.read() == b"\xff"
+
+
+def test_packet_slots():
+    assert not hasattr(_Handshake(766, "localhost", 25565, 1), "__dict__")
+
+
+def test_packet_invalid_id():
+    with pytest.raises(ValueError):
+        _Handshake.deserialize(b"\x01\xfe\x05\x09localhost\x63\xdd\x01")
+
+
+def test_packet_invalid_fields():
+    with pytest.raises(TypeError):
+        _Handshake(766, "localhost", 25565)
+    with pytest.raises(TypeError):
+        _Handshake(766, "localhost", 25565, 1, 2)
+
+
+def test_packet_invalid_field_type():
+    with pytest.raises(TypeError):
+
+        class _Invalid(packets.Packet, packet_id=0x00):
+            field: int
+
+
+def test_packet_from_frame():
+    packet = _Handshake(766, "localhost", 25565, 1)
+    data = memoryview(packet.serialize())
+    assert _Handshake.from_frame(net.Frame(data, 1, 0x00)) == packet
+
+
+def test_lazy_packet():
+    packet = _Handshake(766, "localhost", 25565, 1)
+    lazy = packets.LazyPacket(
+        _Handshake, net.Frame(memoryview(packet.serialize()), 1, 0)
+    )
+    assert lazy.packet_id == 0x00
+    assert not lazy.is_decoded
+    assert lazy.host == "localhost"
+    assert lazy.is_decoded
+    assert lazy.decode() is lazy.decode() == packet
+
+
+def test_packet_write():
+    packet = _Handshake(766, "localhost", 25565, 1)
+    buffer = bytearray(b"\x01")
+    packet.write(buffer)
+    assert buffer == b"\x01" + packet.serialize()
@@ -0,0 +1,159 @@
+import io
+import types
+
+import pytest
+
+from cubes import net
+from cubes.net import packets
+
+
+class Handshake(packets.Packet, packet_id=0x00):
+    protocol: packets.VarInt
+    host: packets.String
+    port: packets.UnsignedShort
+    intention: packets.VarInt
+
+
+class PingRequest(packets.Packet, packet_id=0x01):
+    payload: packets.Long
+
+
+class Undecodable(packets.Packet, packet_id=0x02):
+    payload: packets.Long
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        raise AssertionError("Packet without handler must not be decoded.")
+
+
+_PROTOCOL = 766
+
+
+@pytest.fixture
+def registry() -> net.PacketRegistry:
+    registry = net.PacketRegistry()
+    serverbound = net.Direction.SERVERBOUND
+    registry.register(Handshake, net.ConnectionState.HANDSHAKE, serverbound, [765, 766])
+    registry.register(PingRequest, net.ConnectionState.STATUS, serverbound, [766])
+    registry.register(Undecodable, net.ConnectionState.STATUS, serverbound, [766])
+    return registry
+
+
+def test_registry_get(registry: net.PacketRegistry):
+    args = (net.ConnectionState.HANDSHAKE, net.Direction.SERVERBOUND, 0x00)
+    assert registry.get(765, *args) is Handshake
+    assert registry.get(766, *args) is Handshake
+    assert registry.get(764, *args) is None
+    assert (
+        registry.get(766, net.ConnectionState.STATUS, net.Direction.CLIENTBOUND, 1)
+        is None
+    )
+
+
+def test_registry_duplicate(registry: net.PacketRegistry):
+    with pytest.raises(ValueError):
+        registry.register(
+            PingRequest,
+            net.ConnectionState.HANDSHAKE,
+            net.Direction.SERVERBOUND,
+            [766],
+            packet_id=0x00,
+        )
+
+
+def test_router_unregistered_packet(registry: net.PacketRegistry):
+    router = net.PacketRouter(registry, 765)
+    with pytest.raises(ValueError):
+        router.add_handler(PingRequest, lambda conn, packet: None)  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_router_dispatch(registry: net.PacketRegistry):
+    router = net.PacketRouter(registry, _PROTOCOL)
+    received = []
+
+    @router.handler(Handshake)
+    async def process_handshake(conn, handshake):
+        received.append((conn, handshake))
+
+    @router.handler(PingRequest)
+    async def process_ping(conn, ping):
+        received.append((conn, ping))
+
+    handshake = Handshake(_PROTOCOL, "localhost", 25565, 1)
+    buffer = io.BytesIO(handshake.serialize())
+    assert await router.dispatch(None, net.ConnectionState.HANDSHAKE, buffer)  # type: ignore
+    buffer = io.BytesIO(PingRequest(42).serialize())
+    assert await router.dispatch(None, net.ConnectionState.STATUS, buffer)  # type: ignore
+    assert received == [(None, handshake), (None, PingRequest(42))]
+
+
+@pytest.mark.anyio
+async def test_router_route(registry: net.PacketRegistry):
+    router = net.PacketRouter(registry, _PROTOCOL)
+    received = []
+
+    @router.handler(Handshake)
+    async def process_handshake(conn, handshake):
+        received.append(handshake)
+        conn.state = net.ConnectionState(handshake.intention)
+
+    @router.handler(PingRequest)
+    async def process_ping(conn, ping):
+        received.append(ping)
+
+    conn = types.SimpleNamespace(state=net.ConnectionState.HANDSHAKE)
+    handshake = Handshake(_PROTOCOL, "localhost", 25565, 1)
+    assert await router.route(conn, io.BytesIO(handshake.serialize()))  # type: ignore
+    assert conn.state == net.ConnectionState.STATUS
+    assert await router.route(conn, io.BytesIO(PingRequest(42).serialize()))  # type: ignore
+    conn.state = net.ConnectionState.PLAY
+    assert not await router.route(conn, io.BytesIO(PingRequest(1).serialize()))  # type: ignore
+    assert received == [handshake, PingRequest(42)]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "state,data",
+    [
+        (net.ConnectionState.STATUS, Undecodable(1).serialize()),
+        (net.ConnectionState.HANDSHAKE, PingRequest(1).serialize()),
+        (net.ConnectionState.STATUS, b"\x7f"),
+        (net.ConnectionState.STATUS, b"\xff\xff\xff\xff\x0f"),
+        (net.ConnectionState.PLAY, b"\x00"),
+    ],
+)
+async def test_router_skips_unhandled(
+    registry: net.PacketRegistry, state: net.ConnectionState, data: bytes
+):
+    router = net.PacketRouter(registry, _PROTOCOL)
+
+    @router.handler(PingRequest)
+    async def process_ping(conn, ping):
+        raise AssertionError
+
+    assert not await router.dispatch(None, state, io.BytesIO(data))  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_router_dispatch_lazy_frame(registry: net.PacketRegistry):
+    router = net.PacketRouter(registry, _PROTOCOL)
+    received = []
+
+    @router.handler(PingRequest, lazy=True)
+    async def process_ping(conn, ping):
+        received.append(ping)
+
+    frame = net.Frame(memoryview(PingRequest(42).serialize()), 1, 0x01)
+    assert await router.dispatch(None, net.ConnectionState.STATUS, frame)  # type: ignore
+    (ping,) = received
+    assert isinstance(ping, packets.LazyPacket)
+    assert not ping.is_decoded
+    assert ping.payload == 42
+
+
+@pytest.mark.anyio
+async def test_router_skips_unhandled_frame(registry: net.PacketRegistry):
+    router = net.PacketRouter(registry, _PROTOCOL)
+    frame = net.Frame(memoryview(Undecodable(1).serialize()), 1, 0x02)
+    assert not await router.dispatch(None, net.ConnectionState.STATUS, frame)  # type: ignore
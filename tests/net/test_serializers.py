@@ -1,3 +1,4 @@
+import array
 import io
 import random
 import string
@@ -8,7 +9,7 @@ import nbtlib  # type: ignore
 import pytest
 
 from cubes.net import serializers
-from cubes.net.serializers import _string
+from cubes.net.serializers import _position, _string
 
 
 @pytest.fixture
@@ -30,6 +31,60 @@ def test_valid_nbt(buffer: io.BytesIO):
 def test_invalid_nbt():
     with pytest.raises(ValueError):
         serializers.NBTSerializer("test")
+    with pytest.raises(ValueError):
+        serializers.NetworkNBTSerializer({1, 2})
+
+
+@pytest.mark.parametrize(
+    "serializer", (serializers.NBTSerializer, serializers.NetworkNBTSerializer)
+)
+def test_nbt_round_trip(serializer: type[serializers.NBTSerializer]):
+    with open("tests/data/test_data.snbt", "r") as file:
+        data = serializer.encode(nbtlib.parse_nbt(file.read()))
+    value = serializer.deserialize(data)
+    assert isinstance(value, nbtlib.Compound)
+    assert serializer.encode(value) == data
+
+
+def test_network_nbt(buffer: io.BytesIO):
+    value = {"text": "Hello", "bold": True}
+    data = serializers.NetworkNBTSerializer(value).serialize()
+    assert data == b"\x0a" + serializers.NBTSerializer.encode(value)[3:]
+    decoded, offset = serializers.NetworkNBTSerializer.read(b"\xff" + data, 1)
+    assert offset == len(data) + 1
+    assert decoded == {"text": "Hello", "bold": 1}
+    assert isinstance(decoded["bold"], nbtlib.Byte)
+    assert serializers.PlainNetworkNBTSerializer.read(b"\xff" + data, 1) == (
+        {"text": "Hello", "bold": 1},
+        len(data) + 1,
+    )
+    buffer.write(data + b"\x08\x00\x00\x00")
+    buffer.seek(0)
+    assert serializers.NetworkNBTSerializer.from_buffer(buffer) == value
+    assert serializers.NetworkNBTSerializer.from_buffer(buffer) == ""
+    assert serializers.NetworkNBTSerializer.from_buffer(buffer) is None
+
+
+@pytest.mark.parametrize(
+    "serializer", (serializers.NBTSerializer, serializers.PlainNBTSerializer)
+)
+@pytest.mark.parametrize(
+    "data",
+    (
+        b"",
+        b"\x0a\x00\x00\x01\x00",
+        b"\x0a\x00\x00\x00\x00",
+        b"\x0a\x00\x00\x07\x00\x00\x00\x00\x00\x05\x00",
+    ),
+)
+def test_invalid_nbt_data(serializer: type[serializers.NBTSerializer], data: bytes):
+    with pytest.raises(ValueError):
+        serializer.deserialize(data)
+
+
+def test_nbt_root_not_compound():
+    with pytest.raises(ValueError):
+        serializers.NBTSerializer.deserialize(b"\x08\x00\x00\x00\x00")
 
 
 @pytest.mark.parametrize(
@@ -336,6 +391,64 @@ def test_invalid_varint(value):
         serializers.VarIntSerializer(value)
 
 
+@pytest.mark.parametrize(
+    ("value", "data"),
+    (
+        (0, b"\x00"),
+        (127, b"\x7f"),
+        (128, b"\x80\x01"),
+        (16383, b"\xff\x7f"),
+        (16384, b"\x80\x80\x01"),
+        (2147483647, b"\xff\xff\xff\xff\x07"),
+        (-1, b"\xff\xff\xff\xff\x0f"),
+        (-2147483648, b"\x80\x80\x80\x80\x08"),
+    ),
+)
+def test_varint_wire_format(value: int, data: bytes):
+    assert serializers.VarIntSerializer.encode(value) == data
+    assert serializers.VarIntSerializer.read(b"\x00" + data, 1) == (
+        value,
+        len(data) + 1,
+    )
+    assert serializers.VarIntSerializer.from_buffer(io.BytesIO(data)) == value
+
+
+@pytest.mark.parametrize("data", (b"\xff\xff\xff\xff\xff\x01", b"\x80"))
+def test_invalid_varint_data(data: bytes):
+    with pytest.raises(ValueError):
+        serializers.VarIntSerializer.from_buffer(io.BytesIO(data))
+
+
+def test_varint_array():
+    values = [0, 1, 127, 128, 16383, 16384, -1, *random.sample(range(2**31), 100)]
+    buffer = bytearray(b"\x00")
+    serializers.VarIntSerializer.write_array(buffer, values, validate=True)
+    data = serializers.VarIntSerializer.encode_array(values)
+    assert buffer[1:] == data
+    assert data == b"".join(
+        serializers.VarIntSerializer(value).serialize() for value in values
+    )
+    assert serializers.VarIntSerializer.read_array(buffer, 1, len(values)) == (
+        values,
+        len(buffer),
+    )
+    with pytest.raises(ValueError):
+        serializers.VarIntSerializer.write_array(bytearray(), [2**31], validate=True)
+
+
+def test_varlong_array():
+    values = [
+        -1,
+        0,
+        *(random.randint(*serializers.VarLongSerializer._RANGE) for _ in range(100)),
+    ]
+    data = serializers.VarLongSerializer.encode_array(values)
+    assert serializers.VarLongSerializer.read_array(data, 0, len(values)) == (
+        values,
+        len(data),
+    )
+
+
 @pytest.mark.parametrize(
     "value",
     (
@@ -405,3 +518,221 @@ def test_valid_identifier(buffer: io.BytesIO):
 def test_invalid_identifier():
     with pytest.raises(ValueError):
         serializers.IdentifierSerializer("something")
+
+
+@pytest.mark.parametrize(
+    ("serializer", "value"),
+    (
+        (serializers.BooleanSerializer, True),
+        (serializers.ByteSerializer, -128),
+        (serializers.UnsignedByteSerializer, 255),
+        (serializers.ShortSerializer, -32768),
+        (serializers.UnsignedShortSerializer, 65535),
+        (serializers.IntSerializer, -2147483648),
+        (serializers.LongSerializer, 9223372036854775807),
+        (serializers.FloatSerializer, 0.5),
+        (serializers.DoubleSerializer, -0.25),
+    ),
+)
+def test_simple_static_api(serializer, value):
+    data = serializer(value).serialize()
+    assert serializer.encode(value) == data
+    buffer = bytearray(b"\x00")
+    serializer.write(buffer, value, validate=True)
+    assert buffer == b"\x00" + data
+    assert serializer.read(buffer, 1) == (value, len(buffer))
+    assert serializer.read(memoryview(buffer), 1) == (value, len(buffer))
+    buffer = bytearray(len(data) + 2)
+    assert serializer.pack_into(buffer, 1, value) == len(data) + 1
+    assert buffer == b"\x00" + data + b"\x00"
+
+
+def test_simple_write_validation():
+    buffer = bytearray()
+    with pytest.raises(ValueError):
+        serializers.ByteSerializer.write(buffer, 128, validate=True)
+    serializers.ByteSerializer.write(buffer, 1, validate=True)
+    assert buffer == b"\x01"
+
+
+@pytest.mark.parametrize(
+    ("serializer", "value"),
+    (
+        (serializers.IntSerializer, 42),
+        (serializers.VarIntSerializer, -1),
+        (serializers.VarLongSerializer, 2**40),
+        (serializers.StringSerializer, "привет"),
+        (serializers.IdentifierSerializer, "minecraft:stone"),
+        (serializers.UUIDSerializer, uuid.uuid4()),
+        (serializers.PositionSerializer, (-30000000, -2048, 30000000)),
+        (serializers.NBTSerializer, {"test": nbtlib.Int(1)}),
+    ),
+)
+def test_offset_api(serializer, value):
+    if serializer is serializers.PositionSerializer:
+        data = serializer(*value).serialize()
+    else:
+        data = serializer(value).serialize()
+    assert serializer.encode(value) == data
+    buffer = bytearray(b"\xff")
+    serializer.write(buffer, value, validate=True)
+    buffer += b"\xff"
+    assert buffer == b"\xff" + data + b"\xff"
+    assert serializer.read(buffer, 1) == (value, len(data) + 1)
+    with memoryview(buffer) as view:
+        assert serializer.read(view, 1) == (value, len(data) + 1)
+
+
+@pytest.mark.parametrize(
+    ("serializer", "data"),
+    (
+        (serializers.VarIntSerializer, b""),
+        (serializers.VarIntSerializer, b"\x80"),
+        (serializers.VarIntSerializer, b"\xff\xff\xff"),
+        (serializers.VarLongSerializer, b"\xff\xff\xff\xff\xff\xff"),
+        (serializers.StringSerializer, b""),
+        (serializers.StringSerializer, b"\x05abc"),
+        (serializers.UUIDSerializer, b"\x00" * 15),
+    ),
+)
+def test_offset_api_truncated(serializer, data: bytes):
+    with pytest.raises(ValueError):
+        serializer.read(data, 0)
+
+
+def test_varint_array_truncated():
+    with pytest.raises(ValueError):
+        serializers.VarIntSerializer.read_array(b"\x01\x80", 0, 2)
+    with pytest.raises(ValueError):
+        serializers.VarIntSerializer.read_array(b"\x01", 0, 2)
+
+
+def test_nbt_encode_without_validation():
+    with pytest.raises(ValueError):
+        serializers.NBTSerializer.validate(1)
+    with pytest.raises(ValueError):
+        serializers.NBTSerializer(1)
+    assert serializers.NBTSerializer.encode(1) == b"\x03\x00\x00\x00\x00\x00\x01"
+
+
+_FAST = (
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            not _position.NUMPY_AVAILABLE, reason="NumPy is not installed"
+        ),
+    ),
+    False,
+)
+_POSITIONS = [
+    (-30000000, -2048, -30000000),
+    (30000000, 2047, 30000000),
+    (0, 0, 0),
+    (-1, -1, -1),
+    *(
+        (
+            random.randint(-30000000, 30000000),
+            random.randint(-2048, 2047),
+            random.randint(-30000000, 30000000),
+        )
+        for _ in range(100)
+    ),
+]
+
+
+@pytest.mark.parametrize("fast", _FAST)
+def test_position_array(fast: bool):
+    position = serializers.PositionSerializer
+    data = position.encode_array(_POSITIONS, fast=fast)
+    assert data == b"".join(position.encode(value) for value in _POSITIONS)
+    assert position.read_array(b"\x00" + data, 1, len(_POSITIONS), fast=fast) == (
+        _POSITIONS,
+        len(data) + 1,
+    )
+    with pytest.raises(ValueError):
+        position.read_array(data, 8, len(_POSITIONS), fast=fast)
+
+
+@pytest.mark.parametrize(
+    "section", ((0, 0, 0), (-1, -1, -1), (2097151, 524287, -2097152))
+)
+def test_section_position(section: tuple[int, int, int]):
+    data = serializers.PositionSerializer.encode_section(section)
+    assert serializers.PositionSerializer.read_section(data, 0) == (section, 8)
+
+
+def test_section_position_wire_format():
+    x, y, z = 1, 2, 3
+    data = serializers.PositionSerializer.encode_section((x, y, z))
+    assert data == serializers.LongSerializer.encode(x << 42 | z << 20 | y)
+
+
+@pytest.mark.parametrize("fast", _FAST)
+def test_section_blocks(fast: bool):
+    blocks = [(0, 0, 0, 0), (1, 15, 0, 15), (27913, 1, 2, 3), (2**20, 15, 15, 15)]
+    data = serializers.PositionSerializer.encode_section_blocks(blocks, fast=fast)
+    assert data[:3] == b"\x00\xf0\x3f"
+    assert serializers.PositionSerializer.read_section_blocks(data, 0, len(blocks)) == (
+        blocks,
+        len(data),
+    )
+
+
+def test_long_array(buffer: io.BytesIO):
+    value = [-(2**63), -1, 0, 1, 2**63 - 1]
+    data = serializers.LongArraySerializer(value).serialize()
+    assert data[0] == len(value)
+    assert list(serializers.LongArraySerializer.deserialize(data)) == value
+    serializers.LongArraySerializer(value).to_buffer(buffer)
+    buffer.seek(0)
+    assert list(serializers.LongArraySerializer.from_buffer(buffer)) == value
+    unsigned = array.array("Q", [2**64 - 1, 1])
+    assert serializers.LongArraySerializer.encode(unsigned) == (
+        serializers.LongArraySerializer.encode([-1, 1])
+    )
+
+
+@pytest.mark.parametrize("value", ([2**64], ["test"]))
+def test_invalid_long_array(value):
+    with pytest.raises(ValueError):
+        serializers.LongArraySerializer(value)
+
+
+def test_long_array_truncated():
+    with pytest.raises(ValueError):
+        serializers.LongArraySerializer.read(b"\x02" + bytes(15), 0)
+
+
+@pytest.mark.parametrize(
+    ("value", "data"),
+    (
+        (0, b"\x00"),
+        (1, b"\x01" + b"\x00" * 7 + b"\x01"),
+        (1 << 64 | 2, b"\x02" + b"\x00" * 7 + b"\x02" + b"\x00" * 7 + b"\x01"),
+    ),
+)
+def test_bitset(buffer: io.BytesIO, value: int, data: bytes):
+    assert serializers.BitSetSerializer(value).serialize() == data
+    assert serializers.BitSetSerializer.deserialize(data) == value
+    serializers.BitSetSerializer(value).to_buffer(buffer)
+    buffer.seek(0)
+    assert serializers.BitSetSerializer.from_buffer(buffer) == value
+
+
+def test_invalid_bitset():
+    with pytest.raises(ValueError):
+        serializers.BitSetSerializer(-1)
+
+
+def test_byte_array(buffer: io.BytesIO):
+    value = bytes(range(256))
+    data = serializers.ByteArraySerializer(value).serialize()
+    assert data == b"\x80\x02" + value
+    assert serializers.ByteArraySerializer.deserialize(data) == value
+    serializers.ByteArraySerializer(value).to_buffer(buffer)
+    buffer.seek(0)
+    assert serializers.ByteArraySerializer.from_buffer(buffer) == value
+    with pytest.raises(ValueError):
+        serializers.ByteArraySerializer.read(data[:-1], 0)
+    with pytest.raises(ValueError):
+        serializers.ByteArraySerializer("test")  # type: ignore
@@ -1,4 +1,6 @@
 import io
+import random
+import zlib
 from typing import AsyncGenerator
 
 import anyio
@@ -53,6 +55,7 @@ async def test_server(stats_server: tuple[dict[str, bool], net.Server]):
         async with await anyio.connect_tcp(_HOST, _PORT) as stream:
             await stream.send(data)
             assert await stream.receive() == data
+            assert len(server.connections) == 1
 
         async with await anyio.connect_tcp(_HOST, _PORT):
             await anyio.sleep(0.5)
@@ -72,3 +75,365 @@ async def test_conn(stats_server: tuple[dict, net.Server]):
             conn.remote_address
             conn.local_address
         task_group.cancel_scope.cancel()
+
+
+async def test_conn_receive_many_packets_from_one_chunk(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    await client.send(b"\x01\x00\x02\x01\x02\x01\x03")
+    assert (await conn.receive()).getvalue() == b"\x00"
+    assert (await conn.receive()).getvalue() == b"\x01\x02"
+    assert (await conn.receive()).getvalue() == b"\x03"
+
+
+@pytest.mark.parametrize("threshold", (-1, 4))
+async def test_conn_receive_frame(
+    streams: tuple[anyio.abc.SocketStream, ...], threshold: int
+):
+    client, server = (net.Connection(stream) for stream in streams)
+    for conn in (client, server):
+        conn.set_compression(threshold)
+    await client.send(b"\x00", b"\x80\x01\x02\x03", b"\x01" + b"\x00" * 64)
+    frame = await server.receive_frame()
+    assert (frame.packet_id, bytes(frame.data[frame.offset :])) == (0x00, b"")
+    frame = await server.receive_frame()
+    assert (frame.packet_id, bytes(frame.data[frame.offset :])) == (0x80, b"\x02\x03")
+    frame = await server.receive_frame()
+    assert (frame.packet_id, bytes(frame.data[frame.offset :])) == (1, b"\x00" * 64)
+
+
+async def test_conn_receive_frame_without_packet_id(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    await client.send(b"\x00")
+    with pytest.raises(ValueError):
+        await net.Connection(server).receive_frame()
+
+
+async def test_conn_receive_large_packet(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(server)
+    data = bytes(range(256)) * 1024
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(net.Connection(client).send, io.BytesIO(data))
+        assert (await conn.receive()).getvalue() == data
+
+
+async def test_conn_receive_too_long_length(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    await client.send(b"\xff\xff\xff\xff")
+    with pytest.raises(ValueError):
+        await conn.receive()
+
+
+@pytest.mark.parametrize("thread_size", (0, 65536))
+async def test_conn_compression(
+    streams: tuple[anyio.abc.SocketStream, ...], thread_size: int
+):
+    client, server = (net.Connection(stream) for stream in streams)
+    for conn in (client, server):
+        conn.set_compression(256, thread_size=thread_size)
+    small, big = b"\x00" * 16, bytes(range(256)) * 64
+    await client.send(io.BytesIO(small), io.BytesIO(big))
+    assert (await server.receive()).getvalue() == small
+    assert (await server.receive()).getvalue() == big
+
+
+async def test_conn_compression_wire_format(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    conn.set_compression(4)
+    await conn.send(io.BytesIO(b"\x01"))
+    assert await client.receive() == b"\x02\x00\x01"
+    await client.send(b"\x02\x00\x02")
+    assert (await conn.receive()).getvalue() == b"\x02"
+
+
+async def test_conn_compression_invalid_length(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    conn.set_compression(256)
+    data = zlib.compress(b"\x00" * 16)
+    await client.send(bytes((len(data) + 1, 16)) + data)
+    with pytest.raises(ValueError):
+        await conn.receive()
+
+
+async def test_conn_invalid_compression_level(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    conn = net.Connection(streams[1])
+    with pytest.raises(ValueError):
+        conn.set_compression(256, level=10)
+    with pytest.raises(ValueError):
+        conn.set_compression(256, thread_size=-1)
+
+
+async def test_conn_encryption(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = (net.Connection(stream) for stream in streams)
+    secret = random.randbytes(16)
+    await client.send(io.BytesIO(b"\x01"))
+    client.enable_encryption(secret)
+    await client.send(io.BytesIO(b"\x02"), io.BytesIO(b"\x03"))
+    await anyio.sleep(0.1)
+    # encrypted packets are received together with the last plain one
+    assert (await server.receive()).getvalue() == b"\x01"
+    server.enable_encryption(secret)
+    assert server.is_encrypted
+    assert (await server.receive()).getvalue() == b"\x02"
+    assert (await server.receive()).getvalue() == b"\x03"
+    with pytest.raises(RuntimeError):
+        server.enable_encryption(secret)
+
+
+@pytest.mark.parametrize("threshold", (-1, 0))
+async def test_conn_send_buffers(
+    streams: tuple[anyio.abc.SocketStream, ...], threshold: int
+):
+    client, server = (net.Connection(stream) for stream in streams)
+    for conn in (client, server):
+        conn.set_compression(threshold)
+    packet = io.BytesIO(b"\x04")
+    await client.send(b"\x01", bytearray(b"\x02"), memoryview(b"\x03"), packet)
+    for data in (b"\x01", b"\x02", b"\x03", b"\x04"):
+        assert (await server.receive()).getvalue() == data
+    # BytesIO buffer must be released after sending
+    packet.write(b"\x05")
+
+
+async def test_conn_write_and_flush(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(server)
+    conn.write(b"\x01", b"\x02")
+    conn.write(b"\x03")
+    assert conn.outbound_size == 6
+    await conn.flush()
+    assert conn.outbound_size == 0
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x01\x01\x01\x02\x01\x03"
+
+
+async def test_conn_autoflush(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(server)
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(conn.autoflush)
+        conn.write(b"\x01")
+        conn.write(b"\x02")
+        with anyio.fail_after(1):
+            assert await client.receive() == b"\x01\x01\x01\x02"
+        task_group.cancel_scope.cancel()
+
+
+async def test_server_autoflush():
+    async def _process_packet(conn: net.Connection, packet: io.BytesIO):
+        conn.write(packet)
+
+    async def _noop(*_):
+        pass
+
+    server = net.Server(_noop, _noop, _process_packet, _noop, autoflush=True)
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORT)
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            await stream.send(b"\x01\x00")
+            with anyio.fail_after(1):
+                assert await stream.receive() == b"\x01\x00"
+        task_group.cancel_scope.cancel()
+
+
+async def test_server_connection_data():
+    class _Session:
+        __slots__ = ("packets",)
+
+        def __init__(self) -> None:
+            self.packets = 0
+
+    async def _process_packet(conn: net.Connection[_Session], packet: io.BytesIO):
+        assert conn.state == net.ConnectionState.HANDSHAKE
+        conn.data.packets += 1
+        await conn.send(bytes([conn.data.packets]))
+
+    async def _noop(*_):
+        pass
+
+    server = net.Server(_noop, _noop, _process_packet, _noop, connection_data=_Session)
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORT)
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            await stream.send(b"\x01\x00\x01\x00")
+            with anyio.fail_after(1):
+                received = b""
+                while len(received) < 4:
+                    received += await stream.receive()
+            assert received == b"\x01\x01\x01\x02"
+        task_group.cancel_scope.cancel()
+
+
+async def test_server_timeout_not_applied_to_handlers():
+    received = []
+
+    async def _process_packet(conn: net.Connection, packet: io.BytesIO):
+        await anyio.sleep(0.3)
+        received.append(packet.getvalue())
+        await conn.send(packet)
+
+    async def _timeout(conn: net.Connection):
+        received.append(None)
+        await conn.close()
+
+    async def _noop(*_):
+        pass
+
+    server = net.Server(_noop, _timeout, _process_packet, _noop, 0.2)
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORT)
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            await stream.send(b"\x01\x00")
+            with anyio.fail_after(1):
+                assert await stream.receive() == b"\x01\x00"
+            await anyio.sleep(0.5)
+        task_group.cancel_scope.cancel()
+    assert received == [b"\x00", None]
+
+
+async def test_server_keeps_packet_received_after_timeout():
+    received: list[bytes] = []
+    timeouts = []
+
+    class _SlowConnection:
+        def __init__(self) -> None:
+            self.packets = [b"\x01\x00"]
+
+        async def receive(self) -> io.BytesIO:
+            if not self.packets:
+                raise EOFError
+            # e.g. decompression in a worker thread, it can't be cancelled
+            with anyio.CancelScope(shield=True):
+                await anyio.sleep(0.3)
+            return io.BytesIO(self.packets.pop())
+
+    async def _process_packet(conn, packet: io.BytesIO):
+        received.append(packet.getvalue())
+
+    async def _timeout(conn):
+        timeouts.append(conn)
+
+    async def _noop(*_):
+        pass
+
+    server = net.Server(
+        _noop, _timeout, _process_packet, _noop, 0.05, timer_resolution=0.01
+    )
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(server.timers.run)
+        with pytest.raises(EOFError):
+            await server._process_packets(_SlowConnection())  # type: ignore
+        task_group.cancel_scope.cancel()
+    assert received == [b"\x01\x00"]
+    assert not timeouts
+
+
+async def test_conn_overflow_drop(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(
+        server, high_watermark=8, overflow_policy=net.OverflowPolicy.DROP
+    )
+    conn.write(b"\x00" * 8)
+    assert conn.is_backpressured
+    conn.write(b"\x01", essential=False)
+    conn.write(b"\x02")
+    assert (conn.queued_packets, conn.dropped_packets) == (2, 1)
+    await conn.flush()
+    assert not conn.is_backpressured
+    assert conn.outbound_size == 0
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x08" + b"\x00" * 8 + b"\x01\x02"
+
+
+async def test_conn_overflow_disconnect(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(
+        server, high_watermark=8, overflow_policy=net.OverflowPolicy.DISCONNECT
+    )
+    conn.write(b"\x00")
+    with pytest.raises(net.ConnectionOverflowError):
+        conn.write(b"\x00" * 8)
+    assert conn.outbound_size == 0
+    # the socket is shut down right away, without waiting for a flush
+    with anyio.fail_after(1), pytest.raises(anyio.EndOfStream):
+        await client.receive()
+    with pytest.raises(net.ConnectionOverflowError):
+        conn.write(b"\x00")
+    with pytest.raises(net.ConnectionOverflowError):
+        await conn.send(b"\x00")
+
+
+async def test_conn_overflow_block(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(server, high_watermark=8)
+    conn.write(b"\x00" * 8)
+    assert conn.is_backpressured
+    await conn.send(b"\x01")
+    assert not conn.is_backpressured
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x08" + b"\x00" * 8 + b"\x01\x01"
+
+
+async def test_conn_overflow_block_write(streams: tuple[anyio.abc.SocketStream, ...]):
+    client, server = streams
+    conn = net.Connection(server, high_watermark=8)
+    conn.write(b"\x00" * 8)
+    with pytest.raises(net.ConnectionBackpressuredError):
+        conn.write(b"\x01")
+    assert conn.queued_packets == 1
+    await conn.drain()
+    assert not conn.is_backpressured
+    conn.write(b"\x02")
+    await conn.flush()
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x08" + b"\x00" * 8 + b"\x01\x02"
+
+
+async def test_conn_write_copies_mutable_data(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    data, packet = bytearray(b"\x01"), io.BytesIO(b"\x02")
+    conn.write(data, packet, b"\x03")
+    data[0] = 0xFF
+    packet.write(b"\xff")
+    await conn.flush()
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x01\x01\x01\x02\x01\x03"
+
+
+async def test_conn_send_too_big_packet(streams: tuple[anyio.abc.SocketStream, ...]):
+    conn = net.Connection(streams[1])
+    with pytest.raises(ValueError):
+        await conn.send(bytes(2097152))
+
+
+async def test_conn_encryption_with_queued_packets(
+    streams: tuple[anyio.abc.SocketStream, ...],
+):
+    client, server = streams
+    conn = net.Connection(server)
+    conn.write(b"\x01")
+    with pytest.raises(RuntimeError):
+        conn.enable_encryption(random.randbytes(16))
+    await conn.flush()
+    conn.enable_encryption(random.randbytes(16))
+    await anyio.sleep(0.1)
+    assert await client.receive() == b"\x01\x01"
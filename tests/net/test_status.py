@@ -0,0 +1,93 @@
+import io
+import json
+
+import anyio
+import pytest
+
+from cubes import net
+from cubes.net import serializers, status
+
+pytestmark = pytest.mark.anyio
+
+_HOST = "127.0.0.1"
+_PORT = 25561
+
+
+def _handshake(intention: int) -> bytes:
+    packet = bytearray(b"\x00")
+    serializers.VarIntSerializer.write(packet, 766)
+    serializers.StringSerializer.write(packet, "localhost")
+    serializers.UnsignedShortSerializer.write(packet, _PORT)
+    serializers.VarIntSerializer.write(packet, intention)
+    return bytes(packet)
+
+
+def test_cached_response():
+    provider = status.StatusProvider("1.20.5", 766, "Hello", favicon=b"\x89PNG")
+    response = provider.response
+    assert provider.response is response
+    provider.online_players = 0
+    assert provider.response is response
+    provider.online_players = 1
+    assert provider.response is not response
+    length, offset = serializers.VarIntSerializer.read(provider.response, 0)
+    assert length == len(provider.response) - offset
+    assert provider.response[offset] == 0x00
+    text, _ = serializers.StringSerializer.read(provider.response, offset + 1)
+    assert json.loads(text) == {
+        "version": {"name": "1.20.5", "protocol": 766},
+        "players": {"max": 20, "online": 1},
+        "description": {"text": "Hello"},
+        "enforcesSecureChat": False,
+        "favicon": "data:image/png;base64,iVBORw==",
+    }
+
+
+def test_legacy_response():
+    provider = status.StatusProvider(
+        "1.20.5", 766, {"text": "A ", "extra": [{"text": "server"}]}, max_players=5
+    )
+    text = "\xa71\x00127\x001.20.5\x00A server\x000\x005"
+    assert provider.legacy_response == (
+        b"\xff" + len(text).to_bytes(2, "big") + text.encode("utf-16-be")
+    )
+    legacy_response = provider.legacy_response
+    provider.description = "Other"
+    assert provider.legacy_response != legacy_response
+
+
+async def test_server_status():
+    calls = []
+
+    async def _handler(*args):
+        calls.append(args)
+
+    provider = status.StatusProvider("1.20.5", 766, "Hello")
+    server = net.Server(
+        _handler, _handler, _handler, _handler, status_provider=provider
+    )
+    async with anyio.create_task_group() as task_group:
+        await task_group.start(server.run, _HOST, _PORT)
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            conn = net.Connection(stream)
+            await conn.send(_handshake(1), b"\x00")
+            _, offset = serializers.VarIntSerializer.read(provider.response, 0)
+            assert (await conn.receive()).getvalue() == provider.response[offset:]
+            ping = b"\x01" + bytes(range(8))
+            await conn.send(ping)
+            assert (await conn.receive()).getvalue() == ping
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            await stream.send(b"\xfe\x01")
+            assert await stream.receive() == provider.legacy_response
+        await anyio.sleep(0.1)
+        assert not calls
+        async with await anyio.connect_tcp(_HOST, _PORT) as stream:
+            await net.Connection(stream).send(_handshake(2))
+            await anyio.sleep(0.1)
+        await anyio.sleep(0.1)
+        task_group.cancel_scope.cancel()
+    new_conn, (conn, packet), close_conn = calls
+    assert new_conn == (conn,)
+    assert isinstance(packet, io.BytesIO)
+    assert packet.getvalue() == _handshake(2)
+    assert close_conn[0] is conn
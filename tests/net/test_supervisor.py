@@ -0,0 +1,73 @@
+import os
+import signal
+import threading
+import time
+
+import anyio
+import pytest
+
+from cubes import net
+
+_HOST = "127.0.0.1"
+_PORT = 25562
+
+
+async def _worker(index: int) -> None:
+    async def _process_packet(conn, packet):
+        await conn.send(str(os.getpid()).encode() + packet.getvalue())
+
+    async def _noop(*_):
+        pass
+
+    server = net.Server(_noop, _noop, _process_packet, _noop)
+    await server.run(_HOST, _PORT, reuse_port=True)
+
+
+async def _request(data: bytes) -> bytes:
+    for _ in range(50):
+        try:
+            stream = await anyio.connect_tcp(_HOST, _PORT)
+        except OSError:
+            await anyio.sleep(0.1)
+            continue
+        async with stream:
+            conn = net.Connection(stream)
+            await conn.send(data)
+            return (await conn.receive()).getvalue()
+    raise AssertionError("Workers haven't started.")
+
+
+def _wait(condition) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        time.sleep(0.05)
+    raise AssertionError("Timed out.")
+
+
+def test_invalid_workers():
+    with pytest.raises(ValueError):
+        net.Supervisor(_worker, 0)
+
+
+def test_restart_crashed_worker():
+    supervisor = net.Supervisor(_worker, 2, restart_delay=0)
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    try:
+        _wait(lambda: len(supervisor.pids) == 2)
+        pids = set(supervisor.pids.values())
+        response = anyio.run(_request, b"\x00ping")
+        assert response.endswith(b"\x00ping")
+        assert int(response[: -len(b"\x00ping")]) in pids
+        os.kill(supervisor.pids[0], signal.SIGKILL)
+        _wait(lambda: supervisor.restarts == 1 and len(supervisor.pids) == 2)
+        assert supervisor.pids[1] in pids
+        assert supervisor.pids[0] not in pids
+        assert anyio.run(_request, b"\x00ping").endswith(b"\x00ping")
+    finally:
+        supervisor.stop()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert not supervisor.is_running
+    assert not supervisor.pids
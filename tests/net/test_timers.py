@@ -0,0 +1,67 @@
+import anyio
+import pytest
+
+from cubes.net import timers
+
+pytestmark = pytest.mark.anyio
+
+_RESOLUTION = 0.01
+
+
+@pytest.mark.parametrize("resolution,size", [(0, 8), (-1, 8), (0.1, 0)])
+def test_invalid_wheel(resolution: float, size: int):
+    with pytest.raises(ValueError):
+        timers.TimerWheel(resolution, size)
+
+
+def _advance(wheel: timers.TimerWheel, ticks: int) -> None:
+    for _ in range(ticks):
+        wheel._advance()
+
+
+def test_timer():
+    wheel = timers.TimerWheel(1, 8)
+    fired = []
+    timer = wheel.call_later(2, lambda: fired.append(1))
+    _advance(wheel, 2)
+    assert not fired and timer.is_active
+    _advance(wheel, 1)
+    assert fired == [1] and not timer.is_active
+    _advance(wheel, 10)
+    assert fired == [1]
+
+
+def test_timer_reset_and_cancel():
+    wheel = timers.TimerWheel(1, 8)
+    fired = []
+    timer = wheel.call_later(2, lambda: fired.append(wheel._tick))
+    _advance(wheel, 2)
+    timer.reset(2)  # later
+    _advance(wheel, 2)
+    assert not fired
+    timer.reset(20)  # further than one turn of the wheel
+    _advance(wheel, 20)
+    assert not fired
+    timer.reset(1)  # earlier
+    _advance(wheel, 2)
+    assert fired == [26]
+    timer.reset(1)
+    timer.cancel()
+    _advance(wheel, 10)
+    assert fired == [26]
+    timer.reset(3)
+    _advance(wheel, 4)
+    assert fired == [26, 40]
+
+
+async def test_wheel_run():
+    wheel = timers.TimerWheel(_RESOLUTION)
+    fired = anyio.Event()
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(wheel.run)
+        start = anyio.current_time()
+        wheel.call_later(0.05, fired.set)
+        with anyio.fail_after(1):
+            await fired.wait()
+        assert 0.05 <= anyio.current_time() - start < 0.05 + 3 * _RESOLUTION + 0.05
+        task_group.cancel_scope.cancel()
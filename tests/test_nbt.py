@@ -0,0 +1,191 @@
+import array
+import io
+
+import nbtlib  # type: ignore
+import pytest
+
+from cubes import nbt
+
+
+@pytest.fixture
+def test_data() -> nbtlib.Compound:
+    with open("tests/data/test_data.snbt", "r") as file:
+        return nbtlib.parse_nbt(file.read())
+
+
+def _nbtlib_bytes(value: nbtlib.Compound) -> bytes:
+    buffer = io.BytesIO()
+    buffer.write(b"\x0a\x00\x00")
+    value.write(buffer)
+    return buffer.getvalue()
+
+
+def test_same_as_nbtlib(test_data: nbtlib.Compound):
+    data = _nbtlib_bytes(test_data)
+    assert nbt.dumps(test_data) == data
+    assert nbt.loads(data) == test_data
+    # plain values don't keep the tag types, a Byte is encoded back as Int
+    assert nbt.dumps(nbt.loads(data)) != data
+
+
+def test_network_root():
+    data = nbt.dumps({"text": "Hello"}, network=True)
+    assert data == b"\x0a\x08\x00\x04text\x00\x05Hello\x00"
+    assert nbt.loads(data, network=True) == {"text": "Hello"}
+    assert nbt.dumps("Hello", network=True) == b"\x08\x00\x05Hello"
+    assert nbt.loads(b"\x08\x00\x05Hello", network=True) == "Hello"
+    assert nbt.dumps(None, network=True) == b"\x00"
+    assert nbt.read(b"\x00\xff", 0, network=True) == (None, 1)
+    assert nbt.dumps({}, name="root") == b"\x0a\x00\x04root\x00"
+
+
+def test_plain_values():
+    value = {
+        "byte": True,
+        "int": -1,
+        "long": 1 << 40,
+        "double": 0.5,
+        "bytes": b"\x01\xff",
+        "ints": array.array("i", [1, -2]),
+        "longs": array.array("q", [1 << 40]),
+        "list": [1, 1 << 40],
+        "nested": [[{"a": "b"}], []],
+    }
+    data = nbt.dumps(value)
+    assert data.startswith(b"\x0a\x00\x00\x01\x00\x04byte\x01")
+    assert b"\x09\x00\x04list\x04\x00\x00\x00\x02" in data
+    assert nbt.loads(data) == {**value, "byte": 1, "bytes": b"\x01\xff"}
+    parsed = nbtlib.Compound.parse(io.BytesIO(data[3:]))
+    assert parsed["list"] == [1, 1 << 40]
+    assert list(parsed["ints"]) == [1, -2]
+    assert parsed["nested"] == [[{"a": "b"}], []]
+
+
+def test_typed_wrappers():
+    value = nbtlib.Compound(
+        {
+            "short": nbtlib.Short(3),
+            "float": nbtlib.Float(0.25),
+            "list": nbtlib.List[nbtlib.Byte]([1, 2]),
+            "empty": nbtlib.List[nbtlib.Compound](),
+            "longs": nbtlib.LongArray([1, -1]),
+        }
+    )
+    data = nbt.dumps(value)
+    assert data == _nbtlib_bytes(value)
+    assert nbt.loads(data) == {
+        "short": 3,
+        "float": 0.25,
+        "list": [1, 2],
+        "empty": [],
+        "longs": array.array("q", [1, -1]),
+    }
+
+
+@pytest.mark.parametrize(
+    ("value", "data"),
+    (
+        ("\0", b"\xc0\x80"),
+        ("é", b"\xc3\xa9"),
+        ("\U0001f600", b"\xed\xa0\xbd\xed\xb8\x80"),
+    ),
+)
+def test_modified_utf8(value: str, data: bytes):
+    encoded = nbt.dumps(value, network=True)
+    assert encoded == b"\x08" + len(data).to_bytes(2, "big") + data
+    assert nbt.loads(encoded, network=True) == value
+
+
+@pytest.mark.parametrize(
+    "data",
+    (
+        b"",
+        b"\x0a\x00\x00\x03\x00\x01a\x00",
+        b"\x0a\x00\x00\x0d\x00\x01a\x00",
+        b"\x0a\x00\x00\x09\x00\x01a\x0a\x7f\xff\xff\xff\x00",
+        b"\x0a\x00\x00\x00\x00",
+        b"\x08\x00\x00\x00\x05abc",
+    ),
+)
+def test_invalid_data(data: bytes):
+    with pytest.raises(ValueError):
+        nbt.loads(data)
+
+
+def test_too_deep():
+    value: list = []
+    for _ in range(nbt.MAX_DEPTH + 1):
+        value = [value]
+    with pytest.raises(ValueError):
+        nbt.dumps(value)
+    data = b"\x09\x00\x00" + b"\x09\x00\x00\x00\x01" * (nbt.MAX_DEPTH + 2)
+    with pytest.raises(ValueError):
+        nbt.loads(data)
+
+
+def test_unsupported_type():
+    with pytest.raises(TypeError):
+        nbt.dumps({"set": {1}})
+
+
+@pytest.fixture
+def item() -> bytes:
+    value = nbtlib.parse_nbt(
+        '{id:"minecraft:bow",count:1b,tag:{Damage:3s,CustomModelData:7,'
+        "display:{Name:'\"Bow\"'},Levels:[1s,2s],"
+        'Enchantments:[{id:"minecraft:power",lvl:5s}]}}'
+    )
+    return b"\x0a" + _nbtlib_bytes(value)[3:]
+
+
+def test_lazy_unchanged(item: bytes):
+    view, offset = nbt.read_lazy(item + b"\xff", 0, network=True)
+    assert offset == len(item)
+    assert view.is_indexed
+    assert "tag" in view
+    assert not view["tag"].is_indexed
+    assert view.tag("count") == nbt.TagType.BYTE
+    assert nbt.dumps(view, network=True) == item
+    assert view["tag"]["CustomModelData"] == 7
+    assert view["tag"]["Enchantments"][0]["lvl"] == 5
+    assert nbt.dumps(view, network=True) == item
+    assert view.to_dict() == nbt.loads(item, network=True)
+    assert view == nbt.loads(item, network=True)
+
+
+def test_lazy_changes(item: bytes):
+    view = nbt.loads_lazy(item, network=True)
+    tag = view["tag"]
+    tag["CustomModelData"] = 8
+    tag["Levels"].append(3)
+    tag["Enchantments"][0]["lvl"] = 1
+    del view["count"]
+    view["extra"] = {"a": [1, 2]}
+    data = nbt.dumps(view, network=True)
+    parsed = nbtlib.Compound.parse(io.BytesIO(data[1:]))
+    assert "count" not in parsed
+    assert parsed["extra"] == {"a": [1, 2]}
+    assert parsed["tag"]["CustomModelData"] == 8
+    # unchanged and decoded entries keep their types
+    assert isinstance(parsed["tag"]["Damage"], nbtlib.Short)
+    assert parsed["tag"]["Levels"] == nbtlib.List[nbtlib.Short]([1, 2, 3])
+    assert isinstance(parsed["tag"]["Enchantments"][0]["lvl"], nbtlib.Int)
+    tag["Levels"].append(1 << 20)
+    with pytest.raises(ValueError):
+        nbt.dumps(view, network=True)
+
+
+def test_lazy_in_plain_value(item: bytes):
+    view = nbt.loads_lazy(item, network=True)
+    data = nbt.dumps({"item": view, "slot": 1})
+    assert nbt.loads(data) == {"item": nbt.loads(item, network=True), "slot": 1}
+    assert item[1:] in data
+
+
+@pytest.mark.parametrize(
+    "data",
+    (b"", b"\x08\x00\x00", b"\x0a\x00\x00\x03\x00\x01a\x00", b"\x0a\x00\x00"),
+)
+def test_lazy_invalid_data(data: bytes):
+    with pytest.raises(ValueError):
+        nbt.loads_lazy(data)
@@ -0,0 +1,112 @@
+import io
+
+import nbtlib  # type: ignore
+import pytest
+
+from cubes import world
+from cubes.net import serializers
+
+
+def _parse(data: bytes) -> tuple[int, int, nbtlib.Compound, bytes, bytes]:
+    x, offset = serializers.IntSerializer.read(data, 0)
+    z, offset = serializers.IntSerializer.read(data, offset)
+    assert data[offset] == 0x0A
+    buffer = io.BytesIO(data[offset + 1 :])
+    heightmaps = nbtlib.Compound.parse(buffer)
+    offset += 1 + buffer.tell()
+    length, offset = serializers.VarIntSerializer.read(data, offset)
+    return x, z, heightmaps, data[offset : offset + length], data[offset + length :]
+
+
+def _parse_light(data: bytes, offset: int) -> tuple[int, ...]:
+    bitset, varint = serializers.BitSetSerializer, serializers.VarIntSerializer
+    result = []
+    for _ in range(4):
+        mask, offset = bitset.read(data, offset)
+        result.append(mask)
+    for _ in range(2):
+        count, offset = varint.read(data, offset)
+        for _ in range(count):
+            array, offset = serializers.ByteArraySerializer.read(data, offset)
+            assert len(array) == 2048
+        result.append(count)
+    assert offset == len(data)
+    return tuple(result)
+
+
+def test_empty_column():
+    column = world.ChunkColumn(1, -2)
+    x, z, heightmaps, sections, tail = _parse(column.serialize())
+    assert (x, z, heightmaps) == (1, -2, {})
+    # block count, single valued blocks and biomes
+    assert sections == b"\x00" * 8 * 24
+    assert tail[0] == 0  # block entities
+    assert _parse_light(tail, 1) == ((1 << 26) - 1, 0, 0, (1 << 26) - 1, 26, 0)
+
+
+def test_blocks_and_biomes():
+    column = world.ChunkColumn(0, 0)
+    column.set_block(17, -64, 3, 5)
+    column.set_block(1, 319, 3, 6)
+    column.set_biome(5, 0, 9, 2)
+    assert column.get_block(1, -64, 3) == 5
+    assert column.get_block(1, 319, 3) == 6
+    assert column.get_biome(4, 3, 8) == 2
+    assert column.sections[0].block_count == 1
+    assert column.sections[4].biomes.get(1, 0, 2) == 2
+    with pytest.raises(IndexError):
+        column.set_block(0, 320, 0, 1)
+    _, _, _, sections, _ = _parse(column.serialize())
+    expected = b"".join(section.serialize() for section in column.sections)
+    assert sections == expected
+
+
+def test_cache_and_dirty_sections(monkeypatch: pytest.MonkeyPatch):
+    column = world.ChunkColumn(0, 0)
+    column.heightmaps = {"MOTION_BLOCKING": nbtlib.LongArray([0] * 37)}
+    data = column.serialize()
+    packet = column.to_packet(0x27)
+    assert packet == b"\x27" + data
+    assert column.serialize() is data
+    assert column.to_packet(0x27) is packet
+
+    encoded = []
+    original = world.ChunkSection.serialize
+
+    def serialize(section: world.ChunkSection) -> bytes:
+        encoded.append(section)
+        return original(section)
+
+    monkeypatch.setattr(world.ChunkSection, "serialize", serialize)
+    column.set_block(0, 0, 0, 0)
+    assert column.serialize() is data
+    column.set_block(0, 0, 0, 1)
+    assert column.serialize() != data
+    assert encoded == [column.sections[4]]
+    assert column.to_packet(0x27) == b"\x27" + column.serialize()
+
+    column.sections[0].blocks.fill(2)
+    column.mark_dirty(0)
+    column.serialize()
+    assert encoded == [column.sections[4], column.sections[0]]
+
+
+def test_invalid_height():
+    with pytest.raises(ValueError):
+        world.ChunkColumn(0, 0, min_y=-60)
+
+
+def test_light():
+    column = world.ChunkColumn(0, 0)
+    data = column.serialize()
+    assert column.get_light(0, -80, 0) == (15, 0)
+    column.set_light(1, -64, 2, sky=3, block=14)
+    assert column.get_light(1, -64, 2) == (3, 14)
+    assert column.get_light(0, -64, 2) == (15, 0)
+    assert column.serialize() != data
+    light = column.serialize_light()
+    assert column.serialize().endswith(light)
+    sky_mask = (1 << 26) - 1
+    assert _parse_light(light, 0) == (sky_mask, 1 << 1, 0, sky_mask ^ 1 << 1, 26, 1)
+    with pytest.raises(IndexError):
+        column.set_light(0, 336, 0, sky=0)
@@ -0,0 +1,46 @@
+import pytest
+
+from cubes import world
+
+
+def test_shared_arrays():
+    light = world.LightStorage(4, 15)
+    assert light.section(0) is light.section(3)
+    light.set(1, 0, 0, 0, 7)
+    assert light.section(0) is light.section(3)
+    assert light.section(1) is not light.section(0)
+    assert isinstance(light.section(1), bytearray)
+    assert light.get(1, 0, 0, 0) == 7
+    assert light.get(1, 1, 0, 0) == 15
+    assert light.get(0, 0, 0, 0) == 15
+
+
+def test_nibble_layout():
+    light = world.LightStorage(1)
+    light.set(0, 1, 0, 0, 0xA)
+    light.set(0, 0, 0, 1, 0x5)
+    data = light.section(0)
+    assert data is not None
+    assert data[0] == 0xA0
+    assert data[8] == 0x05
+
+
+def test_encode():
+    light = world.LightStorage(4)
+    light.fill(1, None)
+    light.fill(2, 15)
+    light.set(3, 0, 0, 0, 1)
+    mask, empty_mask, arrays = light.encode()
+    assert (mask, empty_mask) == (0b1100, 0b0001)
+    assert arrays[0] == b"\xff" * 2048
+    assert arrays[1][0] == 1
+
+
+def test_invalid():
+    light = world.LightStorage(1)
+    with pytest.raises(ValueError):
+        light.set(0, 0, 0, 0, 16)
+    with pytest.raises(ValueError):
+        light.fill(0, -1)
+    with pytest.raises(ValueError):
+        light.set_section(0, b"")
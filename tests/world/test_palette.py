@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from cubes import world
+from cubes.net import serializers
+
+
+def test_single_value():
+    blocks = world.BlockStates(7)
+    assert blocks.bits_per_entry == 0
+    assert blocks.palette == (7,)
+    assert list(blocks) == [7] * 4096
+    assert blocks.serialize() == b"\x00\x07\x00"
+    blocks.set(1, 2, 3, 7)
+    assert blocks.bits_per_entry == 0
+
+
+def test_indirect_and_direct():
+    blocks = world.BlockStates()
+    expected = [0] * 4096
+    for value in range(1, 300):
+        index = random.randrange(4096)
+        blocks[index] = expected[index] = value
+        assert blocks[index] == value
+        if value < 16:
+            assert blocks.bits_per_entry == 4
+    assert blocks.palette is None
+    assert blocks.bits_per_entry == 15
+    assert list(blocks) == expected
+    with pytest.raises(ValueError):
+        blocks[0] = 1 << 15
+
+
+def test_coordinates():
+    blocks = world.BlockStates()
+    blocks.set(1, 2, 3, 5)
+    assert blocks[2 << 8 | 3 << 4 | 1] == 5
+    biomes = world.Biomes()
+    biomes.set(1, 2, 3, 5)
+    assert biomes[2 << 4 | 3 << 2 | 1] == 5
+    with pytest.raises(IndexError):
+        blocks[4096] = 1
+
+
+def test_wire_format():
+    biomes = world.Biomes(1)
+    biomes[0] = 2
+    data = biomes.serialize()
+    # 1 bit per entry: palette [1, 2], the first entry has index 1
+    assert data == b"\x01\x02\x01\x02" + serializers.LongArraySerializer.encode([1])
+    biomes[63] = 3
+    # 2 bits per entry, 32 entries per Long
+    assert biomes.serialize() == b"\x02\x03\x01\x02\x03" + (
+        serializers.LongArraySerializer.encode([1, 2 << 62])
+    )
+
+
+def test_cached_encoding():
+    blocks = world.BlockStates()
+    blocks[10] = 1
+    data = blocks.serialize()
+    assert blocks.serialize() is data
+    blocks[10] = 1
+    assert blocks.serialize() is data
+    blocks[11] = 1
+    assert blocks.serialize() is not data
+
+
+@pytest.mark.parametrize("values", (1, 20, 300))
+def test_read(values: int):
+    blocks = world.BlockStates()
+    for index in range(4096):
+        blocks[index] = random.randrange(values)
+    data = b"\xff" + blocks.serialize()
+    read, offset = world.BlockStates.read(data, 1)
+    assert offset == len(data)
+    assert list(read) == list(blocks)
+    assert read.serialize() == blocks.serialize()
+
+
+def test_invalid_direct_bits():
+    with pytest.raises(ValueError):
+        world.Biomes(direct_bits=3)
+
+
+def test_count():
+    blocks = world.BlockStates()
+    assert blocks.count(0) == 4096
+    assert blocks.count(1) == 0
+    blocks[0] = blocks[1] = 1
+    assert (blocks.count(0), blocks.count(1), blocks.count(2)) == (4094, 2, 0)